@@ -0,0 +1,27 @@
+-- Daily sales rollups served by /api/admin/analytics/*
+-- Rebuilt by services/analytics/analytics_service.py
+
+create table if not exists analytics_daily_orders (
+    day date not null,
+    status text not null,
+    payment_status text not null,
+    orders integer not null default 0,
+    revenue numeric(14, 2) not null default 0,
+    items integer not null default 0,
+    refreshed_at timestamptz not null default now(),
+    primary key (day, status, payment_status)
+);
+
+create table if not exists analytics_daily_products (
+    day date not null,
+    product_id text not null,
+    name text,
+    quantity integer not null default 0,
+    revenue numeric(14, 2) not null default 0,
+    refreshed_at timestamptz not null default now(),
+    primary key (day, product_id)
+);
+
+-- Rebuilds scan orders by creation day
+create index if not exists orders_created_at_idx on orders (created_at);
+create index if not exists order_items_order_id_idx on order_items (order_id);
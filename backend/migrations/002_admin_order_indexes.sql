@@ -0,0 +1,17 @@
+-- Keyset pagination and filters for /api/admin/orders/search
+-- Every filter is paired with the (created_at, order_id) sort so a page
+-- is an index range scan of at most `limit + 1` rows.
+
+create index if not exists orders_created_order_idx
+    on orders (created_at desc, order_id desc);
+
+create index if not exists orders_status_created_idx
+    on orders (status, created_at desc, order_id desc);
+
+create index if not exists orders_payment_status_created_idx
+    on orders (payment_status, created_at desc, order_id desc);
+
+create index if not exists orders_user_created_idx
+    on orders (user_id, created_at desc, order_id desc);
+
+create index if not exists users_email_idx on users (email);
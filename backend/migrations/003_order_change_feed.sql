@@ -0,0 +1,26 @@
+-- Change feed for /api/admin/orders/changes
+-- Every insert or update stamps the order with the next value of a global
+-- sequence, giving clients a strictly increasing cursor that does not depend
+-- on worker clocks.
+
+alter table orders add column if not exists updated_at timestamptz not null default now();
+
+create sequence if not exists orders_change_seq;
+
+alter table orders add column if not exists change_seq bigint not null default nextval('orders_change_seq');
+
+create or replace function orders_touch_change_seq() returns trigger as $$
+begin
+    new.change_seq := nextval('orders_change_seq');
+    new.updated_at := now();
+    return new;
+end;
+$$ language plpgsql;
+
+drop trigger if exists orders_touch_change_seq on orders;
+
+create trigger orders_touch_change_seq
+    before update on orders
+    for each row execute function orders_touch_change_seq();
+
+create index if not exists orders_change_seq_idx on orders (change_seq);
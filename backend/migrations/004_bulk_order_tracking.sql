@@ -0,0 +1,19 @@
+-- Batch status/tracking update used by /api/admin/orders/bulk-update
+-- `updates` is a JSON array of
+--   {"order_id": ..., "status": ..., "tracking_number": ..., "tracking_provider": ...}
+-- Null fields leave the current value untouched. Returns the updated rows.
+
+create or replace function bulk_update_order_tracking(updates jsonb)
+returns setof orders
+language sql
+as $$
+    update orders o
+    set status = coalesce(u.status, o.status),
+        tracking_number = coalesce(u.tracking_number, o.tracking_number),
+        tracking_provider = coalesce(u.tracking_provider, o.tracking_provider),
+        updated_at = now()
+    from jsonb_to_recordset(updates)
+        as u(order_id text, status text, tracking_number text, tracking_provider text)
+    where o.order_id = u.order_id
+    returning o.*;
+$$;
@@ -0,0 +1,73 @@
+-- One cart and one wishlist per user.
+-- Lets get-or-create be a single `upsert ... on conflict (user_id)`, so
+-- concurrent first requests can no longer create duplicate containers.
+-- Existing duplicates are merged first: the items of every extra cart or
+-- wishlist move into the user's oldest one (lowest id), quantities of the
+-- same product are added up, and the extras are deleted.
+
+begin;
+
+create temporary table duplicate_carts on commit drop as
+select c.id as duplicate_id, k.keeper_id
+from carts c
+join (
+    select user_id, min(id) as keeper_id
+    from carts
+    group by user_id
+    having count(*) > 1
+) k on k.user_id = c.user_id and c.id <> k.keeper_id;
+
+create temporary table duplicate_wishlists on commit drop as
+select w.id as duplicate_id, k.keeper_id
+from wishlists w
+join (
+    select user_id, min(id) as keeper_id
+    from wishlists
+    group by user_id
+    having count(*) > 1
+) k on k.user_id = w.user_id and w.id <> k.keeper_id;
+
+-- Products already in the kept cart: add the duplicates' quantities
+update cart_items kept
+set quantity = kept.quantity + moved.quantity
+from (
+    select d.keeper_id, ci.product_id, sum(ci.quantity) as quantity
+    from cart_items ci
+    join duplicate_carts d on d.duplicate_id = ci.cart_id
+    group by d.keeper_id, ci.product_id
+) moved
+where kept.cart_id = moved.keeper_id and kept.product_id = moved.product_id;
+
+-- Products only in the duplicates: one line each in the kept cart
+insert into cart_items (cart_id, product_id, quantity)
+select d.keeper_id, ci.product_id, sum(ci.quantity)
+from cart_items ci
+join duplicate_carts d on d.duplicate_id = ci.cart_id
+where not exists (
+    select 1 from cart_items kept
+    where kept.cart_id = d.keeper_id and kept.product_id = ci.product_id
+)
+group by d.keeper_id, ci.product_id;
+
+delete from cart_items where cart_id in (select duplicate_id from duplicate_carts);
+delete from carts where id in (select duplicate_id from duplicate_carts);
+
+insert into wishlist_items (wishlist_id, product_id)
+select distinct d.keeper_id, wi.product_id
+from wishlist_items wi
+join duplicate_wishlists d on d.duplicate_id = wi.wishlist_id
+where not exists (
+    select 1 from wishlist_items kept
+    where kept.wishlist_id = d.keeper_id and kept.product_id = wi.product_id
+);
+
+delete from wishlist_items where wishlist_id in (select duplicate_id from duplicate_wishlists);
+delete from wishlists where id in (select duplicate_id from duplicate_wishlists);
+
+create unique index if not exists carts_user_id_key on carts (user_id);
+create unique index if not exists wishlists_user_id_key on wishlists (user_id);
+
+create index if not exists cart_items_cart_product_idx on cart_items (cart_id, product_id);
+create index if not exists wishlist_items_wishlist_product_idx on wishlist_items (wishlist_id, product_id);
+
+commit;
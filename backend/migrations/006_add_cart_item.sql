@@ -0,0 +1,82 @@
+-- Single-round-trip add-to-cart used by POST /api/cart/add
+-- Get-or-create the cart, then insert the line or increment its quantity,
+-- guarded by product stock. Concurrent adds of the same product serialize
+-- on the cart_items row, so no increment is lost and stock is re-checked
+-- against the latest quantity.
+-- The old select-then-insert add could race into duplicate lines, so those
+-- are merged first: the lowest id keeps the summed quantity, capped at the
+-- product's stock (but never below one unit, like any other line), and the
+-- other rows are deleted.
+
+begin;
+
+update cart_items kept
+set quantity = greatest(1, least(merged.quantity, coalesce(p.stock, merged.quantity)))
+from (
+    select cart_id, product_id, min(id) as keep_id, sum(quantity) as quantity
+    from cart_items
+    group by cart_id, product_id
+    having count(*) > 1
+) merged
+left join products p on p.product_id = merged.product_id
+where kept.id = merged.keep_id;
+
+delete from cart_items ci
+using cart_items kept
+where kept.cart_id = ci.cart_id
+  and kept.product_id = ci.product_id
+  and kept.id < ci.id;
+
+create unique index if not exists cart_items_cart_product_key
+    on cart_items (cart_id, product_id);
+
+-- Superseded by the unique index above
+drop index if exists cart_items_cart_product_idx;
+
+create or replace function add_cart_item(p_user_id text, p_product_id text, p_quantity integer)
+returns jsonb
+language plpgsql
+as $$
+declare
+    v_cart_id carts.id%type;
+    v_stock integer;
+    v_name text;
+    v_quantity integer;
+begin
+    select stock, name into v_stock, v_name
+    from products
+    where product_id = p_product_id;
+
+    if not found then
+        return jsonb_build_object('result', 'not_found');
+    end if;
+
+    if v_stock < p_quantity then
+        return jsonb_build_object('result', 'insufficient_stock', 'name', v_name);
+    end if;
+
+    insert into carts (user_id) values (p_user_id)
+    on conflict (user_id) do update set user_id = excluded.user_id
+    returning id into v_cart_id;
+
+    insert into cart_items (cart_id, product_id, quantity)
+    values (v_cart_id, p_product_id, p_quantity)
+    on conflict (cart_id, product_id) do update
+        set quantity = cart_items.quantity + excluded.quantity
+        where cart_items.quantity + excluded.quantity <= v_stock
+    returning quantity into v_quantity;
+
+    if v_quantity is null then
+        return jsonb_build_object('result', 'stock_limit', 'name', v_name, 'cart_id', v_cart_id);
+    end if;
+
+    return jsonb_build_object(
+        'result', 'added',
+        'name', v_name,
+        'quantity', v_quantity,
+        'cart_id', v_cart_id
+    );
+end;
+$$;
+
+commit;
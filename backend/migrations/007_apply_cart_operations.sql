@@ -0,0 +1,84 @@
+-- Multi-line cart edit used by PATCH /api/cart
+-- `p_operations` is a JSON array of
+--   {"op": "set" | "add" | "remove", "product_id": ..., "quantity": ...}
+-- applied in order inside one transaction. Any failure raises
+-- 'not_found:<product_id>' or 'stock_limit:<product_id>' and rolls back the
+-- whole batch. Returns the resulting cart lines joined with product details.
+
+create or replace function apply_cart_operations(p_user_id text, p_operations jsonb)
+returns jsonb
+language plpgsql
+as $$
+declare
+    v_cart_id carts.id%type;
+    v_op jsonb;
+    v_product_id text;
+    v_quantity integer;
+    v_stock integer;
+    v_current integer;
+    v_target integer;
+begin
+    insert into carts (user_id) values (p_user_id)
+    on conflict (user_id) do update set user_id = excluded.user_id
+    returning id into v_cart_id;
+
+    for v_op in select * from jsonb_array_elements(p_operations) loop
+        v_product_id := v_op->>'product_id';
+        v_quantity := coalesce((v_op->>'quantity')::integer, 0);
+
+        if v_op->>'op' = 'remove' then
+            delete from cart_items
+            where cart_id = v_cart_id and product_id = v_product_id;
+            continue;
+        end if;
+
+        select stock into v_stock
+        from products
+        where product_id = v_product_id;
+
+        if not found then
+            raise exception 'not_found:%', v_product_id using errcode = 'P0001';
+        end if;
+
+        select quantity into v_current
+        from cart_items
+        where cart_id = v_cart_id and product_id = v_product_id
+        for update;
+
+        v_target := case
+            when v_op->>'op' = 'add' then coalesce(v_current, 0) + v_quantity
+            else v_quantity
+        end;
+
+        if v_target <= 0 then
+            delete from cart_items
+            where cart_id = v_cart_id and product_id = v_product_id;
+            continue;
+        end if;
+
+        if v_target > v_stock then
+            raise exception 'stock_limit:%', v_product_id using errcode = 'P0001';
+        end if;
+
+        insert into cart_items (cart_id, product_id, quantity)
+        values (v_cart_id, v_product_id, v_target)
+        on conflict (cart_id, product_id) do update set quantity = excluded.quantity;
+    end loop;
+
+    return jsonb_build_object(
+        'cart_id', v_cart_id,
+        'items', coalesce((
+            select jsonb_agg(jsonb_build_object(
+                'product_id', ci.product_id,
+                'quantity', ci.quantity,
+                'name', p.name,
+                'price', p.price,
+                'images', p.images
+            ) order by ci.id)
+            from cart_items ci
+            join products p on p.product_id = ci.product_id
+            where ci.cart_id = v_cart_id
+        ), '[]'::jsonb)
+    );
+end;
+$$;
@@ -0,0 +1,117 @@
+-- Bulk moves between wishlist and cart used by
+--   POST /api/wishlist/move-to-cart and POST /api/cart/move-to-wishlist
+-- `p_product_ids` null means every line. Each call is one transaction and a
+-- fixed number of statements regardless of how many products move.
+-- Both return {"moved": [...], "skipped": [...]}.
+-- The old check-then-insert add could race into duplicate wishlist lines;
+-- the lowest id of each (wishlist_id, product_id) pair is kept and the rest
+-- deleted before the unique index is built.
+
+begin;
+
+delete from wishlist_items wi
+using wishlist_items kept
+where kept.wishlist_id = wi.wishlist_id
+  and kept.product_id = wi.product_id
+  and kept.id < wi.id;
+
+create unique index if not exists wishlist_items_wishlist_product_key
+    on wishlist_items (wishlist_id, product_id);
+
+-- Superseded by the unique index above
+drop index if exists wishlist_items_wishlist_product_idx;
+
+-- Adds one unit of each product to the cart. Products whose stock cannot
+-- cover one more unit stay in the wishlist and are reported as skipped.
+create or replace function move_wishlist_to_cart(p_user_id text, p_product_ids text[] default null)
+returns jsonb
+language plpgsql
+as $$
+declare
+    v_wishlist_id wishlists.id%type;
+    v_cart_id carts.id%type;
+    v_moved text[];
+    v_skipped text[];
+begin
+    select id into v_wishlist_id from wishlists where user_id = p_user_id;
+
+    if not found then
+        return jsonb_build_object('moved', '[]'::jsonb, 'skipped', '[]'::jsonb);
+    end if;
+
+    insert into carts (user_id) values (p_user_id)
+    on conflict (user_id) do update set user_id = excluded.user_id
+    returning id into v_cart_id;
+
+    with candidates as (
+        select wi.product_id
+        from wishlist_items wi
+        join products p on p.product_id = wi.product_id
+        left join cart_items ci
+            on ci.cart_id = v_cart_id and ci.product_id = wi.product_id
+        where wi.wishlist_id = v_wishlist_id
+          and (p_product_ids is null or wi.product_id = any(p_product_ids))
+          and coalesce(ci.quantity, 0) + 1 <= p.stock
+    ), upserted as (
+        insert into cart_items (cart_id, product_id, quantity)
+        select v_cart_id, product_id, 1 from candidates
+        on conflict (cart_id, product_id) do update
+            set quantity = cart_items.quantity + 1
+            where cart_items.quantity + 1 <= (
+                select stock from products where product_id = excluded.product_id
+            )
+        returning product_id
+    ), removed as (
+        delete from wishlist_items wi
+        using upserted u
+        where wi.wishlist_id = v_wishlist_id and wi.product_id = u.product_id
+        returning wi.product_id
+    )
+    select coalesce(array_agg(product_id), '{}') into v_moved from removed;
+
+    select coalesce(array_agg(product_id), '{}') into v_skipped
+    from wishlist_items
+    where wishlist_id = v_wishlist_id
+      and (p_product_ids is null or product_id = any(p_product_ids))
+      and not (product_id = any(v_moved));
+
+    return jsonb_build_object('moved', to_jsonb(v_moved), 'skipped', to_jsonb(v_skipped));
+end;
+$$;
+
+create or replace function move_cart_to_wishlist(p_user_id text, p_product_ids text[] default null)
+returns jsonb
+language plpgsql
+as $$
+declare
+    v_cart_id carts.id%type;
+    v_wishlist_id wishlists.id%type;
+    v_moved text[];
+begin
+    select id into v_cart_id from carts where user_id = p_user_id;
+
+    if not found then
+        return jsonb_build_object('moved', '[]'::jsonb, 'skipped', '[]'::jsonb);
+    end if;
+
+    insert into wishlists (user_id) values (p_user_id)
+    on conflict (user_id) do update set user_id = excluded.user_id
+    returning id into v_wishlist_id;
+
+    with moving as (
+        delete from cart_items
+        where cart_id = v_cart_id
+          and (p_product_ids is null or product_id = any(p_product_ids))
+        returning product_id
+    ), inserted as (
+        insert into wishlist_items (wishlist_id, product_id)
+        select v_wishlist_id, product_id from moving
+        on conflict (wishlist_id, product_id) do nothing
+    )
+    select coalesce(array_agg(product_id), '{}') into v_moved from moving;
+
+    return jsonb_build_object('moved', to_jsonb(v_moved), 'skipped', '[]'::jsonb);
+end;
+$$;
+
+commit;
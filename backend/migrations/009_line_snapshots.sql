@@ -0,0 +1,56 @@
+-- Display snapshots on cart and wishlist lines
+-- Carts and wishlists are read from their item table alone. Name, price and
+-- first image (plus stock, for wishlist badges) are copied from products
+-- when a line is inserted. The backend refreshes them in the background when
+-- a product changes. Checkout still prices orders from products.
+
+alter table cart_items add column if not exists name text;
+alter table cart_items add column if not exists price numeric(12, 2);
+alter table cart_items add column if not exists image text;
+
+alter table wishlist_items add column if not exists name text;
+alter table wishlist_items add column if not exists price numeric(12, 2);
+alter table wishlist_items add column if not exists image text;
+alter table wishlist_items add column if not exists stock integer;
+
+create or replace function snapshot_product_on_line() returns trigger as $$
+begin
+    select p.name, p.price, coalesce(p.images[1], '')
+    into new.name, new.price, new.image
+    from products p
+    where p.product_id = new.product_id;
+
+    if tg_table_name = 'wishlist_items' then
+        select p.stock into new.stock
+        from products p
+        where p.product_id = new.product_id;
+    end if;
+
+    return new;
+end;
+$$ language plpgsql;
+
+drop trigger if exists cart_items_snapshot_product on cart_items;
+create trigger cart_items_snapshot_product
+    before insert on cart_items
+    for each row execute function snapshot_product_on_line();
+
+drop trigger if exists wishlist_items_snapshot_product on wishlist_items;
+create trigger wishlist_items_snapshot_product
+    before insert on wishlist_items
+    for each row execute function snapshot_product_on_line();
+
+-- Backfill existing lines
+update cart_items ci
+set name = p.name, price = p.price, image = coalesce(p.images[1], '')
+from products p
+where p.product_id = ci.product_id;
+
+update wishlist_items wi
+set name = p.name, price = p.price, image = coalesce(p.images[1], ''), stock = p.stock
+from products p
+where p.product_id = wi.product_id;
+
+-- Propagation updates lines by product
+create index if not exists cart_items_product_idx on cart_items (product_id);
+create index if not exists wishlist_items_product_idx on wishlist_items (product_id);
@@ -0,0 +1,30 @@
+-- Merge a signed-cookie guest cart into the user's cart on login
+-- `p_items` is a JSON array of {"product_id": ..., "quantity": ...}.
+-- One statement upserts every line. Quantities are capped at stock and
+-- merged with greatest(), so replaying the same guest cart is harmless.
+
+create or replace function merge_guest_cart(p_user_id text, p_items jsonb)
+returns jsonb
+language plpgsql
+as $$
+declare
+    v_cart_id carts.id%type;
+    v_merged integer;
+begin
+    insert into carts (user_id) values (p_user_id)
+    on conflict (user_id) do update set user_id = excluded.user_id
+    returning id into v_cart_id;
+
+    insert into cart_items (cart_id, product_id, quantity)
+    select v_cart_id, g.product_id, least(g.quantity, p.stock)
+    from jsonb_to_recordset(p_items) as g(product_id text, quantity integer)
+    join products p on p.product_id = g.product_id
+    where p.stock > 0 and g.quantity > 0
+    on conflict (cart_id, product_id) do update
+        set quantity = greatest(cart_items.quantity, excluded.quantity);
+
+    get diagnostics v_merged = row_count;
+
+    return jsonb_build_object('cart_id', v_cart_id, 'merged', v_merged);
+end;
+$$;
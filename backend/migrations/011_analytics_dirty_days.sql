@@ -0,0 +1,106 @@
+-- Incremental refresh state for the analytics rollups (001)
+-- Days whose rollups are out of date are recorded by triggers on orders and
+-- order_items, so writes from every worker (and from SQL) are covered and
+-- marks survive restarts. `token` changes on every mark: a refresh only
+-- clears a day whose token is unchanged since it read the orders, so a
+-- write that lands mid-rebuild leaves the day dirty for the next pass.
+
+create table if not exists analytics_dirty_days (
+    day date primary key,
+    token bigint not null,
+    marked_at timestamptz not null default now()
+);
+
+create sequence if not exists analytics_dirty_token;
+
+create or replace function analytics_mark_day(p_created_at timestamptz) returns void as $$
+    insert into analytics_dirty_days (day, token)
+    values ((p_created_at at time zone 'utc')::date, nextval('analytics_dirty_token'))
+    on conflict (day) do update
+        set token = excluded.token, marked_at = now();
+$$ language sql;
+
+create or replace function analytics_mark_order() returns trigger as $$
+begin
+    if tg_op in ('UPDATE', 'DELETE') then
+        perform analytics_mark_day(old.created_at);
+    end if;
+    if tg_op in ('INSERT', 'UPDATE') then
+        perform analytics_mark_day(new.created_at);
+    end if;
+    return null;
+end;
+$$ language plpgsql;
+
+drop trigger if exists orders_analytics_mark on orders;
+create trigger orders_analytics_mark
+    after insert or update or delete on orders
+    for each row execute function analytics_mark_order();
+
+create or replace function analytics_mark_order_item() returns trigger as $$
+begin
+    perform analytics_mark_day(o.created_at)
+    from orders o
+    where o.order_id = coalesce(new.order_id, old.order_id);
+    return null;
+end;
+$$ language plpgsql;
+
+drop trigger if exists order_items_analytics_mark on order_items;
+create trigger order_items_analytics_mark
+    after insert or update or delete on order_items
+    for each row execute function analytics_mark_order_item();
+
+-- Replace the rollups for [p_start, p_end] in one transaction, so readers see
+-- either the old or the new days and never a gap. With `p_dirty` (a JSON
+-- array of {"day", "token"} read before the rebuild) nothing is written if
+-- any of those marks changed or was cleared by another refresh meanwhile:
+-- the rows were computed from orders that are already out of date. Returns
+-- the number of days written.
+create or replace function replace_analytics_rollups(
+    p_start date,
+    p_end date,
+    p_orders jsonb,
+    p_products jsonb,
+    p_dirty jsonb default null
+)
+returns integer
+language plpgsql
+as $$
+begin
+    -- Concurrent refreshes from several workers run one at a time
+    perform pg_advisory_xact_lock(hashtext('analytics_rollups'));
+
+    if p_dirty is not null and exists (
+        select 1
+        from jsonb_to_recordset(p_dirty) as m(day date, token bigint)
+        left join analytics_dirty_days d on d.day = m.day and d.token = m.token
+        where d.day is null
+    ) then
+        return 0;
+    end if;
+
+    delete from analytics_daily_orders where day between p_start and p_end;
+    delete from analytics_daily_products where day between p_start and p_end;
+
+    insert into analytics_daily_orders (day, status, payment_status, orders, revenue, items)
+    select day, status, payment_status, orders, revenue, items
+    from jsonb_to_recordset(p_orders) as r(
+        day date, status text, payment_status text, orders integer, revenue numeric, items integer
+    );
+
+    insert into analytics_daily_products (day, product_id, name, quantity, revenue)
+    select day, product_id, name, quantity, revenue
+    from jsonb_to_recordset(p_products) as r(
+        day date, product_id text, name text, quantity integer, revenue numeric
+    );
+
+    if p_dirty is not null then
+        delete from analytics_dirty_days d
+        using jsonb_to_recordset(p_dirty) as m(day date, token bigint)
+        where d.day = m.day and d.token = m.token;
+    end if;
+
+    return (p_end - p_start) + 1;
+end;
+$$;
@@ -0,0 +1,57 @@
+-- Lossless cursor for /api/admin/orders/changes (replaces the change_seq
+-- filter from 003)
+-- change_seq is taken when a row is written, not when its transaction
+-- commits, so seq 101 can become visible before seq 100 and a cursor that
+-- already passed 101 would never see 100. Rows are now also stamped with
+-- the writing transaction's id, and the feed only returns rows whose
+-- transaction is older than every transaction still running
+-- (xid < snapshot xmin). Anything that commits later has a larger xid, so
+-- the (change_xid, change_seq) cursor never skips a row. A long-running
+-- transaction delays the feed; it does not lose changes.
+
+alter table orders add column if not exists change_xid xid8 not null default pg_current_xact_id();
+
+create or replace function orders_touch_change_seq() returns trigger as $$
+begin
+    new.change_seq := nextval('orders_change_seq');
+    new.change_xid := pg_current_xact_id();
+    new.updated_at := now();
+    return new;
+end;
+$$ language plpgsql;
+
+create index if not exists orders_change_xid_seq_idx on orders (change_xid, change_seq);
+
+-- Orders changed after (p_after_xid, p_after_seq), oldest change first, with
+-- their items embedded. Returns a JSON array; change_xid is text.
+create or replace function order_changes(p_after_xid text, p_after_seq bigint, p_limit integer)
+returns jsonb
+language sql
+stable
+as $$
+    select coalesce(jsonb_agg(
+        to_jsonb(o) || jsonb_build_object(
+            'change_xid', o.change_xid::text,
+            'order_items', coalesce((
+                select jsonb_agg(jsonb_build_object(
+                    'product_id', oi.product_id,
+                    'name', oi.name,
+                    'price', oi.price,
+                    'image', oi.image,
+                    'quantity', oi.quantity
+                ))
+                from order_items oi
+                where oi.order_id = o.order_id
+            ), '[]'::jsonb)
+        )
+        order by o.change_xid, o.change_seq
+    ), '[]'::jsonb)
+    from (
+        select *
+        from orders
+        where (change_xid, change_seq) > (p_after_xid::xid8, p_after_seq)
+          and change_xid < pg_snapshot_xmin(pg_current_snapshot())
+        order by change_xid, change_seq
+        limit p_limit
+    ) o;
+$$;
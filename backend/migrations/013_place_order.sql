@@ -0,0 +1,107 @@
+-- Checkout used by POST /api/orders
+-- Prices the cart from live products, inserts the order and its items,
+-- decrements stock and clears the cart in one transaction. The cart lines
+-- and their products are locked first (products in product_id order, so
+-- concurrent checkouts sharing products cannot deadlock), which makes the
+-- stock check and decrement atomic. The wishlist stock snapshots of the
+-- sold products are refreshed in the same transaction. Failures raise
+-- 'empty_cart', 'not_found:<product_id>' or
+-- 'insufficient_stock:<product name>' and roll everything back. Returns the
+-- order total.
+
+create or replace function place_order(
+    p_user_id text,
+    p_order_id text,
+    p_shipping_address jsonb,
+    p_shipping numeric,
+    p_now timestamptz
+)
+returns numeric
+language plpgsql
+as $$
+declare
+    v_cart_id carts.id%type;
+    v_missing text;
+    v_short text;
+    v_subtotal numeric;
+begin
+    select id into v_cart_id
+    from carts
+    where user_id = p_user_id;
+
+    perform 1
+    from cart_items
+    where cart_id = v_cart_id
+    for update;
+
+    if not found then
+        raise exception 'empty_cart' using errcode = 'P0001';
+    end if;
+
+    select ci.product_id into v_missing
+    from cart_items ci
+    where ci.cart_id = v_cart_id
+      and not exists (select 1 from products p where p.product_id = ci.product_id)
+    order by ci.id
+    limit 1;
+
+    if found then
+        raise exception 'not_found:%', v_missing using errcode = 'P0001';
+    end if;
+
+    perform 1
+    from products
+    where product_id in (select product_id from cart_items where cart_id = v_cart_id)
+    order by product_id
+    for update;
+
+    select p.name into v_short
+    from cart_items ci
+    join products p on p.product_id = ci.product_id
+    where ci.cart_id = v_cart_id and p.stock < ci.quantity
+    order by ci.id
+    limit 1;
+
+    if found then
+        raise exception 'insufficient_stock:%', v_short using errcode = 'P0001';
+    end if;
+
+    select sum(p.price * ci.quantity) into v_subtotal
+    from cart_items ci
+    join products p on p.product_id = ci.product_id
+    where ci.cart_id = v_cart_id;
+
+    insert into orders (
+        order_id, user_id, created_at, updated_at, subtotal, shipping, total,
+        status, payment_status, shipping_address
+    )
+    values (
+        p_order_id, p_user_id, p_now, p_now, v_subtotal, p_shipping, v_subtotal + p_shipping,
+        'pending', 'pending', p_shipping_address
+    );
+
+    insert into order_items (order_id, product_id, name, price, image, quantity)
+    select p_order_id, p.product_id, p.name, p.price, coalesce(p.images[1], ''), ci.quantity
+    from cart_items ci
+    join products p on p.product_id = ci.product_id
+    where ci.cart_id = v_cart_id
+    order by ci.id;
+
+    update products p
+    set stock = p.stock - ci.quantity
+    from cart_items ci
+    where ci.cart_id = v_cart_id and p.product_id = ci.product_id;
+
+    -- Wishlist lines show a stock snapshot; keep it in step with the sale
+    update wishlist_items wi
+    set stock = p.stock
+    from products p
+    where p.product_id = wi.product_id
+      and p.product_id in (select product_id from cart_items where cart_id = v_cart_id);
+
+    delete from cart_items
+    where cart_id = v_cart_id;
+
+    return v_subtotal + p_shipping;
+end;
+$$;
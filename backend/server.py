@@ -1,21 +1,60 @@
-from fastapi import FastAPI, APIRouter, HTTPException, Request, Response, Depends
-from fastapi.responses import JSONResponse
+from fastapi import FastAPI, APIRouter, BackgroundTasks, HTTPException, Request, Response, Depends
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
 from dotenv import load_dotenv
 from starlette.middleware.cors import CORSMiddleware
+from starlette.routing import Match
 
 import os
+import asyncio
 import logging
 import uuid
 import jwt
+import io
+import csv
+import json
+import base64
 import requests
 
 from pathlib import Path
-from datetime import datetime, timezone, timedelta
-from typing import List, Optional, Dict, Any
+from urllib.parse import urlsplit
+from datetime import date, datetime, timezone, timedelta
+from typing import List, Literal, Optional, Dict, Any
 from pydantic import BaseModel, EmailStr
 
 from supabase import create_client
 
+from services.analytics.analytics_service import AnalyticsService
+from services.cache.singleflight import SingleFlight
+from services.cache.swr_cache import StaleWhileRevalidateCache
+from services.cache.invalidation import CacheInvalidator
+from services.cache.ttl_cache import TTLCache
+from services.cart.guest_cart import (
+    GuestCartCodec,
+    MAX_LINES as GUEST_CART_MAX_LINES,
+    MAX_QUANTITY as GUEST_CART_MAX_QUANTITY,
+)
+from services.observability.instrumented_client import InstrumentedClient
+from services.observability.metrics import Metrics, MetricsMiddleware
+from services.observability.query_profiler import QueryProfiler
+from services.realtime.order_events import (
+    InProcessBackend,
+    OrderEventBroker,
+    RedisBackend,
+    STREAM_EVICTED,
+    SubscriberLimitExceeded,
+)
+from services.storage.catalog_snapshot import CatalogSnapshot, CatalogSnapshotStore
+from services.storage.replica_routing import ReadYourWritesMiddleware, ReplicaSet, primary_pinned
+from services.storage.repository import (
+    CartOperationError,
+    EmptyCart,
+    InsufficientStock,
+    ProductNotFound,
+)
+from services.storage.sqlite_repository import SQLiteRepository
+from services.storage.supabase_repository import SupabaseRepository
+from services.tracking.provider_registry import TrackingProviderRegistry
+
 # ======================================================
 # ENV SETUP
 # ======================================================
@@ -31,6 +70,18 @@ SUPABASE_URL = os.environ["SUPABASE_URL"]
 SUPABASE_SERVICE_ROLE_KEY = os.environ["SUPABASE_SERVICE_ROLE_KEY"]
 SUPABASE_ANON_KEY = os.environ.get("SUPABASE_ANON_KEY", SUPABASE_SERVICE_ROLE_KEY)
 
+# Storefront and order data: "supabase" (PostgREST) or "sqlite" (local
+# file, direct SQL). Analytics rollups are only available with "supabase".
+STORAGE_BACKEND = os.environ.get("STORAGE_BACKEND", "supabase").lower()
+SQLITE_PATH = os.environ.get("SQLITE_PATH", str(ROOT_DIR / "store.db"))
+
+# Catalog reads from read replicas; a client that writes reads from the
+# primary for READ_YOUR_WRITES_SECONDS afterwards
+SUPABASE_REPLICA_URLS = [
+    url.strip() for url in os.environ.get("SUPABASE_REPLICA_URLS", "").split(",") if url.strip()
+]
+READ_YOUR_WRITES_SECONDS = float(os.environ.get("READ_YOUR_WRITES_SECONDS", "5"))
+
 STRIPE_API_KEY = os.environ.get("STRIPE_API_KEY")
 SHIPPING_RATE = 100.0  # ₹100 flat rate
 
@@ -40,15 +91,179 @@ FRONTEND_URL = os.environ.get("FRONTEND_URL", "http://localhost:3000")
 # Environment check
 IS_PRODUCTION = os.getenv("ENVIRONMENT") == "production"
 
+# Live order updates (Server-Sent Events)
+# SSE_MAX_CONNECTIONS caps streams per worker; when full, a stream idle for
+# SSE_EVICT_IDLE_SECONDS gives up its slot. Idle streams end with an "idle"
+# event (the client switches to polling every SSE_IDLE_POLL_SECONDS) and a
+# long retry, so EventSource does not reconnect on its own
+ORDER_EVENTS_REDIS_URL = os.environ.get("ORDER_EVENTS_REDIS_URL")
+SSE_MAX_CONNECTIONS = int(os.environ.get("SSE_MAX_CONNECTIONS", "500"))
+SSE_HEARTBEAT_SECONDS = 15
+SSE_MAX_IDLE_SECONDS = 10 * 60
+SSE_EVICT_IDLE_SECONDS = 60
+SSE_IDLE_POLL_SECONDS = 60
+SSE_IDLE_RETRY_MS = 60 * 60 * 1000
+
+# Public tracking
+TRACKING_PROVIDERS_FILE = Path(
+    os.environ.get("TRACKING_PROVIDERS_FILE", ROOT_DIR / "config" / "tracking_providers.json")
+)
+TRACKING_CACHE_TTL_SECONDS = float(os.environ.get("TRACKING_CACHE_TTL_SECONDS", "30"))
+TRACKING_BATCH_LIMIT = 100
+
+# Wishlist membership
+# Cached per worker; writes invalidate it on every worker over the order
+# events pub/sub (Redis when ORDER_EVENTS_REDIS_URL is set)
+WISHLIST_CACHE_TTL_SECONDS = 5 * 60
+CACHE_INVALIDATION_CHANNEL_PREFIX = "cache-invalidation:"
+WISHLIST_CHECK_LIMIT = 200
+
+# user_id -> carts.id / wishlists.id never changes once created
+CONTAINER_ID_CACHE_TTL_SECONDS = 24 * 60 * 60
+CONTAINER_ID_CACHE_SIZE = 100000
+
+# Header badge counts served by /api/session/summary, invalidated on every
+# worker like the wishlist membership cache
+SESSION_SUMMARY_TTL_SECONDS = 60
+
+# Product rows used to price guest carts
+PRODUCT_CACHE_TTL_SECONDS = 60
+
+# Anonymous cart kept in a signed cookie
+GUEST_CART_COOKIE = "guest_cart"
+GUEST_CART_SECRET = os.environ.get("GUEST_CART_SECRET", SUPABASE_SERVICE_ROLE_KEY)
+GUEST_CART_MAX_AGE = 30 * 24 * 60 * 60
+
+# GET multiplexing via /api/batch
+BATCH_MAX_REQUESTS = 10
+BATCH_ITEM_TIMEOUT_SECONDS = 5.0
+
+# Home page reads (featured products, categories) are fresh for
+# HOME_CACHE_TTL_SECONDS, then served stale while one background refresh
+# runs, and never served once older than HOME_CACHE_MAX_AGE_SECONDS
+HOME_CACHE_TTL_SECONDS = float(os.environ.get("HOME_CACHE_TTL_SECONDS", "30"))
+HOME_CACHE_MAX_AGE_SECONDS = float(os.environ.get("HOME_CACHE_MAX_AGE_SECONDS", "300"))
+
+# Home page featured strip (HomePage.jsx), warmed from the catalog snapshot
+HOME_FEATURED_LIMIT = 6
+
+# On-disk snapshot of every product and category, rewritten every
+# CATALOG_SNAPSHOT_INTERVAL_SECONDS. Loaded at startup to warm the home page
+# caches, and served (marked stale) when a browse read fails; after a failure
+# browse reads skip the database for CATALOG_DEGRADED_SECONDS
+CATALOG_SNAPSHOT_ENABLED = os.environ.get("CATALOG_SNAPSHOT_ENABLED", "true").lower() == "true"
+CATALOG_SNAPSHOT_PATH = os.environ.get("CATALOG_SNAPSHOT_PATH", str(ROOT_DIR / "catalog.snapshot"))
+CATALOG_SNAPSHOT_INTERVAL_SECONDS = float(os.environ.get("CATALOG_SNAPSHOT_INTERVAL_SECONDS", "300"))
+CATALOG_DEGRADED_SECONDS = float(os.environ.get("CATALOG_DEGRADED_SECONDS", "10"))
+CATALOG_SNAPSHOT_PAGE_SIZE = 1000
+
+# Identical concurrent catalog reads share one query
+READ_COALESCING_ENABLED = os.environ.get("READ_COALESCING_ENABLED", "true").lower() == "true"
+
+# Background refresh of the analytics rollups for days changed since
+# (every worker runs one; concurrent refreshes serialize in the database)
+ANALYTICS_REFRESH_INTERVAL_SECONDS = float(os.environ.get("ANALYTICS_REFRESH_INTERVAL_SECONDS", "60"))
+
+# Request / Supabase metrics exposed at /metrics. Scrapers send
+# "Authorization: Bearer $METRICS_TOKEN"; without a token set, only admins can read it
+METRICS_ENABLED = os.environ.get("METRICS_ENABLED", "true").lower() == "true"
+METRICS_TOKEN = os.environ.get("METRICS_TOKEN")
+
+# Per-shape Supabase query profile and slow-query log (off by default)
+QUERY_PROFILING_ENABLED = os.environ.get("QUERY_PROFILING_ENABLED", "false").lower() == "true"
+SLOW_QUERY_THRESHOLD_MS = float(os.environ.get("SLOW_QUERY_THRESHOLD_MS", "200"))
+QUERY_PROFILE_WINDOW_SECONDS = 15 * 60
+
 # ======================================================
 # SUPABASE CLIENT
 # ======================================================
 
+metrics = Metrics()
+
+query_profiler = QueryProfiler(
+    slow_threshold_ms=SLOW_QUERY_THRESHOLD_MS,
+    window_seconds=QUERY_PROFILE_WINDOW_SECONDS
+) if QUERY_PROFILING_ENABLED else None
+
 supabase = create_client(
     SUPABASE_URL,
     SUPABASE_SERVICE_ROLE_KEY
 )
 
+query_listeners = []
+if METRICS_ENABLED:
+    query_listeners.append(metrics.observe_query)
+if query_profiler:
+    query_listeners.append(query_profiler.observe)
+
+replica_set = None
+if SUPABASE_REPLICA_URLS:
+    replicas = [create_client(url, SUPABASE_SERVICE_ROLE_KEY) for url in SUPABASE_REPLICA_URLS]
+    if query_listeners:
+        replicas = [
+            InstrumentedClient(replica, query_listeners, record_shapes=query_profiler is not None)
+            for replica in replicas
+        ]
+    replica_set = ReplicaSet(replicas, pin_seconds=READ_YOUR_WRITES_SECONDS)
+
+# Metrics are on by default, so the client is normally wrapped; with every
+# listener disabled the raw client is used and nothing is wrapped
+primary_listeners = query_listeners + ([replica_set.observe_query] if replica_set else [])
+if primary_listeners:
+    supabase = InstrumentedClient(supabase, primary_listeners, record_shapes=query_profiler is not None)
+
+# Rollups are built by Postgres triggers and functions (migrations 001, 011)
+analytics = AnalyticsService(supabase) if STORAGE_BACKEND == "supabase" else None
+
+tracking_providers = TrackingProviderRegistry.load(TRACKING_PROVIDERS_FILE)
+tracking_cache = TTLCache(ttl=TRACKING_CACHE_TTL_SECONDS)
+wishlist_products_cache = TTLCache(ttl=WISHLIST_CACHE_TTL_SECONDS)
+container_id_cache = TTLCache(ttl=CONTAINER_ID_CACHE_TTL_SECONDS, max_size=CONTAINER_ID_CACHE_SIZE)
+product_cache = TTLCache(ttl=PRODUCT_CACHE_TTL_SECONDS)
+session_summary_cache = TTLCache(ttl=SESSION_SUMMARY_TTL_SECONDS)
+
+if STORAGE_BACKEND == "sqlite":
+    storage = SQLiteRepository(SQLITE_PATH)
+elif STORAGE_BACKEND == "supabase":
+    storage = SupabaseRepository(supabase, container_id_cache, replica_set)
+else:
+    raise RuntimeError(f"Unknown STORAGE_BACKEND: {STORAGE_BACKEND}")
+
+guest_cart_codec = GuestCartCodec(GUEST_CART_SECRET)
+
+read_coalescer = SingleFlight(metrics.observe_coalesced if METRICS_ENABLED else None)
+
+featured_products_cache = StaleWhileRevalidateCache(
+    ttl=HOME_CACHE_TTL_SECONDS,
+    max_age=HOME_CACHE_MAX_AGE_SECONDS,
+    name="featured_products",
+    listener=metrics.observe_cache if METRICS_ENABLED else None
+)
+categories_cache = StaleWhileRevalidateCache(
+    ttl=HOME_CACHE_TTL_SECONDS,
+    max_age=HOME_CACHE_MAX_AGE_SECONDS,
+    name="categories",
+    listener=metrics.observe_cache if METRICS_ENABLED else None
+)
+
+catalog_snapshots = CatalogSnapshotStore(
+    CATALOG_SNAPSHOT_PATH,
+    interval=CATALOG_SNAPSHOT_INTERVAL_SECONDS,
+    degraded_seconds=CATALOG_DEGRADED_SECONDS
+) if CATALOG_SNAPSHOT_ENABLED else None
+
+order_events = OrderEventBroker(
+    RedisBackend(ORDER_EVENTS_REDIS_URL) if ORDER_EVENTS_REDIS_URL else InProcessBackend(),
+    max_connections=SSE_MAX_CONNECTIONS,
+    evict_idle_after=SSE_EVICT_IDLE_SECONDS
+)
+
+cache_invalidation = CacheInvalidator(
+    RedisBackend(ORDER_EVENTS_REDIS_URL, channel_prefix=CACHE_INVALIDATION_CHANNEL_PREFIX)
+    if ORDER_EVENTS_REDIS_URL else InProcessBackend(),
+    {"wishlist_products": wishlist_products_cache, "session_summary": session_summary_cache}
+)
+
 # ======================================================
 # FASTAPI APP
 # ======================================================
@@ -89,7 +304,7 @@ async def add_security_headers(request: Request, call_next):
 # CORS CONFIGURATION
 # ======================================================
 
-logger.info(f"CORS allowed origins: {os.environ.get("CORS_ORIGINS","http://localhost:3000").split(",")}")
+logger.info(f"CORS allowed origins: {os.environ.get('CORS_ORIGINS','http://localhost:3000').split(',')}")
 
 app.add_middleware(
     CORSMiddleware,
@@ -97,8 +312,21 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],
 )
 
+if replica_set and STORAGE_BACKEND == "supabase":
+    app.add_middleware(
+        ReadYourWritesMiddleware,
+        replica_set=replica_set,
+        secure=IS_PRODUCTION,
+        samesite="none" if IS_PRODUCTION else "lax"
+    )
+
+# Outermost, so timings cover the other middleware too
+if METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware, metrics=metrics)
+
 # ======================================================
 # EXCEPTION HANDLERS
 # ======================================================
@@ -171,6 +399,14 @@ class CartItemAdd(BaseModel):
     product_id: str
     quantity: int = 1
 
+class CartOperation(BaseModel):
+    op: Literal["set", "add", "remove"]
+    product_id: str
+    quantity: int = 1
+
+class CartPatchRequest(BaseModel):
+    operations: List[CartOperation]
+
 class CartItemResponse(BaseModel):
     product_id: str
     name: str
@@ -220,9 +456,25 @@ class CategoryResponse(BaseModel):
     slug: str
     image: Optional[str] = None
 
+class TrackingBatchRequest(BaseModel):
+    order_ids: List[str]
+
 class WishlistItemAdd(BaseModel):
     product_id: str
 
+class WishlistCheckRequest(BaseModel):
+    product_ids: List[str]
+
+class BulkMoveRequest(BaseModel):
+    product_ids: Optional[List[str]] = None
+
+class BatchRequestItem(BaseModel):
+    id: Optional[str] = None
+    path: str
+
+class BatchRequest(BaseModel):
+    requests: List[BatchRequestItem]
+
 class WishlistItemResponse(BaseModel):
     product_id: str
     name: str
@@ -238,6 +490,10 @@ async def get_current_user(request: Request) -> Optional[dict]:
     Extract and validate Supabase JWT token from Authorization header.
     Returns user dict from database or None if invalid.
     """
+    # Sub-requests of /api/batch reuse the user resolved for the batch
+    if "batch_user" in request.scope:
+        return request.scope["batch_user"]
+
     auth_header = request.headers.get("Authorization")
     
     if not auth_header or not auth_header.startswith("Bearer "):
@@ -279,12 +535,7 @@ async def get_current_user(request: Request) -> Optional[dict]:
             return None
         
         # Get or create user in our database
-        user_resp = supabase.table("users") \
-            .select("*") \
-            .eq("email", email) \
-            .execute()
-        
-        user = user_resp.data[0] if user_resp.data else None
+        user = storage.get_user_by_email(email)
         
         # Create user if doesn't exist
         if not user:
@@ -304,17 +555,9 @@ async def get_current_user(request: Request) -> Optional[dict]:
             }
             
             try:
-                insert_resp = supabase.table("users").insert(user_data).execute()
+                user = storage.create_user(user_data)
                 logger.info(f"User created: {user_id}")
                 
-                # Fetch newly created user
-                user_resp = supabase.table("users") \
-                    .select("*") \
-                    .eq("user_id", user_id) \
-                    .execute()
-                
-                user = user_resp.data[0] if user_resp.data else None
-                
             except Exception as e:
                 logger.error(f"Failed to create user: {e}")
                 return None
@@ -331,11 +574,15 @@ async def get_current_user(request: Request) -> Optional[dict]:
             logger.error(traceback.format_exc())
         return None
 
-async def require_auth(request: Request) -> dict:
+async def require_auth(request: Request, response: Response = None) -> dict:
     """Require authentication, raise 401 if not authenticated"""
     user = await get_current_user(request)
     if not user:
         raise HTTPException(status_code=401, detail="Authentication required")
+
+    if response is not None and request.cookies.get(GUEST_CART_COOKIE):
+        merge_guest_cart(request, response, user)
+
     return user
 
 async def require_admin(request: Request) -> dict:
@@ -367,15 +614,86 @@ async def logout(request: Request, response: Response):
     """Logout (handled by frontend)"""
     return {"message": "Logged out successfully"}
 
+# ============== CATALOG READS ==============
+
+async def coalesced_read(label: str, params: tuple, fetch, *args):
+    """
+    Run a blocking catalog read in a worker thread, sharing one call among
+    identical concurrent requests (same label and normalized params)
+    """
+    if not READ_COALESCING_ENABLED:
+        return await asyncio.to_thread(fetch, *args)
+
+    # Pinned readers must see the primary, so they never join a replica read
+    key = (label, params, primary_pinned())
+    return await read_coalescer.do(key, lambda: asyncio.to_thread(fetch, *args), label)
+
+async def home_page_read(cache: StaleWhileRevalidateCache, label: str, params: tuple, fetch, *args):
+    """Stale-while-revalidate read; clients pinned after a write skip the cache"""
+    if primary_pinned():
+        return await coalesced_read(label, params, fetch, *args)
+
+    return await cache.get(params, lambda: coalesced_read(label, params, fetch, *args))
+
+async def browse_read(response: Response, label: str, read, fallback):
+    """
+    Run a browse read; if the database fails, answer from the catalog
+    snapshot instead and mark the response stale
+    """
+    snapshot = catalog_snapshots.snapshot if catalog_snapshots else None
+    if snapshot is None:
+        return await read()
+
+    if not catalog_snapshots.degraded:
+        try:
+            return await read()
+        except Exception as e:
+            logger.error(f"Browse read {label} failed, serving catalog snapshot: {e}")
+            catalog_snapshots.trip()
+
+    response.headers["X-Catalog-Stale"] = snapshot.created_at_iso
+    response.headers["Cache-Control"] = "no-store"
+    if METRICS_ENABLED:
+        metrics.observe_snapshot_read(label)
+
+    return fallback(snapshot)
+
+def export_catalog():
+    """Every category and product, read page by page for the snapshot"""
+    products, seen, skip = [], set(), 0
+
+    while True:
+        page, total = storage.list_products(None, None, None, CATALOG_SNAPSHOT_PAGE_SIZE, skip)
+        for product in page:
+            if product["product_id"] not in seen:
+                seen.add(product["product_id"])
+                products.append(product)
+
+        skip += len(page)
+        if not page or skip >= total:
+            break
+
+    return storage.list_categories(), products
+
+def warm_catalog_caches(snapshot: CatalogSnapshot):
+    """Seed the home page caches so the first requests after a restart skip the database"""
+    age = snapshot.age()
+    featured_params = (None, True, None, HOME_FEATURED_LIMIT, 0)
+
+    categories_cache.prime((), snapshot.categories(), age)
+    featured_products_cache.prime(featured_params, snapshot.list_products(*featured_params), age)
+
 # ============== CATEGORIES ROUTES ==============
 
 @api_router.get("/categories", response_model=List[CategoryResponse])
-async def get_categories():
+async def get_categories(response: Response):
     """Get all categories"""
-    resp = supabase.table("categories") \
-        .select("*") \
-        .execute()
-    return resp.data or []
+    return await browse_read(
+        response,
+        "categories.list",
+        lambda: home_page_read(categories_cache, "categories.list", (), storage.list_categories),
+        lambda snapshot: snapshot.categories()
+    )
 
 @api_router.post("/categories")
 async def create_category(
@@ -387,25 +705,21 @@ async def create_category(
     """Create a new category (admin only)"""
     category_id = f"cat_{uuid.uuid4().hex[:8]}"
 
-    supabase.table("categories").insert({
+    category = storage.create_category({
         "category_id": category_id,
         "name": name,
         "slug": slug,
         "image": image
-    }).execute()
-
-    created = supabase.table("categories") \
-        .select("*") \
-        .eq("category_id", category_id) \
-        .single() \
-        .execute()
+    })
 
-    return created.data
+    categories_cache.clear()
+    return category
 
 # ============== PRODUCTS ROUTES ==============
 
 @api_router.get("/products")
 async def get_products(
+    response: Response,
     category: Optional[str] = None,
     featured: Optional[bool] = None,
     search: Optional[str] = None,
@@ -413,46 +727,45 @@ async def get_products(
     skip: int = 0
 ):
     """Get products with filters"""
-    query = supabase.table("products").select("*", count="exact")
-
-    if category:
-        query = query.eq("category", category)
+    # Empty filters are no filters and search is case-insensitive
+    params = (category or None, featured, search.lower() if search else None, limit, skip)
 
-    if featured is not None:
-        query = query.eq("featured", featured)
-
-    if search:
-        query = query.or_(
-            f"name.ilike.%{search}%,description.ilike.%{search}%"
-        )
+    # The home page featured strip
+    if featured and not category and not search:
+        read = lambda: home_page_read(featured_products_cache, "products.list", params, storage.list_products, *params)
+    else:
+        read = lambda: coalesced_read("products.list", params, storage.list_products, *params)
 
-    resp = query.range(skip, skip + limit - 1).execute()
+    products, total = await browse_read(
+        response, "products.list", read, lambda snapshot: snapshot.list_products(*params)
+    )
 
     return {
-        "products": resp.data or [],
-        "total": resp.count or 0
+        "products": products,
+        "total": total
     }
 
 @api_router.get("/products/{product_id}")
-async def get_product(product_id: str):
+async def get_product(product_id: str, response: Response):
     """Get single product by ID"""
-    resp = supabase.table("products") \
-        .select("*") \
-        .eq("product_id", product_id) \
-        .single() \
-        .execute()
+    product = await browse_read(
+        response,
+        "products.get",
+        lambda: coalesced_read("products.get", (product_id,), storage.get_product, product_id),
+        lambda snapshot: snapshot.get_product(product_id)
+    )
 
-    if not resp.data:
+    if not product:
         raise HTTPException(status_code=404, detail="Product not found")
 
-    return resp.data
+    return product
 
 @api_router.post("/products")
 async def create_product(data: ProductCreate, user: dict = Depends(require_admin)):
     """Create new product (admin only)"""
     product_id = f"prod_{uuid.uuid4().hex[:8]}"
 
-    supabase.table("products").insert({
+    product = storage.create_product({
         "product_id": product_id,
         "name": data.name,
         "description": data.description,
@@ -462,20 +775,16 @@ async def create_product(data: ProductCreate, user: dict = Depends(require_admin
         "stock": data.stock,
         "featured": data.featured,
         "created_at": datetime.now(timezone.utc).isoformat()
-    }).execute()
-
-    created = supabase.table("products") \
-        .select("*") \
-        .eq("product_id", product_id) \
-        .single() \
-        .execute()
+    })
 
-    return created.data
+    featured_products_cache.clear()
+    return product
 
 @api_router.put("/products/{product_id}")
 async def update_product(
     product_id: str,
     data: ProductUpdate,
+    background_tasks: BackgroundTasks,
     user: dict = Depends(require_admin)
 ):
     """Update product (admin only)"""
@@ -484,95 +793,218 @@ async def update_product(
     if not update_data:
         raise HTTPException(status_code=400, detail="No update data provided")
 
-    resp = supabase.table("products") \
-        .update(update_data) \
-        .eq("product_id", product_id) \
-        .execute()
+    product = storage.update_product(product_id, update_data)
 
-    if not resp.data:
+    if not product:
         raise HTTPException(status_code=404, detail="Product not found")
 
-    return resp.data[0]
+    invalidate_product(product_id)
+
+    if update_data.keys() & SNAPSHOT_SOURCE_FIELDS:
+        background_tasks.add_task(propagate_product_snapshot, product)
+
+    return product
 
 @api_router.delete("/products/{product_id}")
-async def delete_product(product_id: str, user: dict = Depends(require_admin)):
+async def delete_product(
+    product_id: str,
+    background_tasks: BackgroundTasks,
+    user: dict = Depends(require_admin)
+):
     """Delete product (admin only)"""
-    resp = supabase.table("products") \
-        .delete() \
-        .eq("product_id", product_id) \
-        .execute()
-
-    if not resp.data:
+    if not storage.delete_product(product_id):
         raise HTTPException(status_code=404, detail="Product not found")
 
+    invalidate_product(product_id)
+    background_tasks.add_task(remove_product_lines, product_id)
+
     return {"message": "Product deleted"}
 
+# Product fields copied onto cart_items / wishlist_items
+SNAPSHOT_SOURCE_FIELDS = {"name", "price", "images", "stock"}
+
+def propagate_product_snapshot(product: dict):
+    """Refresh the display snapshot on every cart and wishlist line of a product"""
+    try:
+        storage.propagate_product_snapshot(product)
+    except Exception as e:
+        logger.error(f"Snapshot propagation failed for {product['product_id']}: {e}")
+
+def remove_product_lines(product_id: str):
+    """Drop cart and wishlist lines pointing at a deleted product"""
+    try:
+        storage.remove_product_lines(product_id)
+        cache_invalidation.invalidate("wishlist_products")
+        cache_invalidation.invalidate("session_summary")
+    except Exception as e:
+        logger.error(f"Removing lines for deleted product {product_id} failed: {e}")
+
 # ============== CART ROUTES ==============
 
-@api_router.get("/cart")
-async def get_cart(user: dict = Depends(require_auth)):
-    """Get user's cart"""
+def get_products_by_ids(product_ids: List[str]) -> Dict[str, dict]:
+    """Product rows by id, served from the product cache with one query for misses"""
+    found = product_cache.get_many(product_ids)
+    misses = [product_id for product_id in product_ids if product_id not in found]
+
+    if misses:
+        for product in storage.get_products(misses):
+            product_cache.set(product["product_id"], product)
+            found[product["product_id"]] = product
+
+    return found
+
+def invalidate_product(product_id: str):
+    product_cache.delete(product_id)
+    featured_products_cache.clear()
+
+def merge_guest_cart(request: Request, response: Response, user: dict):
+    """
+    Fold a guest cookie cart into the user's cart with one batched upsert,
+    then clear the cookie. The merge is idempotent, so a cookie that
+    survives (e.g. on a streaming response) is safe to merge again.
+    """
+    items = guest_cart_codec.decode(request.cookies.get(GUEST_CART_COOKIE, ""))
+
     try:
-        # Get or create cart
-        cart_resp = supabase.table("carts") \
-            .select("id") \
-            .eq("user_id", user["user_id"]) \
-            .execute()
-
-        if not cart_resp.data:
-            # Create cart if doesn't exist
-            cart_create = supabase.table("carts") \
-                .insert({"user_id": user["user_id"]}) \
-                .execute()
-            
-            if not cart_create.data:
-                return {"items": [], "subtotal": 0, "shipping": 0, "total": 0}
-            
-            cart_id = cart_create.data[0]["id"]
-        else:
-            cart_id = cart_resp.data[0]["id"]
+        if items:
+            merged = storage.merge_guest_cart(user["user_id"], items)
+            invalidate_session_summary(user["user_id"])
+            logger.info(f"Merged {merged} guest cart lines for {user['user_id']}")
+    except Exception as e:
+        # Keep the cookie so the merge is retried on the next request
+        logger.error(f"Guest cart merge failed: {e}")
+        return
+
+    clear_guest_cart_cookie(response)
+
+def set_guest_cart_cookie(response: Response, items: Dict[str, int]):
+    response.set_cookie(
+        GUEST_CART_COOKIE,
+        guest_cart_codec.encode(items),
+        max_age=GUEST_CART_MAX_AGE,
+        httponly=True,
+        secure=IS_PRODUCTION,
+        samesite="none" if IS_PRODUCTION else "lax",
+        path="/api"
+    )
 
-        # Get cart items
-        items_resp = supabase.table("cart_items") \
-            .select("product_id, quantity") \
-            .eq("cart_id", cart_id) \
-            .execute()
+def clear_guest_cart_cookie(response: Response):
+    response.delete_cookie(
+        GUEST_CART_COOKIE,
+        httponly=True,
+        secure=IS_PRODUCTION,
+        samesite="none" if IS_PRODUCTION else "lax",
+        path="/api"
+    )
 
-        items = []
-        subtotal = 0
+def price_guest_cart(items: Dict[str, int]) -> dict:
+    products = get_products_by_ids(list(items))
 
-        for row in items_resp.data:
-            product_resp = supabase.table("products") \
-                .select("name, price, images") \
-                .eq("product_id", row["product_id"]) \
-                .execute()
+    return build_cart_response([
+        {**products[product_id], "quantity": quantity}
+        for product_id, quantity in items.items()
+        if product_id in products
+    ])
 
-            if not product_resp.data:
-                continue
+def check_guest_cart_stock(product_id: str, quantity: int) -> dict:
+    product = get_products_by_ids([product_id]).get(product_id)
 
-            product = product_resp.data[0]
-            price = float(product["price"])
-            quantity = row["quantity"]
+    if not product:
+        raise HTTPException(status_code=404, detail="Product not found")
 
-            items.append({
-                "product_id": row["product_id"],
-                "name": product["name"],
-                "price": price,
-                "image": product["images"][0] if product["images"] else "",
-                "quantity": quantity
-            })
+    if product["stock"] < quantity:
+        raise HTTPException(status_code=400, detail="Insufficient stock")
 
-            subtotal += price * quantity
+    return product
 
-        shipping = SHIPPING_RATE if items else 0
-        total = subtotal + shipping
+@api_router.get("/guest-cart")
+async def get_guest_cart(request: Request):
+    """Get the anonymous cart stored in the guest cart cookie"""
+    items = guest_cart_codec.decode(request.cookies.get(GUEST_CART_COOKIE, ""))
+    return await asyncio.to_thread(price_guest_cart, items)
 
-        return {
-            "items": items,
-            "subtotal": subtotal,
-            "shipping": shipping,
-            "total": total
-        }
+@api_router.post("/guest-cart/add")
+async def add_to_guest_cart(data: CartItemAdd, request: Request, response: Response):
+    """Add item to the guest cart cookie"""
+    if data.quantity < 1:
+        raise HTTPException(status_code=400, detail="Quantity must be at least 1")
+
+    items = guest_cart_codec.decode(request.cookies.get(GUEST_CART_COOKIE, ""))
+    quantity = min(items.get(data.product_id, 0) + data.quantity, GUEST_CART_MAX_QUANTITY)
+
+    if data.product_id not in items and len(items) >= GUEST_CART_MAX_LINES:
+        raise HTTPException(status_code=400, detail="Guest cart is full, please log in")
+
+    check_guest_cart_stock(data.product_id, quantity)
+
+    items[data.product_id] = quantity
+    set_guest_cart_cookie(response, items)
+    return price_guest_cart(items)
+
+@api_router.put("/guest-cart/update")
+async def update_guest_cart(data: CartItemAdd, request: Request, response: Response):
+    """Set or remove a guest cart line"""
+    items = guest_cart_codec.decode(request.cookies.get(GUEST_CART_COOKIE, ""))
+
+    if data.quantity <= 0:
+        items.pop(data.product_id, None)
+    else:
+        quantity = min(data.quantity, GUEST_CART_MAX_QUANTITY)
+        check_guest_cart_stock(data.product_id, quantity)
+        items[data.product_id] = quantity
+
+    set_guest_cart_cookie(response, items)
+    return price_guest_cart(items)
+
+@api_router.delete("/guest-cart/clear")
+async def clear_guest_cart(response: Response):
+    """Clear the guest cart cookie"""
+    clear_guest_cart_cookie(response)
+    return {"message": "Cart cleared"}
+
+def build_cart_response(lines: List[dict]) -> dict:
+    """
+    Cart payload from lines carrying product_id, quantity, name, price and
+    either a snapshot image or the product's images list
+    """
+    items = []
+    subtotal = 0
+
+    for line in lines:
+        price = float(line["price"])
+        quantity = line["quantity"]
+
+        if "image" in line:
+            image = line["image"] or ""
+        else:
+            image = line["images"][0] if line["images"] else ""
+
+        items.append({
+            "product_id": line["product_id"],
+            "name": line["name"],
+            "price": price,
+            "image": image,
+            "quantity": quantity
+        })
+
+        subtotal += price * quantity
+
+    shipping = SHIPPING_RATE if items else 0
+    total = subtotal + shipping
+
+    return {
+        "items": items,
+        "subtotal": subtotal,
+        "shipping": shipping,
+        "total": total
+    }
+
+@api_router.get("/cart")
+async def get_cart(user: dict = Depends(require_auth)):
+    """Get user's cart"""
+    try:
+        lines = await asyncio.to_thread(storage.cart_lines, user["user_id"])
+        return build_cart_response(lines)
     
     except Exception as e:
         logger.error(f"Get cart error: {e}")
@@ -581,63 +1013,27 @@ async def get_cart(user: dict = Depends(require_auth)):
 @api_router.post("/cart/add")
 async def add_to_cart(data: CartItemAdd, user: dict = Depends(require_auth)):
     """Add item to cart"""
+    if data.quantity < 1:
+        raise HTTPException(status_code=400, detail="Quantity must be at least 1")
+
     try:
-        # Validate product exists and has stock
-        product_resp = supabase.table("products") \
-            .select("stock, name") \
-            .eq("product_id", data.product_id) \
-            .execute()
+        # Stock check, cart get-or-create and line upsert in one atomic call
+        result = storage.add_cart_item(user["user_id"], data.product_id, data.quantity)
+        invalidate_session_summary(user["user_id"])
 
-        if not product_resp.data:
+        if result.get("result") == "not_found":
             raise HTTPException(status_code=404, detail="Product not found")
 
-        product = product_resp.data[0]
-        
-        if product["stock"] < data.quantity:
+        if result.get("result") == "insufficient_stock":
             raise HTTPException(status_code=400, detail="Insufficient stock")
 
-        # Get or create cart
-        cart_resp = supabase.table("carts") \
-            .select("id") \
-            .eq("user_id", user["user_id"]) \
-            .execute()
-
-        if not cart_resp.data:
-            cart_create = supabase.table("carts") \
-                .insert({"user_id": user["user_id"]}) \
-                .execute()
-            cart_id = cart_create.data[0]["id"]
-        else:
-            cart_id = cart_resp.data[0]["id"]
-
-        # Check if item already in cart
-        existing_resp = supabase.table("cart_items") \
-            .select("id, quantity") \
-            .eq("cart_id", cart_id) \
-            .eq("product_id", data.product_id) \
-            .execute()
-
-        if existing_resp.data:
-            # Update quantity
-            existing = existing_resp.data[0]
-            new_qty = existing["quantity"] + data.quantity
-            
-            if new_qty > product["stock"]:
-                raise HTTPException(status_code=400, detail="Stock limit exceeded")
+        if result.get("result") == "stock_limit":
+            raise HTTPException(status_code=400, detail="Stock limit exceeded")
 
-            supabase.table("cart_items") \
-                .update({"quantity": new_qty}) \
-                .eq("id", existing["id"]) \
-                .execute()
-        else:
-            # Insert new item
-            supabase.table("cart_items").insert({
-                "cart_id": cart_id,
-                "product_id": data.product_id,
-                "quantity": data.quantity
-            }).execute()
-
-        logger.info(f"Added to cart: {product['name']} x {data.quantity}")
+        if result.get("result") != "added":
+            raise RuntimeError(f"Unexpected add_cart_item result: {result}")
+
+        logger.info(f"Added to cart: {result['name']} x {data.quantity}")
         return {"message": "Added to cart successfully"}
     
     except HTTPException:
@@ -648,112 +1044,97 @@ async def add_to_cart(data: CartItemAdd, user: dict = Depends(require_auth)):
         logger.error(traceback.format_exc())
         raise HTTPException(status_code=500, detail="Failed to add to cart")
 
-@api_router.put("/cart/update")
-async def update_cart_item(data: CartItemAdd, user: dict = Depends(require_auth)):
-    """Update cart item quantity"""
-    cart_resp = supabase.table("carts") \
-        .select("id") \
-        .eq("user_id", user["user_id"]) \
-        .execute()
+CART_PATCH_MAX_OPERATIONS = 100
 
-    if not cart_resp.data:
-        raise HTTPException(status_code=404, detail="Cart not found")
+@api_router.patch("/cart")
+async def patch_cart(data: CartPatchRequest, user: dict = Depends(require_auth)):
+    """
+    Apply several cart edits in one transaction and return the new cart
+    Body: {"operations": [{"op": "set" | "add" | "remove", "product_id": ..., "quantity": ...}]}
+    """
+    if not data.operations:
+        raise HTTPException(status_code=400, detail="No operations provided")
 
-    cart_id = cart_resp.data[0]["id"]
+    if len(data.operations) > CART_PATCH_MAX_OPERATIONS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"At most {CART_PATCH_MAX_OPERATIONS} operations per request"
+        )
 
-    if data.quantity <= 0:
-        # Remove item
-        supabase.table("cart_items") \
-            .delete() \
-            .eq("cart_id", cart_id) \
-            .eq("product_id", data.product_id) \
-            .execute()
-    else:
-        # Update quantity
-        supabase.table("cart_items") \
-            .update({"quantity": data.quantity}) \
-            .eq("cart_id", cart_id) \
-            .eq("product_id", data.product_id) \
-            .execute()
+    for operation in data.operations:
+        if operation.op == "add" and operation.quantity < 1:
+            raise HTTPException(status_code=400, detail="add quantity must be at least 1")
+        if operation.op == "set" and operation.quantity < 0:
+            raise HTTPException(status_code=400, detail="set quantity cannot be negative")
+
+    try:
+        lines = storage.apply_cart_operations(
+            user["user_id"],
+            [operation.model_dump() for operation in data.operations]
+        )
+    except CartOperationError as e:
+        if e.reason == "not_found":
+            raise HTTPException(status_code=404, detail=f"Product not found: {e.product_id}")
+        raise HTTPException(status_code=400, detail=f"Stock limit exceeded for {e.product_id}")
+    except Exception as e:
+        logger.error(f"Patch cart error: {e}")
+        raise HTTPException(status_code=500, detail="Failed to update cart")
+
+    invalidate_session_summary(user["user_id"])
 
+    return build_cart_response(lines)
+
+@api_router.put("/cart/update")
+async def update_cart_item(data: CartItemAdd, user: dict = Depends(require_auth)):
+    """Update cart item quantity (0 or less removes the line)"""
+    if not storage.set_cart_quantity(user["user_id"], data.product_id, data.quantity):
+        raise HTTPException(status_code=404, detail="Cart not found")
+
+    invalidate_session_summary(user["user_id"])
     return {"message": "Cart updated"}
 
 @api_router.delete("/cart/clear")
 async def clear_cart(user: dict = Depends(require_auth)):
     """Clear all items from cart"""
-    cart_resp = supabase.table("carts") \
-        .select("id") \
-        .eq("user_id", user["user_id"]) \
-        .execute()
-
-    if cart_resp.data:
-        supabase.table("cart_items") \
-            .delete() \
-            .eq("cart_id", cart_resp.data[0]["id"]) \
-            .execute()
+    if storage.clear_cart(user["user_id"]):
+        invalidate_session_summary(user["user_id"])
 
     return {"message": "Cart cleared"}
 
 # ============== WISHLIST ROUTES ==============
 
+def get_wishlist_product_ids(user_id: str) -> frozenset:
+    """Product ids in the user's wishlist, cached per user"""
+    cached = wishlist_products_cache.get(user_id)
+    if cached is not None:
+        return cached
+
+    product_ids = storage.wishlist_product_ids(user_id)
+    wishlist_products_cache.set(user_id, product_ids)
+    return product_ids
+
+def invalidate_wishlist_products(user_id: str):
+    cache_invalidation.invalidate("wishlist_products", user_id)
+    invalidate_session_summary(user_id)
+
 @api_router.get("/wishlist")
 async def get_wishlist(user: dict = Depends(require_auth)):
     """Get user's wishlist"""
     try:
         logger.info(f"Fetching wishlist for user: {user['user_id']}")
-        
-        # Get or create wishlist
-        wishlist_resp = supabase.table("wishlists") \
-            .select("id") \
-            .eq("user_id", user["user_id"]) \
-            .execute()
-
-        if not wishlist_resp.data:
-            logger.info("No wishlist found, creating one")
-            # Create wishlist
-            wishlist_create = supabase.table("wishlists") \
-                .insert({"user_id": user["user_id"]}) \
-                .execute()
-            
-            if not wishlist_create.data:
-                logger.error("Failed to create wishlist")
-                return {"items": []}
-            
-            wishlist_id = wishlist_create.data[0]["id"]
-            logger.info(f"Created wishlist with id: {wishlist_id}")
-        else:
-            wishlist_id = wishlist_resp.data[0]["id"]
-            logger.info(f"Found existing wishlist with id: {wishlist_id}")
-
-        # Get wishlist items
-        items_resp = supabase.table("wishlist_items") \
-            .select("product_id, added_at") \
-            .eq("wishlist_id", wishlist_id) \
-            .execute()
-
-        logger.info(f"Found {len(items_resp.data)} wishlist items")
-
-        items = []
-        for row in items_resp.data:
-            # Fetch product details
-            product_resp = supabase.table("products") \
-                .select("product_id, name, price, images, stock") \
-                .eq("product_id", row["product_id"]) \
-                .execute()
-
-            if product_resp.data:
-                product = product_resp.data[0]
-                items.append({
-                    "product_id": row["product_id"],
-                    "name": product["name"],
-                    "price": float(product["price"]),
-                    "image": product["images"][0] if product["images"] else "",
-                    "stock": product["stock"],
-                    "added_at": row["added_at"]
-                })
-                logger.info(f"Added product to wishlist response: {product['name']}")
-            else:
-                logger.warning(f"Product not found: {row['product_id']}")
+
+        # Lines carry their own product snapshot, no join needed
+        items = [
+            {
+                "product_id": row["product_id"],
+                "name": row["name"],
+                "price": float(row["price"]),
+                "image": row["image"] or "",
+                "stock": row["stock"],
+                "added_at": row["added_at"]
+            }
+            for row in await asyncio.to_thread(storage.wishlist_lines, user["user_id"])
+        ]
 
         logger.info(f"Returning {len(items)} items in wishlist")
         return {"items": items}
@@ -770,60 +1151,20 @@ async def add_to_wishlist(data: WishlistItemAdd, user: dict = Depends(require_au
     """Add item to wishlist"""
     try:
         logger.info(f"Adding product {data.product_id} to wishlist for user {user['user_id']}")
-        
-        # Validate product exists
-        product_resp = supabase.table("products") \
-            .select("product_id, name") \
-            .eq("product_id", data.product_id) \
-            .execute()
 
-        if not product_resp.data:
+        result = storage.add_wishlist_item(user["user_id"], data.product_id)
+
+        if result["result"] == "not_found":
             logger.error(f"Product not found: {data.product_id}")
             raise HTTPException(status_code=404, detail="Product not found")
 
-        product_name = product_resp.data[0]["name"]
-        logger.info(f"Found product: {product_name}")
-
-        # Get or create wishlist
-        wishlist_resp = supabase.table("wishlists") \
-            .select("id") \
-            .eq("user_id", user["user_id"]) \
-            .execute()
-
-        if not wishlist_resp.data:
-            logger.info("Creating new wishlist")
-            wishlist_create = supabase.table("wishlists") \
-                .insert({"user_id": user["user_id"]}) \
-                .execute()
-            
-            if not wishlist_create.data:
-                logger.error("Failed to create wishlist")
-                raise HTTPException(status_code=500, detail="Failed to create wishlist")
-            
-            wishlist_id = wishlist_create.data[0]["id"]
-            logger.info(f"Created wishlist: {wishlist_id}")
-        else:
-            wishlist_id = wishlist_resp.data[0]["id"]
-            logger.info(f"Using existing wishlist: {wishlist_id}")
-
-        # Check if already in wishlist
-        exists_resp = supabase.table("wishlist_items") \
-            .select("id") \
-            .eq("wishlist_id", wishlist_id) \
-            .eq("product_id", data.product_id) \
-            .execute()
-
-        if exists_resp.data:
+        if result["result"] == "exists":
             logger.info("Product already in wishlist")
             return {"message": "Already in wishlist"}
 
-        # Add to wishlist
-        insert_resp = supabase.table("wishlist_items").insert({
-            "wishlist_id": wishlist_id,
-            "product_id": data.product_id
-        }).execute()
+        invalidate_wishlist_products(user["user_id"])
 
-        logger.info(f"Successfully added {product_name} to wishlist")
+        logger.info(f"Successfully added {result['name']} to wishlist")
         return {"message": "Added to wishlist successfully"}
     
     except HTTPException:
@@ -841,18 +1182,8 @@ async def remove_from_wishlist(product_id: str, user: dict = Depends(require_aut
     try:
         logger.info(f"Removing {product_id} from wishlist for user {user['user_id']}")
         
-        wishlist_resp = supabase.table("wishlists") \
-            .select("id") \
-            .eq("user_id", user["user_id"]) \
-            .execute()
-
-        if wishlist_resp.data:
-            delete_resp = supabase.table("wishlist_items") \
-                .delete() \
-                .eq("wishlist_id", wishlist_resp.data[0]["id"]) \
-                .eq("product_id", product_id) \
-                .execute()
-            
+        if storage.remove_wishlist_item(user["user_id"], product_id):
+            invalidate_wishlist_products(user["user_id"])
             logger.info(f"Removed {product_id} from wishlist")
         else:
             logger.warning("Wishlist not found")
@@ -864,32 +1195,47 @@ async def remove_from_wishlist(product_id: str, user: dict = Depends(require_aut
         raise HTTPException(status_code=500, detail="Failed to remove from wishlist")
 
 
+def move_between_containers(function: str, user_id: str, product_ids: Optional[List[str]]) -> dict:
+    """Run a bulk move ("move_wishlist_to_cart" / "move_cart_to_wishlist"); returns {"moved": [...], "skipped": [...]}"""
+    result = getattr(storage, function)(user_id, product_ids)
+    invalidate_wishlist_products(user_id)
+    return result
+
+@api_router.post("/wishlist/move-to-cart")
+async def wishlist_to_cart_bulk(data: BulkMoveRequest, user: dict = Depends(require_auth)):
+    """
+    Move several wishlist items (or all, when product_ids is omitted) to the cart.
+    Items without stock for one more unit stay in the wishlist and are reported as skipped.
+    """
+    try:
+        result = move_between_containers("move_wishlist_to_cart", user["user_id"], data.product_ids)
+        logger.info(f"Moved {len(result['moved'])} items to cart, skipped {len(result['skipped'])}")
+        return result
+
+    except Exception as e:
+        logger.error(f"Bulk move to cart error: {e}")
+        raise HTTPException(status_code=500, detail="Failed to move to cart")
+
+
 @api_router.post("/wishlist/{product_id}/move-to-cart")
 async def wishlist_to_cart(product_id: str, user: dict = Depends(require_auth)):
     """Move item from wishlist to cart"""
     try:
         logger.info(f"Moving {product_id} from wishlist to cart")
-        
-        # Add to cart
-        await add_to_cart(CartItemAdd(product_id=product_id, quantity=1), user)
-
-        # Remove from wishlist
-        wishlist_resp = supabase.table("wishlists") \
-            .select("id") \
-            .eq("user_id", user["user_id"]) \
-            .execute()
-
-        if wishlist_resp.data:
-            supabase.table("wishlist_items") \
-                .delete() \
-                .eq("wishlist_id", wishlist_resp.data[0]["id"]) \
-                .eq("product_id", product_id) \
-                .execute()
-            
-            logger.info("Moved to cart successfully")
 
+        result = move_between_containers("move_wishlist_to_cart", user["user_id"], [product_id])
+
+        if product_id in result["skipped"]:
+            raise HTTPException(status_code=400, detail="Insufficient stock")
+
+        if product_id not in result["moved"]:
+            raise HTTPException(status_code=404, detail="Product not in wishlist")
+
+        logger.info("Moved to cart successfully")
         return {"message": "Moved to cart"}
-    
+
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Move to cart error: {e}")
         raise HTTPException(status_code=500, detail="Failed to move to cart")
@@ -899,21 +1245,7 @@ async def wishlist_to_cart(product_id: str, user: dict = Depends(require_auth)):
 async def check_wishlist(product_id: str, user: dict = Depends(require_auth)):
     """Check if product is in wishlist"""
     try:
-        wishlist_resp = supabase.table("wishlists") \
-            .select("id") \
-            .eq("user_id", user["user_id"]) \
-            .execute()
-
-        if not wishlist_resp.data:
-            return {"in_wishlist": False}
-
-        exists_resp = supabase.table("wishlist_items") \
-            .select("id") \
-            .eq("wishlist_id", wishlist_resp.data[0]["id"]) \
-            .eq("product_id", product_id) \
-            .execute()
-
-        result = bool(exists_resp.data)
+        result = product_id in await asyncio.to_thread(get_wishlist_product_ids, user["user_id"])
         logger.info(f"Product {product_id} in wishlist: {result}")
         return {"in_wishlist": result}
     
@@ -922,24 +1254,34 @@ async def check_wishlist(product_id: str, user: dict = Depends(require_auth)):
         return {"in_wishlist": False}
 
 
-@api_router.get("/wishlist/count")
-async def wishlist_count(user: dict = Depends(require_auth)):
-    """Get wishlist item count"""
+@api_router.post("/wishlist/check")
+async def check_wishlist_batch(data: WishlistCheckRequest, user: dict = Depends(require_auth)):
+    """Return which of the given products are in the wishlist"""
+    if len(data.product_ids) > WISHLIST_CHECK_LIMIT:
+        raise HTTPException(
+            status_code=400,
+            detail=f"At most {WISHLIST_CHECK_LIMIT} product ids per request"
+        )
+
     try:
-        wishlist_resp = supabase.table("wishlists") \
-            .select("id") \
-            .eq("user_id", user["user_id"]) \
-            .execute()
+        wishlisted = get_wishlist_product_ids(user["user_id"])
+    except Exception as e:
+        logger.error(f"Check wishlist error: {e}")
+        return {"wishlisted": []}
 
-        if not wishlist_resp.data:
-            return {"count": 0}
+    return {
+        "wishlisted": [
+            product_id for product_id in dict.fromkeys(data.product_ids)
+            if product_id in wishlisted
+        ]
+    }
 
-        count_resp = supabase.table("wishlist_items") \
-            .select("id", count="exact") \
-            .eq("wishlist_id", wishlist_resp.data[0]["id"]) \
-            .execute()
 
-        count = count_resp.count or 0
+@api_router.get("/wishlist/count")
+async def wishlist_count(user: dict = Depends(require_auth)):
+    """Get wishlist item count"""
+    try:
+        count = await asyncio.to_thread(storage.wishlist_count, user["user_id"])
         logger.info(f"Wishlist count for user {user['user_id']}: {count}")
         return {"count": count}
     
@@ -948,172 +1290,117 @@ async def wishlist_count(user: dict = Depends(require_auth)):
         return {"count": 0}
 
 
+@api_router.post("/cart/move-to-wishlist")
+async def cart_to_wishlist_bulk(data: BulkMoveRequest, user: dict = Depends(require_auth)):
+    """Move several cart items (or all, when product_ids is omitted) to the wishlist"""
+    try:
+        result = move_between_containers("move_cart_to_wishlist", user["user_id"], data.product_ids)
+        logger.info(f"Moved {len(result['moved'])} items to wishlist")
+        return result
+
+    except Exception as e:
+        logger.error(f"Bulk move to wishlist error: {e}")
+        raise HTTPException(status_code=500, detail="Failed to move to wishlist")
+
+
 @api_router.post("/cart/{product_id}/move-to-wishlist")
 async def cart_to_wishlist(product_id: str, user: dict = Depends(require_auth)):
     """Move item from cart to wishlist"""
     try:
         logger.info(f"Moving {product_id} from cart to wishlist")
-        
-        # Add to wishlist
-        await add_to_wishlist(WishlistItemAdd(product_id=product_id), user)
-
-        # Remove from cart
-        cart_resp = supabase.table("carts") \
-            .select("id") \
-            .eq("user_id", user["user_id"]) \
-            .execute()
-
-        if cart_resp.data:
-            supabase.table("cart_items") \
-                .delete() \
-                .eq("cart_id", cart_resp.data[0]["id"]) \
-                .eq("product_id", product_id) \
-                .execute()
-            
-            logger.info("Moved to wishlist successfully")
 
+        result = move_between_containers("move_cart_to_wishlist", user["user_id"], [product_id])
+
+        if product_id not in result["moved"]:
+            raise HTTPException(status_code=404, detail="Product not in cart")
+
+        logger.info("Moved to wishlist successfully")
         return {"message": "Moved to wishlist"}
-    
+
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Move to wishlist error: {e}")
         raise HTTPException(status_code=500, detail="Failed to move to wishlist")
     
-# ============== ORDER ROUTES ==============
+# ============== SESSION ROUTES ==============
 
-@api_router.post("/orders")
-async def create_order(data: OrderCreate, user: dict = Depends(require_auth)):
-    """Create order from cart"""
-    # Get cart
-    cart_resp = supabase.table("carts") \
-        .select("id") \
-        .eq("user_id", user["user_id"]) \
-        .execute()
+def invalidate_session_summary(user_id: str):
+    cache_invalidation.invalidate("session_summary", user_id)
 
-    if not cart_resp.data:
-        raise HTTPException(status_code=400, detail="Cart is empty")
-
-    cart_id = cart_resp.data[0]["id"]
-
-    cart_items = supabase.table("cart_items") \
-        .select("product_id, quantity") \
-        .eq("cart_id", cart_id) \
-        .execute()
-
-    if not cart_items.data:
-        raise HTTPException(status_code=400, detail="Cart is empty")
-
-    items = []
-    subtotal = 0
+@api_router.get("/session/summary")
+async def get_session_summary(user: dict = Depends(require_auth)):
+    """User profile plus cart and wishlist badge counts in one request"""
+    counts = session_summary_cache.get(user["user_id"])
 
-    # Validate stock
-    for item in cart_items.data:
-        product_resp = supabase.table("products") \
-            .select("name, price, images, stock") \
-            .eq("product_id", item["product_id"]) \
-            .execute()
-
-        if not product_resp.data:
-            raise HTTPException(status_code=404, detail="Product not found")
-
-        product = product_resp.data[0]
-
-        if product["stock"] < item["quantity"]:
-            raise HTTPException(
-                status_code=400,
-                detail=f"Insufficient stock for {product['name']}"
+    if counts is None:
+        try:
+            cart, wishlisted = await asyncio.gather(
+                asyncio.to_thread(storage.cart_counts, user["user_id"]),
+                asyncio.to_thread(get_wishlist_product_ids, user["user_id"])
             )
+        except Exception as e:
+            logger.error(f"Session summary error: {e}")
+            raise HTTPException(status_code=500, detail="Failed to load session summary")
 
-        subtotal += float(product["price"]) * item["quantity"]
+        counts = {"cart": cart, "wishlist": {"count": len(wishlisted)}}
+        session_summary_cache.set(user["user_id"], counts)
 
-        items.append({
-            "product_id": item["product_id"],
-            "name": product["name"],
-            "price": float(product["price"]),
-            "image": product["images"][0] if product["images"] else "",
-            "quantity": item["quantity"]
-        })
+    return {
+        "user": {
+            "user_id": user["user_id"],
+            "email": user["email"],
+            "name": user["name"],
+            "picture": user.get("picture"),
+            "role": user.get("role", "customer")
+        },
+        **counts
+    }
 
-    shipping = SHIPPING_RATE
-    total = subtotal + shipping
+# ============== ORDER ROUTES ==============
 
+@api_router.post("/orders")
+async def create_order(data: OrderCreate, user: dict = Depends(require_auth)):
+    """Create order from cart"""
     order_id = f"order_{uuid.uuid4().hex[:10]}"
+    now = datetime.now(timezone.utc).isoformat()
 
-    # Create order
-    supabase.table("orders").insert({
-        "order_id": order_id,
-        "user_id": user["user_id"],
-        "subtotal": subtotal,
-        "shipping": shipping,
-        "total": total,
-        "status": "pending",
-        "payment_status": "pending",
-        "shipping_address": data.shipping_address.model_dump()
-    }).execute()
-
-    # Insert order items + reduce stock
-    for item in items:
-        supabase.table("order_items").insert({
-            "order_id": order_id,
-            **item
-        }).execute()
-
-        # Get current stock
-        product_resp = supabase.table("products") \
-            .select("stock") \
-            .eq("product_id", item["product_id"]) \
-            .execute()
-        
-        current_stock = product_resp.data[0]["stock"]
-
-        supabase.table("products") \
-            .update({"stock": current_stock - item["quantity"]}) \
-            .eq("product_id", item["product_id"]) \
-            .execute()
+    try:
+        total = storage.place_order(
+            user["user_id"],
+            order_id,
+            data.shipping_address.model_dump(),
+            SHIPPING_RATE,
+            now
+        )
+    except EmptyCart:
+        raise HTTPException(status_code=400, detail="Cart is empty")
+    except ProductNotFound:
+        raise HTTPException(status_code=404, detail="Product not found")
+    except InsufficientStock as e:
+        raise HTTPException(status_code=400, detail=f"Insufficient stock for {e.name}")
 
-    # Clear cart
-    supabase.table("cart_items") \
-        .delete() \
-        .eq("cart_id", cart_id) \
-        .execute()
+    invalidate_session_summary(user["user_id"])
 
     return {"order_id": order_id, "total": total}
 
 @api_router.get("/orders")
 async def get_user_orders(user: dict = Depends(require_auth)):
     """Get user's orders"""
-    orders = supabase.table("orders") \
-        .select("*") \
-        .eq("user_id", user["user_id"]) \
-        .order("created_at", desc=True) \
-        .execute()
-
-    return orders.data or []
+    return await asyncio.to_thread(storage.list_user_orders, user["user_id"])
 
 @api_router.get("/orders/{order_id}")
 async def get_order(order_id: str, user: dict = Depends(require_auth)):
     """Get order details"""
-    order_resp = supabase.table("orders") \
-        .select("*") \
-        .eq("order_id", order_id) \
-        .execute()
+    order = await asyncio.to_thread(storage.get_order, order_id)
 
-    if not order_resp.data:
+    if not order:
         raise HTTPException(status_code=404, detail="Order not found")
 
-    order = order_resp.data[0]
-
     if order["user_id"] != user["user_id"] and user.get("role") != "admin":
         raise HTTPException(status_code=403, detail="Access denied")
 
-    items = supabase.table("order_items") \
-        .select("product_id, name, price, image, quantity") \
-        .eq("order_id", order_id) \
-        .execute()
-
-    return {
-        **order,
-        "items": items.data or []
-    }
+    return order
 
 # ============== STRIPE CHECKOUT ROUTES ==============
 
@@ -1140,33 +1427,286 @@ async def stripe_webhook():
 
 # ============== ADMIN ROUTES ==============
 
+ADMIN_ORDERS_PAGE_SIZE = 50
+ADMIN_ORDERS_MAX_PAGE_SIZE = 200
+
+def encode_order_cursor(order: dict) -> str:
+    """Opaque keyset cursor pointing just past the given order"""
+    raw = json.dumps([order["created_at"], order["order_id"]]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+def decode_order_cursor(cursor: str):
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, order_id = json.loads(base64.urlsafe_b64decode(padded))
+        return str(created_at), str(order_id)
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+def resolve_customer_id(customer: str) -> Optional[str]:
+    """Accept either a user_id or a customer email"""
+    if "@" not in customer:
+        return customer
+
+    found = storage.get_user_by_email(customer)
+    return found["user_id"] if found else None
+
+def admin_order_filters(
+    status: Optional[str] = None,
+    payment_status: Optional[str] = None,
+    customer: Optional[str] = None,
+    start: Optional[date] = None,
+    end: Optional[date] = None
+) -> Optional[dict]:
+    """
+    storage.page_orders filters for the admin query params.
+    Returns None when the filters cannot match anything.
+    """
+    user_id = None
+    if customer:
+        user_id = resolve_customer_id(customer)
+        if not user_id:
+            return None
+
+    return {
+        "status": status,
+        "payment_status": payment_status,
+        "user_id": user_id,
+        "created_from": start.isoformat() if start else None,
+        "created_before": (end + timedelta(days=1)).isoformat() if end else None
+    }
+
+def page_admin_orders(
+    status: Optional[str],
+    payment_status: Optional[str],
+    customer: Optional[str],
+    start: Optional[date],
+    end: Optional[date],
+    cursor: Optional[str],
+    limit: int
+):
+    """One keyset page of orders and the cursor for the next one (None on the last page)"""
+    limit = max(1, min(limit, ADMIN_ORDERS_MAX_PAGE_SIZE))
+
+    filters = admin_order_filters(status, payment_status, customer, start, end)
+
+    if filters is None:
+        return [], None
+
+    # Fetch one extra row to learn whether another page exists
+    orders = storage.page_orders(
+        **filters,
+        after=decode_order_cursor(cursor) if cursor else None,
+        limit=limit + 1
+    )
+
+    next_cursor = None
+    if len(orders) > limit:
+        orders = orders[:limit]
+        next_cursor = encode_order_cursor(orders[-1])
+
+    return orders, next_cursor
+
 @api_router.get("/admin/orders")
 async def get_all_orders(
+    response: Response,
     status: Optional[str] = None,
+    payment_status: Optional[str] = None,
+    customer: Optional[str] = None,
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    cursor: Optional[str] = None,
+    limit: int = ADMIN_ORDERS_PAGE_SIZE,
     user: dict = Depends(require_admin)
 ):
     """
-    Get all orders (admin only)
-    Supports filtering by status via query param: ?status=pending
+    Get orders, newest first (admin only)
+    Supports filtering via query params: ?status=pending&payment_status=paid&customer=<user_id|email>&start=2024-01-01&end=2024-01-31
+    Returns at most `limit` orders; the next page's cursor is in the
+    X-Next-Cursor header. /admin/orders/search returns it in the body.
     """
-    query = supabase.table("orders").select("*").order("created_at", desc=True)
+    orders, next_cursor = page_admin_orders(status, payment_status, customer, start, end, cursor, limit)
 
-    if status:
-        query = query.eq("status", status)
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
 
-    orders_resp = query.execute()
-    orders = orders_resp.data or []
+    return orders
 
-    # Fetch items for each order
-    for order in orders:
-        items_resp = supabase.table("order_items") \
-            .select("product_id, name, price, image, quantity") \
-            .eq("order_id", order["order_id"]) \
-            .execute()
-        
-        order["items"] = items_resp.data or []
+@api_router.get("/admin/orders/search")
+async def search_orders(
+    status: Optional[str] = None,
+    payment_status: Optional[str] = None,
+    customer: Optional[str] = None,
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    cursor: Optional[str] = None,
+    limit: int = ADMIN_ORDERS_PAGE_SIZE,
+    user: dict = Depends(require_admin)
+):
+    """
+    Cursor-paginated order search (admin only)
+    Pass the returned next_cursor back as ?cursor= to fetch the following page.
+    """
+    orders, next_cursor = page_admin_orders(status, payment_status, customer, start, end, cursor, limit)
 
-    return orders
+    return {
+        "orders": orders,
+        "next_cursor": next_cursor
+    }
+
+EXPORT_PAGE_SIZE = 500
+
+EXPORT_CSV_COLUMNS = [
+    "order_id", "created_at", "user_id", "status", "payment_status",
+    "customer_name", "phone", "city", "state", "pincode",
+    "subtotal", "shipping", "total", "tracking_provider", "tracking_number",
+    "product_id", "item_name", "price", "quantity", "line_total"
+]
+
+def iter_order_pages(filters: dict, page_size: int = EXPORT_PAGE_SIZE):
+    """
+    Walk the matching orders page by page with keyset pagination.
+    Only one page is held in memory at a time.
+    """
+    cursor = None
+
+    while True:
+        page = storage.page_orders(**filters, after=cursor, limit=page_size)
+        if not page:
+            return
+
+        yield page
+
+        if len(page) < page_size:
+            return
+
+        cursor = (page[-1]["created_at"], page[-1]["order_id"])
+
+def order_csv_rows(order: dict):
+    address = order.get("shipping_address") or {}
+    base = [
+        order["order_id"],
+        order.get("created_at"),
+        order.get("user_id"),
+        order.get("status"),
+        order.get("payment_status"),
+        address.get("full_name"),
+        address.get("phone"),
+        address.get("city"),
+        address.get("state"),
+        address.get("pincode"),
+        order.get("subtotal"),
+        order.get("shipping"),
+        order.get("total"),
+        order.get("tracking_provider"),
+        order.get("tracking_number"),
+    ]
+
+    if not order["items"]:
+        yield base + [None] * 5
+        return
+
+    for item in order["items"]:
+        price = float(item["price"])
+        yield base + [
+            item["product_id"],
+            item["name"],
+            price,
+            item["quantity"],
+            round(price * item["quantity"], 2),
+        ]
+
+def stream_orders_csv(pages):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(EXPORT_CSV_COLUMNS)
+
+    for page in pages:
+        for order in page:
+            writer.writerows(order_csv_rows(order))
+
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate(0)
+
+    yield buffer.getvalue()
+
+def stream_orders_ndjson(pages):
+    for page in pages:
+        yield "".join(json.dumps(order, default=str) + "\n" for order in page)
+
+@api_router.get("/admin/orders/export")
+async def export_orders(
+    format: str = "csv",
+    status: Optional[str] = None,
+    payment_status: Optional[str] = None,
+    customer: Optional[str] = None,
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    user: dict = Depends(require_admin)
+):
+    """
+    Stream orders joined with their line items as CSV or NDJSON (admin only)
+    Example: ?format=csv&start=2024-01-01&end=2024-01-31
+    """
+    if format not in ("csv", "ndjson"):
+        raise HTTPException(status_code=400, detail="format must be csv or ndjson")
+
+    # Resolves an email filter once rather than on every page
+    filters = admin_order_filters(status, payment_status, customer, start, end)
+    pages = iter_order_pages(filters) if filters is not None else iter([])
+
+    stamp = datetime.now(timezone.utc).strftime("%Y%m%d")
+
+    if format == "csv":
+        body, media_type = stream_orders_csv(pages), "text/csv"
+    else:
+        body, media_type = stream_orders_ndjson(pages), "application/x-ndjson"
+
+    return StreamingResponse(
+        body,
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="orders-{stamp}.{format}"'}
+    )
+
+CHANGES_PAGE_SIZE = 100
+CHANGES_MAX_PAGE_SIZE = 500
+
+def decode_change_cursor(since: str):
+    """Change cursor "<xid>.<seq>"; "0" (or any pre-xid cursor) restarts the feed"""
+    if "." not in since:
+        return "0", 0
+    try:
+        xid, seq = since.split(".", 1)
+        return str(int(xid)), int(seq)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+@api_router.get("/admin/orders/changes")
+async def get_order_changes(
+    since: str = "0",
+    limit: int = CHANGES_PAGE_SIZE,
+    user: dict = Depends(require_admin)
+):
+    """
+    Orders created or updated after a change cursor (admin only)
+    Start with ?since=0 (or the cursor from a full load), then poll with the
+    returned cursor and merge the orders by order_id. Changes only appear
+    once every transaction that started before them has finished, so the
+    cursor never skips a change that commits late.
+    """
+    limit = max(1, min(limit, CHANGES_MAX_PAGE_SIZE))
+    after_xid, after_seq = decode_change_cursor(since)
+
+    orders = storage.order_changes(after_xid, after_seq, limit + 1)
+    has_more = len(orders) > limit
+    orders = orders[:limit]
+
+    return {
+        "orders": orders,
+        "cursor": f"{orders[-1]['change_xid']}.{orders[-1]['change_seq']}" if orders else since,
+        "has_more": has_more
+    }
 
 @api_router.put("/admin/orders/{order_id}")
 async def update_order_status(
@@ -1192,121 +1732,546 @@ async def update_order_status(
     if not update_data:
         raise HTTPException(status_code=400, detail="No update data provided")
 
-    resp = supabase.table("orders") \
-        .update(update_data) \
-        .eq("order_id", order_id) \
-        .execute()
+    update_data["updated_at"] = datetime.now(timezone.utc).isoformat()
 
-    if not resp.data:
+    order = storage.update_order(order_id, update_data)
+
+    if not order:
         raise HTTPException(status_code=404, detail="Order not found")
 
-    return resp.data[0]
+    await notify_orders_updated([order])
+
+    return order
+
+async def notify_orders_updated(orders: List[dict]):
+    """Refresh caches and push live updates once for a set of changed orders"""
+    events = {}
+
+    for order in orders:
+        tracking_info = build_tracking_info(order)
+        tracking_cache.set(order["order_id"], tracking_info)
+        events[order["order_id"]] = tracking_info
+
+    await order_events.publish_many(events)
+
+BULK_UPDATE_MAX_ROWS = 2000
+BULK_UPDATE_CHUNK_SIZE = 500
+ORDER_STATUSES = {"pending", "confirmed", "shipped", "delivered", "cancelled"}
+BULK_UPDATE_FIELDS = ("status", "tracking_number", "tracking_provider")
+
+async def read_manifest_rows(request: Request) -> List[dict]:
+    """Manifest rows from a JSON body ({"rows": [...]} or a list), a CSV body or a CSV upload"""
+    content_type = request.headers.get("content-type", "")
+
+    if content_type.startswith("multipart/form-data"):
+        form = await request.form()
+        upload = form.get("file")
+        if upload is None or isinstance(upload, str):
+            raise HTTPException(status_code=400, detail="Upload the manifest as 'file'")
+        text = (await upload.read()).decode("utf-8-sig")
+        return list(csv.DictReader(io.StringIO(text)))
+
+    if "csv" in content_type:
+        text = (await request.body()).decode("utf-8-sig")
+        return list(csv.DictReader(io.StringIO(text)))
+
+    try:
+        payload = await request.json()
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Body must be JSON or CSV")
+
+    rows = payload.get("rows") if isinstance(payload, dict) else payload
+    if not isinstance(rows, list):
+        raise HTTPException(status_code=400, detail="Expected a list of rows")
+    return rows
+
+def validate_manifest_row(row) -> Dict[str, Any]:
+    """Normalize one manifest row or raise ValueError"""
+    if not isinstance(row, dict):
+        raise ValueError("Row must be an object")
+
+    order_id = str(row.get("order_id") or "").strip()
+    if not order_id:
+        raise ValueError("order_id is required")
+
+    update = {"order_id": order_id}
+    for field in BULK_UPDATE_FIELDS:
+        value = row.get(field)
+        update[field] = (str(value).strip() or None) if value is not None else None
+
+    if not any(update[field] for field in BULK_UPDATE_FIELDS):
+        raise ValueError("No update data provided")
+
+    if update["status"]:
+        update["status"] = update["status"].lower()
+        if update["status"] not in ORDER_STATUSES:
+            raise ValueError(f"Unknown status '{update['status']}'")
+
+    if update["tracking_provider"]:
+        update["tracking_provider"] = update["tracking_provider"].lower()
+
+    return update
+
+@api_router.post("/admin/orders/bulk-update")
+async def bulk_update_orders(request: Request, user: dict = Depends(require_admin)):
+    """
+    Apply a warehouse manifest of status/tracking updates (admin only)
+    Rows: order_id, status, tracking_number, tracking_provider — as JSON
+    ({"rows": [...]}), a text/csv body or a multipart CSV upload named 'file'.
+    """
+    rows = await read_manifest_rows(request)
+
+    if len(rows) > BULK_UPDATE_MAX_ROWS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"At most {BULK_UPDATE_MAX_ROWS} rows per manifest"
+        )
+
+    results: List[Dict[str, Any]] = []
+    updates: Dict[str, Dict[str, Any]] = {}
+    row_numbers: Dict[str, int] = {}
+
+    for number, row in enumerate(rows, start=1):
+        try:
+            update = validate_manifest_row(row)
+            if update["order_id"] in updates:
+                raise ValueError(f"Duplicate of row {row_numbers[update['order_id']]}")
+        except ValueError as e:
+            results.append({
+                "row": number,
+                "order_id": row.get("order_id") if isinstance(row, dict) else None,
+                "result": "invalid",
+                "error": str(e)
+            })
+            continue
+
+        updates[update["order_id"]] = update
+        row_numbers[update["order_id"]] = number
+
+    updated_orders: Dict[str, dict] = {}
+    pending = list(updates.values())
+
+    for i in range(0, len(pending), BULK_UPDATE_CHUNK_SIZE):
+        for order in storage.bulk_update_order_tracking(pending[i:i + BULK_UPDATE_CHUNK_SIZE]):
+            updated_orders[order["order_id"]] = order
+
+    for order_id, number in row_numbers.items():
+        if order_id in updated_orders:
+            results.append({"row": number, "order_id": order_id, "result": "updated"})
+        else:
+            results.append({
+                "row": number,
+                "order_id": order_id,
+                "result": "not_found",
+                "error": "Order not found"
+            })
+
+    await notify_orders_updated(list(updated_orders.values()))
+
+    results.sort(key=lambda r: r["row"])
+
+    return {
+        "updated": len(updated_orders),
+        "failed": len(results) - len(updated_orders),
+        "results": results
+    }
 
 @api_router.get("/admin/stats")
 async def get_admin_stats(user: dict = Depends(require_admin)):
     """Get admin dashboard stats"""
-    total_orders = supabase.table("orders") \
-        .select("id", count="exact") \
-        .execute().count or 0
-
-    pending_orders = supabase.table("orders") \
-        .select("id", count="exact") \
-        .eq("status", "pending") \
-        .execute().count or 0
+    return storage.order_stats()
 
-    confirmed_orders = supabase.table("orders") \
-        .select("id", count="exact") \
-        .eq("status", "confirmed") \
-        .execute().count or 0
+# ============== ANALYTICS ROUTES ==============
 
-    shipped_orders = supabase.table("orders") \
-        .select("id", count="exact") \
-        .eq("status", "shipped") \
-        .execute().count or 0
+ANALYTICS_DEFAULT_DAYS = 30
+ANALYTICS_MAX_DAYS = 3 * 366
 
-    delivered_orders = supabase.table("orders") \
-        .select("id", count="exact") \
-        .eq("status", "delivered") \
-        .execute().count or 0
+def require_analytics() -> AnalyticsService:
+    if analytics is None:
+        raise HTTPException(status_code=404, detail="Analytics requires STORAGE_BACKEND=supabase")
+    return analytics
 
-    total_products = supabase.table("products") \
-        .select("id", count="exact") \
-        .execute().count or 0
+def resolve_analytics_range(start: Optional[date], end: Optional[date]):
+    """Default to the last 30 days and reject inverted or oversized ranges"""
+    end = end or datetime.now(timezone.utc).date()
+    start = start or end - timedelta(days=ANALYTICS_DEFAULT_DAYS - 1)
 
-    total_users = supabase.table("users") \
-        .select("user_id", count="exact") \
-        .execute().count or 0
+    if start > end:
+        raise HTTPException(status_code=400, detail="start must be on or before end")
 
-    revenue_resp = supabase.table("orders") \
-        .select("total") \
-        .eq("payment_status", "paid") \
-        .execute()
+    if (end - start).days + 1 > ANALYTICS_MAX_DAYS:
+        raise HTTPException(status_code=400, detail=f"Range exceeds {ANALYTICS_MAX_DAYS} days")
 
-    total_revenue = sum(float(o["total"]) for o in revenue_resp.data) if revenue_resp.data else 0
+    return start, end
 
+@api_router.get("/admin/analytics/revenue")
+async def get_revenue_series(
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    user: dict = Depends(require_admin)
+):
+    """Daily revenue, order count and average order value (admin only)"""
+    start, end = resolve_analytics_range(start, end)
     return {
-        "total_orders": total_orders,
-        "pending_orders": pending_orders,
-        "confirmed_orders": confirmed_orders,
-        "shipped_orders": shipped_orders,
-        "delivered_orders": delivered_orders,
-        "total_products": total_products,
-        "total_users": total_users,
-        "total_revenue": total_revenue
+        "start": start.isoformat(),
+        "end": end.isoformat(),
+        "series": require_analytics().revenue_series(start, end)
     }
 
+@api_router.get("/admin/analytics/orders-by-status")
+async def get_status_series(
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    user: dict = Depends(require_admin)
+):
+    """Orders per day split by status (admin only)"""
+    start, end = resolve_analytics_range(start, end)
+    return require_analytics().status_series(start, end)
+
+@api_router.get("/admin/analytics/top-products")
+async def get_top_products(
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    limit: int = 10,
+    user: dict = Depends(require_admin)
+):
+    """Best-selling products over a date range (admin only)"""
+    start, end = resolve_analytics_range(start, end)
+    return require_analytics().top_products(start, end, limit=max(1, min(limit, 100)))
+
+@api_router.get("/admin/analytics/summary")
+async def get_analytics_summary(
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    user: dict = Depends(require_admin)
+):
+    """Order count, revenue and average order value over a date range (admin only)"""
+    start, end = resolve_analytics_range(start, end)
+    return require_analytics().summary(start, end)
+
+@api_router.post("/admin/analytics/refresh")
+async def refresh_analytics(user: dict = Depends(require_admin)):
+    """Rebuild the most recent rollup days (admin only)"""
+    days = await asyncio.to_thread(require_analytics().refresh_recent)
+    return {"message": "Analytics refreshed", "days": days}
+
+async def refresh_analytics_periodically():
+    """Fold days marked dirty by the orders triggers into the rollups"""
+    while True:
+        try:
+            days = await asyncio.to_thread(analytics.refresh_dirty)
+            if days:
+                logger.info(f"Refreshed analytics rollups for {days} day(s)")
+        except Exception as e:
+            logger.warning(f"Analytics refresh failed: {e}")
+
+        await asyncio.sleep(ANALYTICS_REFRESH_INTERVAL_SECONDS)
+
+# ============== QUERY PROFILE ROUTES ==============
+
+def require_query_profiler() -> QueryProfiler:
+    if query_profiler is None:
+        raise HTTPException(status_code=404, detail="Query profiling is disabled")
+    return query_profiler
+
+@api_router.get("/admin/query-profile")
+async def get_query_profile(limit: int = 20, user: dict = Depends(require_admin)):
+    """Slowest and most frequent Supabase query shapes in the current window"""
+    return require_query_profiler().snapshot(limit=max(1, min(limit, 100)))
+
+@api_router.post("/admin/query-profile/reset")
+async def reset_query_profile(user: dict = Depends(require_admin)):
+    """Start a fresh query profile window"""
+    require_query_profiler().reset()
+    return {"message": "Query profile reset"}
+
 # ============== TRACKING ROUTES ==============
 
+TERMINAL_ORDER_STATUSES = {"delivered", "cancelled"}
+
+def build_tracking_info(order: dict) -> dict:
+    """Public tracking view of an order row"""
+    return {
+        "order_id": order["order_id"],
+        "status": order["status"],
+        "tracking_number": order.get("tracking_number"),
+        "tracking_provider": order.get("tracking_provider"),
+        "tracking_url": tracking_providers.tracking_url(
+            order.get("tracking_provider"),
+            order.get("tracking_number")
+        )
+    }
+
+@api_router.get("/tracking/providers")
+async def get_tracking_providers():
+    """List carriers with a known tracking URL"""
+    return tracking_providers.providers()
+
+@api_router.post("/tracking/batch")
+async def get_tracking_batch(data: TrackingBatchRequest):
+    """Get tracking info for several orders in one call"""
+    order_ids = list(dict.fromkeys(data.order_ids))
+
+    if len(order_ids) > TRACKING_BATCH_LIMIT:
+        raise HTTPException(
+            status_code=400,
+            detail=f"At most {TRACKING_BATCH_LIMIT} order ids per request"
+        )
+
+    found = tracking_cache.get_many(order_ids)
+    misses = [order_id for order_id in order_ids if order_id not in found]
+
+    if misses:
+        for row in storage.tracking_orders(misses):
+            info = build_tracking_info(row)
+            tracking_cache.set(row["order_id"], info)
+            found[row["order_id"]] = info
+
+    return {
+        "orders": [found[order_id] for order_id in order_ids if order_id in found],
+        "not_found": [order_id for order_id in order_ids if order_id not in found]
+    }
+
 @api_router.get("/tracking/{order_id}")
 async def get_tracking_info(order_id: str):
     """Get order tracking info"""
-    order = supabase.table("orders") \
-        .select(
-            "order_id, status, tracking_number, tracking_provider"
-        ) \
-        .eq("order_id", order_id) \
-        .execute()
-
-    if not order.data:
+    cached = tracking_cache.get(order_id)
+    if cached:
+        return cached
+
+    orders = await asyncio.to_thread(storage.tracking_orders, [order_id])
+
+    if not orders:
+        raise HTTPException(status_code=404, detail="Order not found")
+
+    tracking_info = build_tracking_info(orders[0])
+    tracking_cache.set(order_id, tracking_info)
+    return tracking_info
+
+def format_sse(event: str, data: dict, retry_ms: Optional[int] = None) -> str:
+    retry = f"retry: {retry_ms}\n" if retry_ms is not None else ""
+    return f"{retry}event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+def idle_sse(order_id: str) -> str:
+    """Terminal event for an idle stream: the client closes it and polls instead"""
+    return format_sse(
+        "idle",
+        {"order_id": order_id, "poll_seconds": SSE_IDLE_POLL_SECONDS},
+        retry_ms=SSE_IDLE_RETRY_MS
+    )
+
+async def tracking_event_stream(request: Request, order_id: str, queue: asyncio.Queue, snapshot: dict):
+    """
+    Send the current tracking state, then every change pushed by
+    update_order_status. Heartbeats keep proxies from closing the stream.
+    Finished streams end with "end"; idle or evicted ones with "idle", so
+    the client polls instead of reconnecting.
+    """
+    loop = asyncio.get_running_loop()
+    last_event = loop.time()
+
+    try:
+        yield format_sse("tracking", snapshot)
+
+        if snapshot["status"] in TERMINAL_ORDER_STATUSES:
+            yield format_sse("end", {"order_id": order_id})
+            return
+
+        while not await request.is_disconnected():
+            try:
+                event = await asyncio.wait_for(queue.get(), timeout=SSE_HEARTBEAT_SECONDS)
+            except asyncio.TimeoutError:
+                if loop.time() - last_event > SSE_MAX_IDLE_SECONDS:
+                    yield idle_sse(order_id)
+                    return
+                yield ": keep-alive\n\n"
+                continue
+
+            if event is STREAM_EVICTED:
+                yield idle_sse(order_id)
+                return
+
+            last_event = loop.time()
+            yield format_sse("tracking", event)
+
+            if event["status"] in TERMINAL_ORDER_STATUSES:
+                yield format_sse("end", {"order_id": order_id})
+                return
+    finally:
+        order_events.unsubscribe(order_id, queue)
+
+@api_router.get("/tracking/{order_id}/events")
+async def stream_tracking_events(order_id: str, request: Request):
+    """Server-Sent Events stream of tracking updates for one order"""
+    try:
+        # Subscribe before reading so no update can slip in between
+        queue = order_events.subscribe(order_id)
+    except SubscriberLimitExceeded:
+        raise HTTPException(
+            status_code=503,
+            detail="Too many live connections, fall back to polling",
+            headers={"Retry-After": str(SSE_HEARTBEAT_SECONDS)}
+        )
+
+    try:
+        orders = storage.tracking_orders([order_id])
+    except Exception:
+        order_events.unsubscribe(order_id, queue)
+        raise
+
+    if not orders:
+        order_events.unsubscribe(order_id, queue)
         raise HTTPException(status_code=404, detail="Order not found")
 
-    tracking_info = {
-        "order_id": order.data[0]["order_id"],
-        "status": order.data[0]["status"],
-        "tracking_number": order.data[0].get("tracking_number"),
-        "tracking_provider": order.data[0].get("tracking_provider"),
-        "tracking_url": None
+    return StreamingResponse(
+        tracking_event_stream(request, order_id, queue, build_tracking_info(orders[0])),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+# ============== BATCH ROUTES ==============
+
+# Routes whose handlers never block the event loop (storage calls run in
+# worker threads), so sub-requests really run concurrently and the per-item
+# timeout can fire. Anything else is rejected rather than stalling the batch.
+BATCHABLE_ROUTES = {
+    "/api/auth/me",
+    "/api/categories",
+    "/api/products",
+    "/api/products/{product_id}",
+    "/api/guest-cart",
+    "/api/cart",
+    "/api/wishlist",
+    "/api/wishlist/check/{product_id}",
+    "/api/wishlist/count",
+    "/api/session/summary",
+    "/api/orders",
+    "/api/orders/{order_id}",
+    "/api/tracking/providers",
+    "/api/tracking/{order_id}",
+}
+
+def batch_route(path: str) -> Optional[str]:
+    """Route template a GET path resolves to, or None"""
+    scope = {"type": "http", "method": "GET", "path": path, "root_path": ""}
+    for route in app.router.routes:
+        match, _ = route.matches(scope)
+        if match == Match.FULL:
+            return route.path
+    return None
+
+class BatchStreamRejected(Exception):
+    """Raised from a sub-request's send() when the route starts an event stream"""
+
+async def dispatch_batch_item(request: Request, item: BatchRequestItem, headers: list, user: Optional[dict]) -> dict:
+    """Run one GET through the app in process and capture its response"""
+    url = urlsplit(item.path)
+
+    if batch_route(url.path) not in BATCHABLE_ROUTES:
+        return {"id": item.id, "status": 400, "body": {"detail": "Route cannot be batched"}}
+
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": request.url.scheme,
+        "path": url.path,
+        "raw_path": url.path.encode(),
+        "root_path": "",
+        "query_string": url.query.encode(),
+        "headers": headers,
+        "client": request.scope.get("client"),
+        "server": request.scope.get("server"),
+        "batch_user": user
     }
 
-    if tracking_info["tracking_number"] and tracking_info["tracking_provider"]:
-        provider = tracking_info["tracking_provider"].lower()
-        tracking_number = tracking_info["tracking_number"]
+    request_sent = False
+    finished = asyncio.Event()
+    response = {"status": 500, "content_type": "", "chunks": []}
+
+    async def receive():
+        nonlocal request_sent
+        if request_sent:
+            # Nothing more to read; the client only goes away once we are done
+            await finished.wait()
+            return {"type": "http.disconnect"}
+        request_sent = True
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            response["status"] = message["status"]
+            for name, value in message.get("headers", []):
+                if name.lower() == b"content-type":
+                    response["content_type"] = value.decode()
+            if response["content_type"].startswith("text/event-stream"):
+                raise BatchStreamRejected()
+        elif message["type"] == "http.response.body":
+            response["chunks"].append(message.get("body", b""))
 
-        if provider == "delhivery":
-            tracking_info["tracking_url"] = (
-                f"https://www.delhivery.com/track/package/{tracking_number}"
-            )
-        elif provider == "bluedart":
-            tracking_info["tracking_url"] = (
-                f"https://www.bluedart.com/tracking/{tracking_number}"
-            )
+    try:
+        await asyncio.wait_for(app(scope, receive, send), timeout=BATCH_ITEM_TIMEOUT_SECONDS)
+    except asyncio.TimeoutError:
+        return {"id": item.id, "status": 504, "body": {"detail": "Sub-request timed out"}}
+    except BatchStreamRejected:
+        return {"id": item.id, "status": 400, "body": {"detail": "Event streams cannot be batched"}}
+    except Exception as e:
+        logger.error(f"Batch sub-request {item.path} failed: {e}")
+        return {"id": item.id, "status": 500, "body": {"detail": "Sub-request failed"}}
+    finally:
+        finished.set()
+
+    body = b"".join(response["chunks"])
+    if response["content_type"].startswith("application/json") and body:
+        body = json.loads(body)
+    else:
+        body = body.decode(errors="replace")
 
-    return tracking_info
+    return {"id": item.id, "status": response["status"], "body": body}
+
+@api_router.post("/batch")
+async def batch_get(data: BatchRequest, request: Request, response: Response):
+    """
+    Run several GET /api routes in one round trip
+    Body: {"requests": [{"id": "categories", "path": "/api/categories"}, ...]}
+    Only the storefront reads in BATCHABLE_ROUTES can be batched.
+    """
+    if not data.requests:
+        raise HTTPException(status_code=400, detail="No requests provided")
+
+    if len(data.requests) > BATCH_MAX_REQUESTS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"At most {BATCH_MAX_REQUESTS} requests per batch"
+        )
+
+    # Resolve auth once for every sub-request
+    user = await get_current_user(request)
+    headers = [
+        (name, value) for name, value in request.scope["headers"]
+        if name not in (b"content-length", b"content-type")
+    ]
+
+    if user:
+        if request.cookies.get(GUEST_CART_COOKIE):
+            merge_guest_cart(request, response, user)
+        # Authenticated routes use the bearer token, so drop cookies to keep
+        # sub-requests from merging the guest cart again
+        headers = [(name, value) for name, value in headers if name != b"cookie"]
+
+    results = await asyncio.gather(*[
+        dispatch_batch_item(request, item, headers, user)
+        for item in data.requests
+    ])
+
+    return {"responses": results}
 
 # ============== SEED DATA ROUTE ==============
 
 @api_router.post("/seed")
 async def seed_data():
     """Seed initial data (dev only)"""
-    # Check if products already exist
-    existing = supabase.table("products") \
-        .select("product_id") \
-        .limit(1) \
-        .execute()
-
-    if existing.data:
-        return {"message": "Data already seeded"}
-
     # Categories
     categories = [
         {
@@ -1329,8 +2294,6 @@ async def seed_data():
         }
     ]
 
-    supabase.table("categories").insert(categories).execute()
-
     # Products
     products = [
         {
@@ -1374,7 +2337,8 @@ async def seed_data():
         }
     ]
 
-    supabase.table("products").insert(products).execute()
+    if not storage.seed_catalog(categories, products):
+        return {"message": "Data already seeded"}
 
     return {"message": "Seed data inserted successfully"}
 
@@ -1382,6 +2346,45 @@ async def seed_data():
 
 app.include_router(api_router)
 
+@app.on_event("startup")
+async def start_order_events():
+    await order_events.start()
+
+@app.on_event("shutdown")
+async def stop_order_events():
+    await order_events.stop()
+
+@app.on_event("startup")
+async def start_cache_invalidation():
+    await cache_invalidation.start()
+
+@app.on_event("shutdown")
+async def stop_cache_invalidation():
+    await cache_invalidation.stop()
+
+@app.on_event("startup")
+async def start_analytics_refresh():
+    app.state.analytics_refresh = asyncio.create_task(refresh_analytics_periodically()) if analytics else None
+
+@app.on_event("shutdown")
+async def stop_analytics_refresh():
+    if app.state.analytics_refresh:
+        app.state.analytics_refresh.cancel()
+
+@app.on_event("startup")
+async def start_catalog_snapshots():
+    if not catalog_snapshots:
+        return
+
+    await catalog_snapshots.start(export_catalog)
+    if catalog_snapshots.snapshot:
+        warm_catalog_caches(catalog_snapshots.snapshot)
+
+@app.on_event("shutdown")
+async def stop_catalog_snapshots():
+    if catalog_snapshots:
+        await catalog_snapshots.stop()
+
 # Health check
 @app.get("/health")
 async def health_check():
@@ -1390,6 +2393,19 @@ async def health_check():
         "environment": "production" if IS_PRODUCTION else "development"
     }
 
+@app.get("/metrics")
+async def get_metrics(request: Request):
+    """Prometheus scrape endpoint"""
+    if not METRICS_ENABLED:
+        raise HTTPException(status_code=404, detail="Not Found")
+
+    if not METRICS_TOKEN:
+        await require_admin(request)
+    elif request.headers.get("Authorization") != f"Bearer {METRICS_TOKEN}":
+        raise HTTPException(status_code=401, detail="Invalid metrics token")
+
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
 # Root endpoint
 @app.get("/")
 async def root():
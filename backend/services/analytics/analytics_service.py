@@ -0,0 +1,421 @@
+"""
+Daily sales rollups for the admin dashboard.
+
+Orders are aggregated per UTC day into two small tables:
+
+* ``analytics_daily_orders``   - (day, status, payment_status) -> orders, revenue, items
+* ``analytics_daily_products`` - (day, product_id) -> quantity, revenue
+
+Time-series endpoints read only these tables, so a year-long range is a
+single query over a few thousand rows instead of a scan of ``orders`` and
+``order_items``. Days are rebuilt incrementally: triggers on ``orders`` and
+``order_items`` record changed days in ``analytics_dirty_days`` and a
+background task recomputes just those days (migration 011). Each rebuild is
+swapped in by one RPC, in one transaction. History is filled in with the
+``backfill`` command at the bottom of this file.
+"""
+
+from datetime import date, datetime, timedelta, timezone
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+ORDERS_ROLLUP_TABLE = "analytics_daily_orders"
+PRODUCTS_ROLLUP_TABLE = "analytics_daily_products"
+DIRTY_DAYS_TABLE = "analytics_dirty_days"
+
+# Statuses that never count towards revenue
+EXCLUDED_REVENUE_STATUSES = {"cancelled"}
+
+PAGE_SIZE = 1000
+IN_CHUNK_SIZE = 200
+
+# Days recomputed behind the newest rollup on an incremental refresh, so
+# late status changes on recent orders are picked up.
+REFRESH_LOOKBACK_DAYS = 2
+
+# Dirty days rebuilt per refresh pass
+DIRTY_BATCH_SIZE = 31
+
+
+def _to_day(value) -> date:
+    if isinstance(value, date) and not isinstance(value, datetime):
+        return value
+    ts = pd.Timestamp(value)
+    if ts.tzinfo:
+        ts = ts.tz_convert("UTC")
+    return ts.date()
+
+
+def _chunks(values: List, size: int) -> Iterable[List]:
+    for i in range(0, len(values), size):
+        yield values[i:i + size]
+
+
+class AnalyticsService:
+    def __init__(self, client):
+        self.client = client
+
+    # ============== INCREMENTAL UPDATES ==============
+
+    def refresh_dirty(self, limit: int = DIRTY_BATCH_SIZE) -> int:
+        """
+        Recompute the days marked dirty in the database, oldest first.
+        Returns the number of days rebuilt; a day changed again while it was
+        being rebuilt stays dirty and is picked up by the next pass.
+        """
+        marks = self.client.table(DIRTY_DAYS_TABLE) \
+            .select("day, token") \
+            .order("day") \
+            .limit(limit) \
+            .execute()
+
+        rebuilt = 0
+        for mark in marks.data or []:
+            day = _to_day(mark["day"])
+            dirty = [{"day": day.isoformat(), "token": mark["token"]}]
+            rebuilt += self.rebuild_range(day, day, dirty=dirty)
+
+        return rebuilt
+
+    def refresh_recent(self) -> int:
+        """Recompute from the newest rollup day (minus a lookback) up to today"""
+        latest = self.client.table(ORDERS_ROLLUP_TABLE) \
+            .select("day") \
+            .order("day", desc=True) \
+            .limit(1) \
+            .execute()
+
+        today = datetime.now(timezone.utc).date()
+
+        if latest.data:
+            start = _to_day(latest.data[0]["day"]) - timedelta(days=REFRESH_LOOKBACK_DAYS)
+        else:
+            first = self.client.table("orders") \
+                .select("created_at") \
+                .order("created_at") \
+                .limit(1) \
+                .execute()
+
+            if not first.data:
+                return 0
+
+            start = _to_day(first.data[0]["created_at"])
+
+        return self.rebuild_range(start, today)
+
+    # ============== REBUILD ==============
+
+    def _fetch_orders(self, start: date, end: date) -> pd.DataFrame:
+        """Page through orders created in [start, end]"""
+        lower = datetime.combine(start, datetime.min.time(), tzinfo=timezone.utc)
+        upper = datetime.combine(end + timedelta(days=1), datetime.min.time(), tzinfo=timezone.utc)
+
+        rows = []
+        offset = 0
+
+        while True:
+            resp = self.client.table("orders") \
+                .select("order_id, status, payment_status, total, created_at") \
+                .gte("created_at", lower.isoformat()) \
+                .lt("created_at", upper.isoformat()) \
+                .order("created_at") \
+                .range(offset, offset + PAGE_SIZE - 1) \
+                .execute()
+
+            page = resp.data or []
+            rows.extend(page)
+
+            if len(page) < PAGE_SIZE:
+                break
+            offset += PAGE_SIZE
+
+        return pd.DataFrame(
+            rows,
+            columns=["order_id", "status", "payment_status", "total", "created_at"]
+        )
+
+    def _fetch_items(self, order_ids: List[str]) -> pd.DataFrame:
+        rows = []
+        for chunk in _chunks(order_ids, IN_CHUNK_SIZE):
+            resp = self.client.table("order_items") \
+                .select("order_id, product_id, name, price, quantity") \
+                .in_("order_id", chunk) \
+                .execute()
+            rows.extend(resp.data or [])
+
+        return pd.DataFrame(
+            rows,
+            columns=["order_id", "product_id", "name", "price", "quantity"]
+        )
+
+    def backfill(self, start: date, end: date, chunk_days: int = 31) -> Iterator[Tuple[date, date]]:
+        """Rebuild [start, end] in chunks of ``chunk_days``, yielding each chunk once written"""
+        cursor = start
+        while cursor <= end:
+            upper = min(cursor + timedelta(days=chunk_days - 1), end)
+            self.rebuild_range(cursor, upper)
+            yield cursor, upper
+            cursor = upper + timedelta(days=1)
+
+    def rebuild_range(self, start: date, end: date, dirty: Optional[List[Dict]] = None) -> int:
+        """
+        Recompute rollups for every day in [start, end].
+        ``dirty`` are the marks the rebuild answers for; if any of them
+        changed meanwhile nothing is written.
+        Returns the number of days written.
+        """
+        orders = self._fetch_orders(start, end)
+
+        order_rows: List[Dict] = []
+        product_rows: List[Dict] = []
+
+        if not orders.empty:
+            orders["day"] = pd.to_datetime(orders["created_at"], utc=True).dt.date
+            orders["total"] = orders["total"].astype(float)
+            orders["payment_status"] = orders["payment_status"].fillna("pending")
+
+            items = self._fetch_items(orders["order_id"].tolist())
+            items["quantity"] = items["quantity"].astype("int64")
+            items["price"] = items["price"].astype(float)
+
+            item_counts = items.groupby("order_id")["quantity"].sum()
+            orders["items"] = orders["order_id"].map(item_counts).fillna(0).astype("int64")
+
+            by_status = orders.groupby(["day", "status", "payment_status"]).agg(
+                orders=("order_id", "count"),
+                revenue=("total", "sum"),
+                items=("items", "sum"),
+            ).reset_index()
+
+            order_rows = [
+                {
+                    "day": row.day.isoformat(),
+                    "status": row.status,
+                    "payment_status": row.payment_status,
+                    "orders": int(row.orders),
+                    "revenue": round(float(row.revenue), 2),
+                    "items": int(row.items),
+                }
+                for row in by_status.itertuples(index=False)
+            ]
+
+            counted = orders.loc[
+                ~orders["status"].isin(EXCLUDED_REVENUE_STATUSES),
+                ["order_id", "day"]
+            ]
+            items = items.merge(counted, on="order_id", how="inner")
+
+            if not items.empty:
+                items["revenue"] = items["price"] * items["quantity"]
+                by_product = items.groupby(["day", "product_id"]).agg(
+                    name=("name", "last"),
+                    quantity=("quantity", "sum"),
+                    revenue=("revenue", "sum"),
+                ).reset_index()
+
+                product_rows = [
+                    {
+                        "day": row.day.isoformat(),
+                        "product_id": row.product_id,
+                        "name": row.name,
+                        "quantity": int(row.quantity),
+                        "revenue": round(float(row.revenue), 2),
+                    }
+                    for row in by_product.itertuples(index=False)
+                ]
+
+        resp = self.client.rpc("replace_analytics_rollups", {
+            "p_start": start.isoformat(),
+            "p_end": end.isoformat(),
+            "p_orders": order_rows,
+            "p_products": product_rows,
+            "p_dirty": dirty
+        }).execute()
+
+        return resp.data or 0
+
+    # ============== READS ==============
+
+    def _load(self, table: str, columns: str, start: date, end: date) -> pd.DataFrame:
+        rows = []
+        offset = 0
+
+        while True:
+            resp = self.client.table(table) \
+                .select(columns) \
+                .gte("day", start.isoformat()) \
+                .lte("day", end.isoformat()) \
+                .order("day") \
+                .range(offset, offset + PAGE_SIZE - 1) \
+                .execute()
+
+            page = resp.data or []
+            rows.extend(page)
+
+            if len(page) < PAGE_SIZE:
+                break
+            offset += PAGE_SIZE
+
+        frame = pd.DataFrame(rows, columns=[c.strip() for c in columns.split(",")])
+        frame["day"] = pd.to_datetime(frame["day"])
+        return frame
+
+    def _load_orders(self, start: date, end: date) -> pd.DataFrame:
+        frame = self._load(
+            ORDERS_ROLLUP_TABLE,
+            "day, status, payment_status, orders, revenue, items",
+            start,
+            end
+        )
+        frame["orders"] = frame["orders"].astype("int64")
+        frame["items"] = frame["items"].astype("int64")
+        frame["revenue"] = frame["revenue"].astype(float)
+        return frame
+
+    @staticmethod
+    def _days(start: date, end: date) -> pd.DatetimeIndex:
+        return pd.date_range(start, end, freq="D", name="day")
+
+    def revenue_series(self, start: date, end: date) -> List[Dict]:
+        """Revenue, order count and average order value per day"""
+        frame = self._load_orders(start, end)
+        frame = frame[~frame["status"].isin(EXCLUDED_REVENUE_STATUSES)]
+
+        daily = frame.groupby("day")[["orders", "revenue", "items"]].sum() \
+            .reindex(self._days(start, end), fill_value=0)
+
+        orders = daily["orders"].to_numpy()
+        revenue = daily["revenue"].to_numpy(dtype=float)
+        aov = np.divide(revenue, orders, out=np.zeros_like(revenue), where=orders > 0)
+
+        return [
+            {
+                "date": day.date().isoformat(),
+                "orders": int(o),
+                "items": int(i),
+                "revenue": round(float(r), 2),
+                "average_order_value": round(float(a), 2),
+            }
+            for day, o, i, r, a in zip(daily.index, orders, daily["items"].to_numpy(), revenue, aov)
+        ]
+
+    def status_series(self, start: date, end: date) -> Dict[str, Any]:
+        """Orders created per day, split by their current status"""
+        frame = self._load_orders(start, end)
+        days = self._days(start, end)
+
+        pivot = frame.pivot_table(
+            index="day",
+            columns="status",
+            values="orders",
+            aggfunc="sum",
+            fill_value=0
+        ).reindex(days, fill_value=0)
+
+        return {
+            "dates": [d.date().isoformat() for d in days],
+            "series": {
+                str(status): pivot[status].astype(int).tolist()
+                for status in pivot.columns
+            }
+        }
+
+    def top_products(self, start: date, end: date, limit: int = 10) -> List[Dict]:
+        """Best-selling products by quantity over the range"""
+        frame = self._load(
+            PRODUCTS_ROLLUP_TABLE,
+            "day, product_id, name, quantity, revenue",
+            start,
+            end
+        )
+
+        if frame.empty:
+            return []
+
+        frame["quantity"] = frame["quantity"].astype("int64")
+        frame["revenue"] = frame["revenue"].astype(float)
+
+        top = frame.groupby("product_id").agg(
+            name=("name", "last"),
+            quantity=("quantity", "sum"),
+            revenue=("revenue", "sum"),
+        ).sort_values(["quantity", "revenue"], ascending=False).head(limit)
+
+        return [
+            {
+                "product_id": product_id,
+                "name": row.name,
+                "quantity": int(row.quantity),
+                "revenue": round(float(row.revenue), 2),
+            }
+            for product_id, row in zip(top.index, top.itertuples(index=False))
+        ]
+
+    def summary(self, start: date, end: date) -> Dict[str, Any]:
+        """Totals over the range"""
+        frame = self._load_orders(start, end)
+        counted = frame[~frame["status"].isin(EXCLUDED_REVENUE_STATUSES)]
+
+        orders = int(counted["orders"].sum())
+        revenue = float(counted["revenue"].sum())
+        paid_revenue = float(counted.loc[counted["payment_status"] == "paid", "revenue"].sum())
+
+        return {
+            "start": start.isoformat(),
+            "end": end.isoformat(),
+            "orders": orders,
+            "cancelled_orders": int(frame.loc[
+                frame["status"].isin(EXCLUDED_REVENUE_STATUSES), "orders"
+            ].sum()),
+            "items": int(counted["items"].sum()),
+            "revenue": round(revenue, 2),
+            "paid_revenue": round(paid_revenue, 2),
+            "average_order_value": round(revenue / orders, 2) if orders else 0,
+        }
+
+
+# ============== BACKFILL COMMAND ==============
+
+def _cli():
+    import os
+    from pathlib import Path
+
+    import typer
+    from dotenv import load_dotenv
+    from supabase import create_client
+
+    app = typer.Typer(help="Sales analytics rollups")
+
+    def _service() -> AnalyticsService:
+        load_dotenv(Path(__file__).resolve().parents[2] / ".env")
+        client = create_client(
+            os.environ["SUPABASE_URL"],
+            os.environ["SUPABASE_SERVICE_ROLE_KEY"]
+        )
+        return AnalyticsService(client)
+
+    @app.command()
+    def backfill(
+        start: datetime = typer.Option(..., formats=["%Y-%m-%d"], help="First day (UTC)"),
+        end: Optional[datetime] = typer.Option(None, formats=["%Y-%m-%d"], help="Last day, defaults to today"),
+        chunk_days: int = typer.Option(31, help="Days rebuilt per batch"),
+    ):
+        """Rebuild rollups for a historical date range"""
+        last = end.date() if end else datetime.now(timezone.utc).date()
+
+        for lower, upper in _service().backfill(start.date(), last, chunk_days):
+            typer.echo(f"Rebuilt {lower} .. {upper}")
+
+    @app.command()
+    def refresh():
+        """Incrementally rebuild the most recent days"""
+        days = _service().refresh_recent()
+        typer.echo(f"Rebuilt {days} day(s)")
+
+    app()
+
+
+if __name__ == "__main__":
+    _cli()
@@ -0,0 +1,72 @@
+"""
+Cross-worker invalidation for per-worker ``TTLCache``s.
+
+``invalidate(name, key)`` drops the entry from this worker's cache at once,
+so the worker that handled a write reads its own result, and publishes the
+key through a pub/sub backend (the ``InProcessBackend`` / ``RedisBackend``
+used for order events) so every other worker drops its copy as well.
+
+Invalidation may be called from request handlers on the event loop or from
+worker threads (``asyncio.to_thread``, background tasks); publishing is
+scheduled on the loop captured by ``start()``. Before ``start()`` only the
+local cache is cleared. A worker that misses a message (e.g. while Redis is
+reconnecting) serves its copy until the cache TTL expires.
+"""
+
+import asyncio
+import logging
+from typing import Dict, Hashable, Optional
+
+from services.cache.ttl_cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+
+class CacheInvalidator:
+    def __init__(self, backend, caches: Dict[str, TTLCache]):
+        self.backend = backend
+        self.caches = caches
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    async def start(self):
+        self._loop = asyncio.get_running_loop()
+        await self.backend.start(self._deliver)
+
+    async def stop(self):
+        self._loop = None
+        await self.backend.stop()
+
+    def _deliver(self, name: str, event: dict):
+        cache = self.caches.get(name)
+        if cache is None:
+            return
+
+        if event.get("key") is None:
+            cache.clear()
+        else:
+            cache.delete(event["key"])
+
+    def invalidate(self, name: str, key: Optional[Hashable] = None):
+        """Drop ``key`` (or, with no key, every entry) from the named cache on every worker"""
+        event = {"key": key}
+        self._deliver(name, event)
+
+        loop = self._loop
+        if loop is None or loop.is_closed():
+            return
+
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+
+        if running is loop:
+            loop.create_task(self._publish(name, event))
+        else:
+            asyncio.run_coroutine_threadsafe(self._publish(name, event), loop)
+
+    async def _publish(self, name: str, event: dict):
+        try:
+            await self.backend.publish(name, event)
+        except Exception as e:
+            logger.error(f"Failed to publish invalidation for {name}: {e}")
@@ -0,0 +1,47 @@
+"""
+Request coalescing ("singleflight") for identical concurrent reads.
+
+The first caller for a key starts the fetch as its own task; callers that
+arrive while it is in flight await the same task instead of issuing the
+query again. Every caller gets the same result, or the same exception.
+Nothing is cached: once the fetch settles the key is free, and the next
+caller starts a new one.
+
+The fetch runs in its own task, so a caller that disconnects (and is
+cancelled) does not cancel it for the others. Results are shared between
+callers and must be treated as read-only.
+"""
+
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional
+
+
+class SingleFlight:
+    def __init__(self, listener: Optional[Callable[[str, bool], None]] = None):
+        """``listener(label, shared)`` is called once per caller"""
+        self._calls: Dict[Hashable, asyncio.Task] = {}
+        self._listener = listener
+
+    def __len__(self) -> int:
+        return len(self._calls)
+
+    async def do(self, key: Hashable, fetch: Callable[[], Awaitable[Any]], label: str = "") -> Any:
+        task = self._calls.get(key)
+        shared = task is not None
+
+        if task is None:
+            task = asyncio.ensure_future(fetch())
+            self._calls[key] = task
+            task.add_done_callback(lambda done: self._forget(key, done))
+
+        if self._listener:
+            self._listener(label, shared)
+
+        return await asyncio.shield(task)
+
+    def _forget(self, key: Hashable, task: asyncio.Task):
+        if self._calls.get(key) is task:
+            del self._calls[key]
+        # Retrieve the exception so an abandoned failure is not logged as never retrieved
+        if not task.cancelled():
+            task.exception()
@@ -0,0 +1,128 @@
+"""
+Stale-while-revalidate cache for hot, rarely changing reads.
+
+An entry is fresh for ``ttl`` seconds after it was fetched. After that it
+is still served immediately, and the first caller to see it stale starts
+one background refresh. Entries are never served once they are
+``max_age`` seconds old: past that bound the caller waits for a fetch, the
+same as on a cold miss. Concurrent misses and refreshes for a key share
+one fetch.
+
+A failed background refresh is logged and the stale value keeps being
+served until ``max_age``. ``invalidate``/``clear`` also discard the result
+of any refresh that was already running, so a write is never overwritten
+by data read before it.
+"""
+
+import asyncio
+import contextvars
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class StaleWhileRevalidateCache:
+    def __init__(
+        self,
+        ttl: float,
+        max_age: float,
+        max_size: int = 1000,
+        name: str = "",
+        listener: Optional[Callable[[str, str], None]] = None,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        """``listener(name, result)`` gets "hit", "stale" or "miss" for every lookup"""
+        if max_age < ttl:
+            raise ValueError("max_age must be at least ttl")
+
+        self.ttl = ttl
+        self.max_age = max_age
+        self.max_size = max_size
+        self.name = name
+        self._listener = listener
+        self._clock = clock
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._refreshing: Dict[Hashable, asyncio.Task] = {}
+        self._generation = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    async def get(self, key: Hashable, fetch: Callable[[], Awaitable[Any]]) -> Any:
+        entry = self._entries.get(key)
+
+        if entry is not None:
+            fetched_at, value = entry
+            age = self._clock() - fetched_at
+
+            if age < self.ttl:
+                self._observe("hit")
+                return value
+
+            if age < self.max_age:
+                self._observe("stale")
+                self._refresh(key, fetch)
+                return value
+
+            del self._entries[key]
+
+        self._observe("miss")
+        return await asyncio.shield(self._refresh(key, fetch))
+
+    def prime(self, key: Hashable, value: Any, age: float = 0.0) -> bool:
+        """
+        Seed an entry fetched ``age`` seconds ago (e.g. from a snapshot).
+        Never replaces an entry and skips values already past ``max_age``.
+        """
+        if key in self._entries or age >= self.max_age:
+            return False
+
+        self._entries[key] = (self._clock() - max(age, 0.0), value)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+        return True
+
+    def invalidate(self, key: Hashable):
+        self._generation += 1
+        self._entries.pop(key, None)
+
+    def clear(self):
+        self._generation += 1
+        self._entries.clear()
+
+    def _refresh(self, key: Hashable, fetch) -> asyncio.Task:
+        task = self._refreshing.get(key)
+        if task is None:
+            # Empty context: the refresh belongs to no request (metrics, replica pinning)
+            task = asyncio.get_running_loop().create_task(
+                self._load(key, fetch, self._generation),
+                context=contextvars.Context()
+            )
+            self._refreshing[key] = task
+            task.add_done_callback(lambda done: self._refreshed(key, done))
+        return task
+
+    async def _load(self, key: Hashable, fetch, generation: int):
+        value = await fetch()
+
+        if generation == self._generation:
+            self._entries[key] = (self._clock(), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+        return value
+
+    def _refreshed(self, key: Hashable, task: asyncio.Task):
+        if self._refreshing.get(key) is task:
+            del self._refreshing[key]
+
+        if not task.cancelled() and task.exception() is not None:
+            logger.warning(f"Refreshing {self.name or 'cache'} entry {key} failed: {task.exception()}")
+
+    def _observe(self, result: str):
+        if self._listener:
+            self._listener(self.name, result)
@@ -0,0 +1,64 @@
+"""
+Signed client-side cart for anonymous shoppers.
+
+The cart lives entirely in a cookie, so browsing without an account never
+writes to the database. The token is ``<payload>.<signature>``: the payload
+is url-safe base64 of compact JSON ``[[product_id, quantity], ...]`` and the
+signature is a truncated HMAC-SHA256 over it. Quantities are clamped to
+``MAX_QUANTITY`` both when a token is written and when it is read; tampered
+or malformed tokens decode to an empty cart.
+"""
+
+import base64
+import hashlib
+import hmac
+import json
+from typing import Dict
+
+MAX_LINES = 50
+MAX_QUANTITY = 99
+SIGNATURE_BYTES = 16
+
+
+def _b64encode(raw: bytes) -> str:
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def _b64decode(text: str) -> bytes:
+    return base64.urlsafe_b64decode(text + "=" * (-len(text) % 4))
+
+
+class GuestCartCodec:
+    def __init__(self, secret: str):
+        self._key = hashlib.sha256(f"guest-cart:{secret}".encode()).digest()
+
+    def _sign(self, payload: str) -> str:
+        digest = hmac.new(self._key, payload.encode(), hashlib.sha256).digest()
+        return _b64encode(digest[:SIGNATURE_BYTES])
+
+    def encode(self, items: Dict[str, int]) -> str:
+        """Sign a cart; lines with a non-positive quantity are dropped"""
+        lines = [
+            [product_id, min(int(quantity), MAX_QUANTITY)]
+            for product_id, quantity in items.items()
+            if int(quantity) > 0
+        ]
+        payload = _b64encode(json.dumps(lines[:MAX_LINES], separators=(",", ":")).encode())
+        return f"{payload}.{self._sign(payload)}"
+
+    def decode(self, token: str) -> Dict[str, int]:
+        if not token or "." not in token:
+            return {}
+
+        payload, signature = token.rsplit(".", 1)
+        if not hmac.compare_digest(signature, self._sign(payload)):
+            return {}
+
+        try:
+            lines = json.loads(_b64decode(payload))
+            return {
+                str(product_id): max(1, min(int(quantity), MAX_QUANTITY))
+                for product_id, quantity in lines[:MAX_LINES]
+            }
+        except (ValueError, TypeError):
+            return {}
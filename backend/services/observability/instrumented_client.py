@@ -0,0 +1,175 @@
+"""
+Thin timing wrapper around the Supabase client.
+
+``InstrumentedClient`` proxies ``table()``/``from_()``/``rpc()`` and times
+each ``execute()``. Every call produces a ``QueryEvent`` that is handed to
+the registered listeners. Everything else (auth, storage, ...) passes
+straight through to the wrapped client.
+
+With ``record_shapes`` the proxy also keeps the query shape (table,
+operation, selected columns and filter columns, never values) plus row
+count and response size. Without it the per-call cost is one timer and
+the listener calls. The client is only wrapped when something listens
+(metrics, which are on by default, the profiler or replica routing); with
+all of them off the raw client is used and the cost is zero.
+"""
+
+import json
+import re
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, List, Optional
+
+OPERATIONS = frozenset({"select", "insert", "upsert", "update", "delete"})
+
+# Modifiers whose arguments are values, not columns
+VALUE_ONLY_MODIFIERS = frozenset({"limit", "range", "offset", "single", "maybe_single"})
+
+# and(...) / or(...) groups inside or_()/filter() expressions, optionally negated
+_LOGIC_GROUP = re.compile(r"^((?:not\.)?(?:and|or))\((.*)\)$", re.DOTALL)
+
+
+def _split_top_level(expression: str) -> List[str]:
+    """Split on commas outside parentheses and double quotes"""
+    parts, depth, current, quoted, escaped = [], 0, "", False, False
+    for char in expression:
+        if escaped:
+            escaped = False
+        elif char == "\\":
+            escaped = True
+        elif char == '"':
+            quoted = not quoted
+        elif not quoted and char == "(":
+            depth += 1
+        elif not quoted and char == ")":
+            depth -= 1
+        elif char == "," and depth == 0 and not quoted:
+            parts.append(current.strip())
+            current = ""
+            continue
+        current += char
+    if current.strip():
+        parts.append(current.strip())
+    return parts
+
+
+def strip_expression_values(expression: str) -> str:
+    """``a.eq.1,and(b.ilike.*x(y)*,c.not.in.(1,2))`` -> ``a.eq,and(b.ilike,c.not.in)``"""
+    stripped = []
+    for part in _split_top_level(expression):
+        group = _LOGIC_GROUP.match(part)
+        if group:
+            stripped.append(f"{group.group(1)}({strip_expression_values(group.group(2))})")
+            continue
+
+        # column.operator.value or column.not.operator.value; everything after is value
+        tokens = part.split(".", 3)
+        stripped.append(".".join(tokens[:3] if len(tokens) > 2 and tokens[1] == "not" else tokens[:2]))
+    return ",".join(stripped)
+
+
+@dataclass
+class QueryEvent:
+    table: str
+    operation: str
+    duration: float
+    error: bool = False
+    shape: Optional[str] = None
+    rows: Optional[int] = None
+    size: Optional[int] = None
+
+
+class _QueryProxy:
+    __slots__ = ("_builder", "_client", "_table", "_operation", "_shape")
+
+    def __init__(self, builder, client: "InstrumentedClient", table: str, operation: str, shape: Optional[list] = None):
+        self._builder = builder
+        self._client = client
+        self._table = table
+        self._operation = operation
+        self._shape = shape
+
+    def __getattr__(self, name: str):
+        attr = getattr(self._builder, name)
+        if not callable(attr):
+            return attr
+
+        def call(*args, **kwargs):
+            result = attr(*args, **kwargs)
+            if name in OPERATIONS:
+                self._operation = name
+            if self._shape is not None:
+                self._shape.append(_shape_part(name, args))
+            if hasattr(result, "execute"):
+                # Builders chain (and mostly mutate in place), keep the proxy on top
+                self._builder = result
+                return self
+            return result
+
+        return call
+
+    def execute(self):
+        start = time.perf_counter()
+        response = None
+        error = True
+        try:
+            response = self._builder.execute()
+            error = False
+            return response
+        finally:
+            event = QueryEvent(
+                table=self._table,
+                operation=self._operation,
+                duration=time.perf_counter() - start,
+                error=error
+            )
+            if self._shape is not None:
+                event.shape = f"{self._table} " + " ".join(self._shape)
+                if not error:
+                    # maybe_single() returns None instead of an empty response
+                    _measure(event, getattr(response, "data", None))
+            self._client._emit(event)
+
+
+def _shape_part(name: str, args: tuple) -> str:
+    if name in VALUE_ONLY_MODIFIERS or not args or not isinstance(args[0], str):
+        return name
+    if name in ("or_", "filter"):
+        return f"{name}({strip_expression_values(args[0])})"
+    if name in ("insert", "upsert", "update"):
+        return name
+    return f"{name}({args[0]})"
+
+
+def _measure(event: QueryEvent, data):
+    if isinstance(data, list):
+        event.rows = len(data)
+    elif data is not None:
+        event.rows = 1
+    else:
+        event.rows = 0
+    event.size = len(json.dumps(data, default=str))
+
+
+class InstrumentedClient:
+    def __init__(self, client, listeners: List[Callable[[QueryEvent], None]], record_shapes: bool = False):
+        self._client = client
+        self._listeners = list(listeners)
+        self._record_shapes = record_shapes
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._client, name)
+
+    def _emit(self, event: QueryEvent):
+        for listener in self._listeners:
+            listener(event)
+
+    def table(self, table_name: str) -> _QueryProxy:
+        shape = [] if self._record_shapes else None
+        return _QueryProxy(self._client.table(table_name), self, table_name, "select", shape)
+
+    from_ = table
+
+    def rpc(self, fn: str, params=None, *args, **kwargs) -> _QueryProxy:
+        shape = [f"rpc({','.join(sorted(params or {}))})"] if self._record_shapes else None
+        return _QueryProxy(self._client.rpc(fn, params or {}, *args, **kwargs), self, fn, "rpc", shape)
@@ -0,0 +1,274 @@
+"""
+Request and Supabase call metrics in Prometheus text format.
+
+``MetricsMiddleware`` is plain ASGI (no ``BaseHTTPMiddleware``), so the
+response is never buffered and streams are untouched. Latency goes into
+fixed-bucket histograms; p50/p95/p99 are estimated from the buckets when
+``/metrics`` is scraped, so recording stays O(log buckets).
+
+Supabase calls reach ``Metrics.observe_query`` from ``InstrumentedClient``.
+They are aggregated by table and operation and also added to the current
+request (tracked through a context variable, which ``asyncio.to_thread``
+carries into worker threads).
+"""
+
+import threading
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from typing import Dict, List, Optional, Tuple
+
+from .instrumented_client import QueryEvent
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUANTILES = (0.5, 0.95, 0.99)
+UNMATCHED_ROUTE = "unmatched"
+
+
+class Histogram:
+    __slots__ = ("buckets", "counts", "sum", "count")
+
+    def __init__(self, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def quantile(self, q: float) -> float:
+        """Linear interpolation within the bucket holding the q-th observation"""
+        if not self.count:
+            return 0.0
+
+        rank = q * self.count
+        seen = 0
+        for index, bucket_count in enumerate(self.counts):
+            if seen + bucket_count >= rank and bucket_count:
+                if index == len(self.buckets):
+                    return self.buckets[-1]
+                lower = self.buckets[index - 1] if index else 0.0
+                upper = self.buckets[index]
+                return lower + (upper - lower) * (rank - seen) / bucket_count
+            seen += bucket_count
+        return self.buckets[-1]
+
+
+class RequestQueries:
+    __slots__ = ("calls", "seconds")
+
+    def __init__(self):
+        self.calls = 0
+        self.seconds = 0.0
+
+
+_current_request: ContextVar[Optional[RequestQueries]] = ContextVar("metrics_request", default=None)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(**labels) -> str:
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in labels.items()) + "}"
+
+
+class Metrics:
+    def __init__(self, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._requests: Dict[Tuple[str, str], Histogram] = {}
+        self._statuses: Dict[Tuple[str, str, int], int] = {}
+        self._request_queries: Dict[Tuple[str, str], List[float]] = {}
+        self._queries: Dict[Tuple[str, str], Histogram] = {}
+        self._query_errors: Dict[Tuple[str, str], int] = {}
+        self._coalesced: Dict[Tuple[str, str], int] = {}
+        self._cache_lookups: Dict[Tuple[str, str], int] = {}
+        self._snapshot_reads: Dict[str, int] = {}
+
+    def request_started(self) -> RequestQueries:
+        with self._lock:
+            self._in_flight += 1
+        return RequestQueries()
+
+    def request_finished(self, method: str, route: str, status: int, duration: float, stats: RequestQueries):
+        key = (method, route)
+        with self._lock:
+            self._in_flight -= 1
+
+            histogram = self._requests.get(key)
+            if histogram is None:
+                histogram = self._requests[key] = Histogram(self.buckets)
+            histogram.observe(duration)
+
+            status_key = (method, route, status)
+            self._statuses[status_key] = self._statuses.get(status_key, 0) + 1
+
+            totals = self._request_queries.get(key)
+            if totals is None:
+                totals = self._request_queries[key] = [0, 0.0]
+            totals[0] += stats.calls
+            totals[1] += stats.seconds
+
+    def observe_query(self, event: QueryEvent):
+        stats = _current_request.get()
+        if stats is not None:
+            stats.calls += 1
+            stats.seconds += event.duration
+
+        key = (event.table, event.operation)
+        with self._lock:
+            histogram = self._queries.get(key)
+            if histogram is None:
+                histogram = self._queries[key] = Histogram(self.buckets)
+            histogram.observe(event.duration)
+
+            if event.error:
+                self._query_errors[key] = self._query_errors.get(key, 0) + 1
+
+    def observe_coalesced(self, label: str, shared: bool):
+        """SingleFlight listener: counts reads that ran the fetch vs joined one in flight"""
+        key = (label, "coalesced" if shared else "leader")
+        with self._lock:
+            self._coalesced[key] = self._coalesced.get(key, 0) + 1
+
+    def observe_cache(self, cache: str, result: str):
+        """StaleWhileRevalidateCache listener: hit / stale / miss per cache"""
+        key = (cache, result)
+        with self._lock:
+            self._cache_lookups[key] = self._cache_lookups.get(key, 0) + 1
+
+    def observe_snapshot_read(self, label: str):
+        """A browse read answered from the on-disk catalog snapshot"""
+        with self._lock:
+            self._snapshot_reads[label] = self._snapshot_reads.get(label, 0) + 1
+
+    def _render_histogram(self, lines: List[str], name: str, labels: dict, histogram: Histogram):
+        cumulative = 0
+        for bound, bucket_count in zip(self.buckets, histogram.counts):
+            cumulative += bucket_count
+            lines.append(f"{name}_bucket{_labels(**labels, le=bound)} {cumulative}")
+        lines.append(f'{name}_bucket{_labels(**labels, le="+Inf")} {histogram.count}')
+        lines.append(f"{name}_sum{_labels(**labels)} {histogram.sum:.6f}")
+        lines.append(f"{name}_count{_labels(**labels)} {histogram.count}")
+
+    def render(self) -> str:
+        """Current metrics in the Prometheus text exposition format"""
+        with self._lock:
+            lines = [
+                "# HELP http_requests_in_flight Requests currently being served",
+                "# TYPE http_requests_in_flight gauge",
+                f"http_requests_in_flight {self._in_flight}",
+                "# HELP http_request_duration_seconds Request latency by route",
+                "# TYPE http_request_duration_seconds histogram",
+            ]
+            for (method, route), histogram in sorted(self._requests.items()):
+                self._render_histogram(lines, "http_request_duration_seconds", {"method": method, "route": route}, histogram)
+
+            lines += [
+                "# HELP http_request_duration_quantile_seconds Latency quantiles estimated from the histogram buckets",
+                "# TYPE http_request_duration_quantile_seconds gauge",
+            ]
+            for (method, route), histogram in sorted(self._requests.items()):
+                for q in QUANTILES:
+                    value = histogram.quantile(q)
+                    lines.append(f"http_request_duration_quantile_seconds{_labels(method=method, route=route, quantile=q)} {value:.6f}")
+
+            lines += [
+                "# HELP http_responses_total Responses by route and status code",
+                "# TYPE http_responses_total counter",
+            ]
+            for (method, route, status), count in sorted(self._statuses.items()):
+                lines.append(f"http_responses_total{_labels(method=method, route=route, status=status)} {count}")
+
+            lines += [
+                "# HELP http_request_supabase_calls_total Supabase calls made while serving each route",
+                "# TYPE http_request_supabase_calls_total counter",
+            ]
+            for (method, route), (calls, _) in sorted(self._request_queries.items()):
+                lines.append(f"http_request_supabase_calls_total{_labels(method=method, route=route)} {calls}")
+
+            lines += [
+                "# HELP http_request_supabase_seconds_total Time spent in Supabase calls while serving each route",
+                "# TYPE http_request_supabase_seconds_total counter",
+            ]
+            for (method, route), (_, seconds) in sorted(self._request_queries.items()):
+                lines.append(f"http_request_supabase_seconds_total{_labels(method=method, route=route)} {seconds:.6f}")
+
+            lines += [
+                "# HELP supabase_query_duration_seconds Supabase call latency by table and operation",
+                "# TYPE supabase_query_duration_seconds histogram",
+            ]
+            for (table, operation), histogram in sorted(self._queries.items()):
+                self._render_histogram(lines, "supabase_query_duration_seconds", {"table": table, "operation": operation}, histogram)
+
+            lines += [
+                "# HELP supabase_query_errors_total Failed Supabase calls by table and operation",
+                "# TYPE supabase_query_errors_total counter",
+            ]
+            for (table, operation), count in sorted(self._query_errors.items()):
+                lines.append(f"supabase_query_errors_total{_labels(table=table, operation=operation)} {count}")
+
+            lines += [
+                "# HELP coalesced_reads_total Reads that ran the fetch (leader) or shared one already in flight (coalesced)",
+                "# TYPE coalesced_reads_total counter",
+            ]
+            for (label, result), count in sorted(self._coalesced.items()):
+                lines.append(f"coalesced_reads_total{_labels(read=label, result=result)} {count}")
+
+            lines += [
+                "# HELP cache_lookups_total Stale-while-revalidate lookups by cache and result (hit, stale, miss)",
+                "# TYPE cache_lookups_total counter",
+            ]
+            for (cache, result), count in sorted(self._cache_lookups.items()):
+                lines.append(f"cache_lookups_total{_labels(cache=cache, result=result)} {count}")
+
+            lines += [
+                "# HELP catalog_snapshot_reads_total Browse reads served stale from the catalog snapshot",
+                "# TYPE catalog_snapshot_reads_total counter",
+            ]
+            for label, count in sorted(self._snapshot_reads.items()):
+                lines.append(f"catalog_snapshot_reads_total{_labels(read=label)} {count}")
+
+        return "\n".join(lines) + "\n"
+
+
+class MetricsMiddleware:
+    def __init__(self, app, metrics: Metrics):
+        self.app = app
+        self.metrics = metrics
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        stats = self.metrics.request_started()
+        token = _current_request.set(stats)
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _current_request.reset(token)
+            # The router stores the matched route in the scope; label by its
+            # template so path parameters don't explode cardinality
+            route = scope.get("route")
+            self.metrics.request_finished(
+                scope["method"],
+                getattr(route, "path", UNMATCHED_ROUTE),
+                status,
+                time.perf_counter() - start,
+                stats
+            )
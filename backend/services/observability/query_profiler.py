@@ -0,0 +1,127 @@
+"""
+Rolling profile of Supabase query shapes.
+
+Fed with ``QueryEvent``s from ``InstrumentedClient(record_shapes=True)``.
+Stats are kept per shape for the current window plus the previous one, so
+the top-N views always cover between one and two windows of traffic.
+Queries slower than the threshold are logged as they happen.
+"""
+
+import logging
+import threading
+import time
+from typing import Dict, List
+
+from .instrumented_client import QueryEvent
+from .metrics import Histogram
+
+logger = logging.getLogger(__name__)
+
+# Upper bound on distinct shapes per window; new shapes past it are dropped
+MAX_SHAPES = 2000
+
+
+class ShapeStats:
+    __slots__ = ("table", "operation", "count", "errors", "rows", "bytes", "max_seconds", "latency")
+
+    def __init__(self, table: str, operation: str):
+        self.table = table
+        self.operation = operation
+        self.count = 0
+        self.errors = 0
+        self.rows = 0
+        self.bytes = 0
+        self.max_seconds = 0.0
+        self.latency = Histogram()
+
+    def observe(self, event: QueryEvent):
+        self.count += 1
+        self.errors += event.error
+        self.rows += event.rows or 0
+        self.bytes += event.size or 0
+        self.max_seconds = max(self.max_seconds, event.duration)
+        self.latency.observe(event.duration)
+
+    def merge(self, other: "ShapeStats") -> "ShapeStats":
+        merged = ShapeStats(self.table, self.operation)
+        for stats in (self, other):
+            merged.count += stats.count
+            merged.errors += stats.errors
+            merged.rows += stats.rows
+            merged.bytes += stats.bytes
+            merged.max_seconds = max(merged.max_seconds, stats.max_seconds)
+            merged.latency.sum += stats.latency.sum
+            merged.latency.count += stats.latency.count
+            merged.latency.counts = [a + b for a, b in zip(merged.latency.counts, stats.latency.counts)]
+        return merged
+
+    def to_dict(self, shape: str) -> dict:
+        count = self.count or 1
+        return {
+            "shape": shape,
+            "table": self.table,
+            "operation": self.operation,
+            "count": self.count,
+            "errors": self.errors,
+            "total_ms": round(self.latency.sum * 1000, 2),
+            "mean_ms": round(self.latency.sum / count * 1000, 2),
+            # Bucket interpolation can overshoot when every call is fast
+            "p95_ms": round(min(self.latency.quantile(0.95), self.max_seconds) * 1000, 2),
+            "max_ms": round(self.max_seconds * 1000, 2),
+            "avg_rows": round(self.rows / count, 1),
+            "avg_bytes": round(self.bytes / count)
+        }
+
+
+class QueryProfiler:
+    def __init__(self, slow_threshold_ms: float = 200, window_seconds: float = 15 * 60):
+        self.slow_threshold = slow_threshold_ms / 1000
+        self.window_seconds = window_seconds
+        self._lock = threading.Lock()
+        self._current: Dict[str, ShapeStats] = {}
+        self._previous: Dict[str, ShapeStats] = {}
+        self._window_started = time.monotonic()
+
+    def observe(self, event: QueryEvent):
+        if event.duration >= self.slow_threshold:
+            logger.warning(
+                f"Slow query {event.duration * 1000:.0f}ms: {event.shape} "
+                f"rows={event.rows} bytes={event.size}"
+            )
+
+        with self._lock:
+            now = time.monotonic()
+            if now - self._window_started >= self.window_seconds:
+                self._previous = self._current
+                self._current = {}
+                self._window_started = now
+
+            stats = self._current.get(event.shape)
+            if stats is None:
+                if len(self._current) >= MAX_SHAPES:
+                    return
+                stats = self._current[event.shape] = ShapeStats(event.table, event.operation)
+            stats.observe(event)
+
+    def reset(self):
+        with self._lock:
+            self._current = {}
+            self._previous = {}
+            self._window_started = time.monotonic()
+
+    def snapshot(self, limit: int = 20) -> dict:
+        """Top shapes by p95 latency and by call count"""
+        with self._lock:
+            shapes = dict(self._previous)
+            for shape, stats in self._current.items():
+                shapes[shape] = stats.merge(shapes[shape]) if shape in shapes else stats
+
+            rows: List[dict] = [stats.to_dict(shape) for shape, stats in shapes.items()]
+
+        return {
+            "window_seconds": self.window_seconds,
+            "slow_threshold_ms": self.slow_threshold * 1000,
+            "shapes": len(rows),
+            "slowest": sorted(rows, key=lambda row: row["p95_ms"], reverse=True)[:limit],
+            "most_frequent": sorted(rows, key=lambda row: row["count"], reverse=True)[:limit]
+        }
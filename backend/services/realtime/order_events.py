@@ -0,0 +1,226 @@
+"""
+Per-order pub/sub used by the Server-Sent Events stream.
+
+Subscribers are local asyncio queues held by this worker. Publishing goes
+through a backend: ``InProcessBackend`` delivers straight to the local
+queues (single worker), ``RedisBackend`` fans out over Redis pub/sub so an
+update handled by one worker reaches streams held open by the others.
+
+``max_connections`` bounds idle streams: when a worker is full, the stream
+that has gone longest without an event (and at least ``evict_idle_after``
+seconds) is handed ``STREAM_EVICTED`` to close itself, and the new stream
+takes its slot. Only when every stream is active is a subscriber refused.
+"""
+
+import asyncio
+import json
+import logging
+import time
+from typing import Callable, Dict, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+CHANNEL_PREFIX = "order-events:"
+SUBSCRIBER_QUEUE_SIZE = 8
+
+# Delay before resubscribing after the Redis connection drops, doubling up to the max
+RECONNECT_MIN_SECONDS = 0.5
+RECONNECT_MAX_SECONDS = 30.0
+
+# Put on an evicted subscriber's queue; the stream should close
+STREAM_EVICTED = {"event": "evicted"}
+
+
+class SubscriberLimitExceeded(Exception):
+    """Raised when a worker is full and none of its streams has been idle long enough to evict"""
+
+
+class InProcessBackend:
+    """Delivers events only to subscribers in the current process"""
+
+    def __init__(self):
+        self._deliver: Optional[Callable[[str, dict], None]] = None
+
+    async def start(self, deliver: Callable[[str, dict], None]):
+        self._deliver = deliver
+
+    async def stop(self):
+        self._deliver = None
+
+    async def publish(self, order_id: str, event: dict):
+        if self._deliver:
+            self._deliver(order_id, event)
+
+    async def publish_many(self, events: Dict[str, dict]):
+        if self._deliver:
+            for order_id, event in events.items():
+                self._deliver(order_id, event)
+
+
+class RedisBackend:
+    """Fans events out to every worker through Redis pub/sub"""
+
+    def __init__(self, url: str, channel_prefix: str = CHANNEL_PREFIX):
+        try:
+            import redis.asyncio as redis
+        except ImportError:
+            raise RuntimeError("RedisBackend requires the 'redis' package")
+
+        self._redis = redis.from_url(url)
+        self._prefix = channel_prefix
+        self._pubsub = None
+        self._listener: Optional[asyncio.Task] = None
+
+    async def start(self, deliver: Callable[[str, dict], None]):
+        await self._subscribe()
+        self._listener = asyncio.create_task(self._listen(deliver))
+
+    async def _subscribe(self):
+        self._pubsub = self._redis.pubsub()
+        await self._pubsub.psubscribe(f"{self._prefix}*")
+
+    async def _close_pubsub(self):
+        pubsub, self._pubsub = self._pubsub, None
+        if pubsub is None:
+            return
+        try:
+            await pubsub.close()
+        except Exception:
+            pass
+
+    async def _listen(self, deliver):
+        """
+        Deliver messages until stopped. A dropped connection (or a listen()
+        that simply ends) is logged and followed by a fresh subscription,
+        retried with exponential backoff; events published while
+        disconnected are lost, but streams resume receiving afterwards.
+        """
+        delay = RECONNECT_MIN_SECONDS
+
+        while True:
+            try:
+                if self._pubsub is None:
+                    await self._subscribe()
+                    logger.info(f"Resubscribed to {self._prefix}*")
+                    delay = RECONNECT_MIN_SECONDS
+
+                async for message in self._pubsub.listen():
+                    if message.get("type") != "pmessage":
+                        continue
+                    try:
+                        channel = message["channel"]
+                        if isinstance(channel, bytes):
+                            channel = channel.decode()
+                        deliver(channel[len(self._prefix):], json.loads(message["data"]))
+                    except Exception as e:
+                        logger.error(f"Dropping malformed order event: {e}")
+
+                raise ConnectionError("subscription ended")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Subscription to {self._prefix}* lost, retrying in {delay:.1f}s: {e}")
+                await self._close_pubsub()
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, RECONNECT_MAX_SECONDS)
+
+    async def stop(self):
+        if self._listener:
+            self._listener.cancel()
+        await self._close_pubsub()
+        await self._redis.close()
+
+    async def publish(self, order_id: str, event: dict):
+        await self._redis.publish(f"{self._prefix}{order_id}", json.dumps(event, default=str))
+
+    async def publish_many(self, events: Dict[str, dict]):
+        async with self._redis.pipeline(transaction=False) as pipe:
+            for order_id, event in events.items():
+                pipe.publish(f"{self._prefix}{order_id}", json.dumps(event, default=str))
+            await pipe.execute()
+
+
+class OrderEventBroker:
+    def __init__(
+        self,
+        backend=None,
+        max_connections: int = 500,
+        evict_idle_after: float = 60.0,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        self.backend = backend or InProcessBackend()
+        self.max_connections = max_connections
+        self.evict_idle_after = evict_idle_after
+        self._clock = clock
+        self._subscribers: Dict[str, Set[asyncio.Queue]] = {}
+        # queue -> (order_id, time of its last event)
+        self._activity: Dict[asyncio.Queue, tuple] = {}
+
+    @property
+    def connections(self) -> int:
+        return len(self._activity)
+
+    async def start(self):
+        await self.backend.start(self._deliver)
+
+    async def stop(self):
+        await self.backend.stop()
+
+    def _deliver(self, order_id: str, event: dict):
+        now = self._clock()
+        for queue in self._subscribers.get(order_id, ()):
+            if queue.full():
+                # Slow consumer: only the latest state matters
+                queue.get_nowait()
+            queue.put_nowait(event)
+            self._activity[queue] = (order_id, now)
+
+    async def publish(self, order_id: str, event: dict):
+        try:
+            await self.backend.publish(order_id, event)
+        except Exception as e:
+            logger.error(f"Failed to publish order event for {order_id}: {e}")
+
+    async def publish_many(self, events: Dict[str, dict]):
+        """Publish a batch of order events in a single backend call"""
+        if not events:
+            return
+        try:
+            await self.backend.publish_many(events)
+        except Exception as e:
+            logger.error(f"Failed to publish {len(events)} order events: {e}")
+
+    def subscribe(self, order_id: str) -> asyncio.Queue:
+        """Register a stream for an order; pair with unsubscribe()"""
+        if self.connections >= self.max_connections and not self._evict_idlest():
+            raise SubscriberLimitExceeded()
+
+        queue: asyncio.Queue = asyncio.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+        self._subscribers.setdefault(order_id, set()).add(queue)
+        self._activity[queue] = (order_id, self._clock())
+        return queue
+
+    def unsubscribe(self, order_id: str, queue: asyncio.Queue):
+        subscribers = self._subscribers.get(order_id)
+        if subscribers is None or queue not in subscribers:
+            return
+
+        subscribers.discard(queue)
+        del self._activity[queue]
+        if not subscribers:
+            del self._subscribers[order_id]
+
+    def _evict_idlest(self) -> bool:
+        """Free the slot of the longest-idle stream, if it has been idle long enough"""
+        if not self._activity:
+            return False
+
+        queue, (order_id, last_event) = min(self._activity.items(), key=lambda item: item[1][1])
+        if self._clock() - last_event < self.evict_idle_after:
+            return False
+
+        self.unsubscribe(order_id, queue)
+        while not queue.empty():
+            queue.get_nowait()
+        queue.put_nowait(STREAM_EVICTED)
+        return True
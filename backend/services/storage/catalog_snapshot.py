@@ -0,0 +1,296 @@
+"""
+On-disk catalog snapshot: every product and category in one file.
+
+Workers load it at startup to warm the home page caches, and browse reads
+fall back to it when the database is slow or down. The file is written by
+a periodic task in each worker; a worker only writes once the file is
+older than the interval, and otherwise picks up the one another worker
+wrote.
+
+Layout (little-endian), version 1::
+
+    header       magic "CSNP", version, created_at (unix seconds),
+                 product count, categories/index/order offsets, body crc32
+    categories   JSON array
+    index        one entry per product sorted by product_id:
+                 (id offset, id length, record offset, record length)
+    order        u32 index positions in listing order
+    data         product ids and one JSON object per product
+
+The file is memory-mapped read-only. A product lookup is a binary search
+over the index and decodes a single record; full listings decode every
+record once and keep the list. Writes go to a temp file that is renamed
+over the old one, so a reader never sees a partial file and an mmap of
+the previous snapshot stays valid.
+"""
+
+import asyncio
+import json
+import logging
+import mmap
+import os
+import struct
+import tempfile
+import time
+import zlib
+from datetime import datetime, timezone
+from typing import Callable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b"CSNP"
+VERSION = 1
+
+HEADER = struct.Struct("<4sHHdIIIIII")
+INDEX_ENTRY = struct.Struct("<IIII")
+ORDER_ENTRY = struct.Struct("<I")
+
+
+class SnapshotError(Exception):
+    """The file is missing, truncated, corrupt or from an unknown version"""
+
+
+def _encode(value) -> bytes:
+    return json.dumps(value, separators=(",", ":"), default=str).encode()
+
+
+def write_snapshot(path: str, categories: List[dict], products: List[dict], created_at: Optional[float] = None):
+    """Atomically replace the snapshot at ``path``"""
+    created_at = time.time() if created_at is None else created_at
+    categories_blob = _encode(categories)
+
+    ids = [product["product_id"].encode() for product in products]
+    records = [_encode(product) for product in products]
+    by_id = sorted(range(len(products)), key=lambda position: ids[position])
+
+    categories_offset = HEADER.size
+    index_offset = categories_offset + len(categories_blob)
+    order_offset = index_offset + INDEX_ENTRY.size * len(products)
+    data_offset = order_offset + ORDER_ENTRY.size * len(products)
+
+    index, data, offset = bytearray(), bytearray(), data_offset
+    for position in by_id:
+        id_offset = offset
+        record_offset = id_offset + len(ids[position])
+        index += INDEX_ENTRY.pack(id_offset, len(ids[position]), record_offset, len(records[position]))
+        data += ids[position] + records[position]
+        offset = record_offset + len(records[position])
+
+    # Listing order refers to index positions, not to original positions
+    index_position = {position: rank for rank, position in enumerate(by_id)}
+    order = b"".join(ORDER_ENTRY.pack(index_position[position]) for position in range(len(products)))
+
+    body = categories_blob + bytes(index) + order + bytes(data)
+    header = HEADER.pack(
+        MAGIC, VERSION, 0, created_at, len(products),
+        categories_offset, len(categories_blob), index_offset, order_offset, zlib.crc32(body)
+    )
+
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(prefix=".catalog-", dir=directory)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(header)
+            f.write(body)
+            f.flush()
+            os.fsync(f.fileno())
+        # mkstemp creates the file 0600; workers may run as another user
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+class CatalogSnapshot:
+    def __init__(self, buffer: mmap.mmap):
+        self._buffer = buffer
+
+        if len(buffer) < HEADER.size:
+            raise SnapshotError("truncated header")
+
+        (
+            magic, version, _, self.created_at, self._count,
+            self._categories_offset, self._categories_length, self._index_offset, self._order_offset, crc
+        ) = HEADER.unpack_from(buffer, 0)
+
+        if magic != MAGIC:
+            raise SnapshotError("not a catalog snapshot")
+        if version != VERSION:
+            raise SnapshotError(f"unsupported snapshot version {version}")
+        if self._order_offset + ORDER_ENTRY.size * self._count > len(buffer):
+            raise SnapshotError("truncated snapshot")
+        if zlib.crc32(buffer[HEADER.size:]) != crc:
+            raise SnapshotError("checksum mismatch")
+
+        self._listing: Optional[List[dict]] = None
+
+    @classmethod
+    def open(cls, path: str) -> "CatalogSnapshot":
+        try:
+            with open(path, "rb") as f:
+                buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError) as e:
+            # ValueError: mmap of an empty file
+            raise SnapshotError(f"cannot map {path}: {e}") from e
+        return cls(buffer)
+
+    def __len__(self) -> int:
+        return self._count
+
+    @property
+    def created_at_iso(self) -> str:
+        return datetime.fromtimestamp(self.created_at, timezone.utc).isoformat()
+
+    def age(self, now: Optional[float] = None) -> float:
+        return (time.time() if now is None else now) - self.created_at
+
+    def categories(self) -> List[dict]:
+        start = self._categories_offset
+        return json.loads(self._buffer[start:start + self._categories_length])
+
+    def get_product(self, product_id: str) -> Optional[dict]:
+        key = product_id.encode()
+        low, high = 0, self._count
+
+        while low < high:
+            middle = (low + high) // 2
+            id_offset, id_length, record_offset, record_length = self._entry(middle)
+            candidate = self._buffer[id_offset:id_offset + id_length]
+
+            if candidate == key:
+                return json.loads(self._buffer[record_offset:record_offset + record_length])
+            if candidate < key:
+                low = middle + 1
+            else:
+                high = middle
+
+        return None
+
+    def products(self) -> List[dict]:
+        """Every product in listing order; decoded once, treat as read-only"""
+        if self._listing is None:
+            listing = []
+            for position in range(self._count):
+                (rank,) = ORDER_ENTRY.unpack_from(self._buffer, self._order_offset + ORDER_ENTRY.size * position)
+                _, _, record_offset, record_length = self._entry(rank)
+                listing.append(json.loads(self._buffer[record_offset:record_offset + record_length]))
+            self._listing = listing
+        return self._listing
+
+    def list_products(
+        self,
+        category: Optional[str],
+        featured: Optional[bool],
+        search: Optional[str],
+        limit: int,
+        skip: int
+    ) -> Tuple[List[dict], int]:
+        """Same filters and paging as ``Repository.list_products``"""
+        needle = search.lower() if search else None
+        matches = [
+            product for product in self.products()
+            if (not category or product.get("category") == category)
+            and (featured is None or bool(product.get("featured")) == featured)
+            and (
+                not needle
+                or needle in (product.get("name") or "").lower()
+                or needle in (product.get("description") or "").lower()
+            )
+        ]
+        return matches[skip:skip + limit], len(matches)
+
+    def _entry(self, rank: int) -> tuple:
+        return INDEX_ENTRY.unpack_from(self._buffer, self._index_offset + INDEX_ENTRY.size * rank)
+
+
+class CatalogSnapshotStore:
+    """
+    The snapshot a worker currently serves from, the task that keeps it
+    fresh, and the degraded-mode window opened by a failed browse read
+    """
+
+    def __init__(
+        self,
+        path: str,
+        interval: float,
+        degraded_seconds: float,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        self.path = path
+        self.interval = interval
+        self.degraded_seconds = degraded_seconds
+        self.snapshot: Optional[CatalogSnapshot] = None
+        self._clock = clock
+        self._loaded_mtime: Optional[int] = None
+        self._degraded_until = 0.0
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def degraded(self) -> bool:
+        return self._clock() < self._degraded_until
+
+    def trip(self):
+        """Serve from the snapshot without trying the database for ``degraded_seconds``"""
+        self._degraded_until = self._clock() + self.degraded_seconds
+
+    def load(self) -> Optional[CatalogSnapshot]:
+        """Map the file if it changed since the last load; a bad file keeps the current snapshot"""
+        try:
+            mtime = os.stat(self.path).st_mtime_ns
+        except FileNotFoundError:
+            return self.snapshot
+
+        if mtime == self._loaded_mtime:
+            return self.snapshot
+
+        try:
+            # The previous mapping is released once no request holds it
+            self.snapshot = CatalogSnapshot.open(self.path)
+            self._loaded_mtime = mtime
+            logger.info(f"Loaded catalog snapshot from {self.snapshot.created_at_iso}: {len(self.snapshot)} products")
+        except SnapshotError as e:
+            logger.warning(f"Ignoring catalog snapshot {self.path}: {e}")
+
+        return self.snapshot
+
+    def write(self, categories: List[dict], products: List[dict]):
+        write_snapshot(self.path, categories, products)
+        self.load()
+
+    def due(self, now: Optional[float] = None) -> bool:
+        """No worker has written the file within the interval"""
+        try:
+            mtime = os.stat(self.path).st_mtime
+        except FileNotFoundError:
+            return True
+        return (time.time() if now is None else now) - mtime >= self.interval
+
+    async def refresh(self, export: Callable[[], Tuple[List[dict], List[dict]]]):
+        """Write a new snapshot if one is due, otherwise pick up another worker's"""
+        if not self.due():
+            await asyncio.to_thread(self.load)
+            return
+
+        if self.degraded:
+            return
+
+        try:
+            categories, products = await asyncio.to_thread(export)
+            await asyncio.to_thread(self.write, categories, products)
+        except Exception as e:
+            logger.warning(f"Writing catalog snapshot failed: {e}")
+
+    async def start(self, export: Callable[[], Tuple[List[dict], List[dict]]]):
+        await asyncio.to_thread(self.load)
+        self._task = asyncio.create_task(self._run(export))
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            self._task = None
+
+    async def _run(self, export):
+        while True:
+            await self.refresh(export)
+            await asyncio.sleep(max(self.interval / 10, 1.0))
@@ -0,0 +1,120 @@
+"""
+Read-replica routing with read-your-writes consistency.
+
+Catalog reads ask ``ReplicaSet.reader()`` for a client and get the replicas
+round-robin; everything else stays on the primary. Replicas lag the primary,
+so a client that has just written is pinned to the primary for
+``pin_seconds``:
+
+- ``ReplicaSet.observe_query`` listens on the primary ``InstrumentedClient``
+  and flags the current request as soon as it runs anything but a select.
+- ``ReadYourWritesMiddleware`` answers such a request with a short-lived
+  pin cookie holding its expiry time. Requests that carry an unexpired pin
+  read from the primary, on whichever worker they land.
+
+The pin is not signed: forging one only sends that client's own reads to
+the primary, and expiries further out than ``pin_seconds`` are ignored.
+"""
+
+import itertools
+import threading
+import time
+from contextvars import ContextVar
+from typing import List, Optional
+
+from services.observability.instrumented_client import QueryEvent
+
+PIN_COOKIE = "rw_pin"
+
+
+class RequestConsistency:
+    __slots__ = ("pinned", "wrote")
+
+    def __init__(self, pinned: bool = False):
+        self.pinned = pinned
+        self.wrote = False
+
+
+_current_request: ContextVar[Optional[RequestConsistency]] = ContextVar("replica_request", default=None)
+
+
+def primary_pinned() -> bool:
+    """True when the current request must read from the primary"""
+    state = _current_request.get()
+    return state is not None and (state.pinned or state.wrote)
+
+
+class ReplicaSet:
+    def __init__(self, replicas: List, pin_seconds: float = 5.0):
+        self.replicas = list(replicas)
+        self.pin_seconds = pin_seconds
+        self._next = itertools.cycle(self.replicas)
+        self._lock = threading.Lock()
+
+    def reader(self):
+        """Replica client for a catalog read, or None when the request must use the primary"""
+        if not self.replicas or primary_pinned():
+            return None
+
+        with self._lock:
+            return next(self._next)
+
+    def observe_query(self, event: QueryEvent):
+        """Primary client listener: any non-select marks the request as a write"""
+        if event.operation != "select":
+            state = _current_request.get()
+            if state is not None:
+                state.wrote = True
+
+    def is_pinned(self, value: Optional[str], now: float) -> bool:
+        try:
+            expires = float(value)
+        except (TypeError, ValueError):
+            return False
+        return now < expires <= now + self.pin_seconds
+
+
+class ReadYourWritesMiddleware:
+    """Pure ASGI: reads the pin cookie, and sets it on responses to writing requests"""
+
+    def __init__(self, app, replica_set: ReplicaSet, secure: bool = False, samesite: str = "lax", path: str = "/api"):
+        self.app = app
+        self.replica_set = replica_set
+        self.cookie_attributes = f"Max-Age={max(1, int(replica_set.pin_seconds))}; Path={path}; HttpOnly; SameSite={samesite}"
+        if secure:
+            self.cookie_attributes += "; Secure"
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        # /api/batch sub-requests run nested in the batch request and inherit its pin
+        outer = _current_request.get()
+        pinned = outer is not None and (outer.pinned or outer.wrote)
+
+        state = RequestConsistency(pinned=pinned or self.replica_set.is_pinned(_read_pin(scope), time.time()))
+        token = _current_request.set(state)
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start" and state.wrote:
+                expires = time.time() + self.replica_set.pin_seconds
+                cookie = f"{PIN_COOKIE}={expires:.3f}; {self.cookie_attributes}"
+                message = {**message, "headers": [*message.get("headers", []), (b"set-cookie", cookie.encode())]}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _current_request.reset(token)
+
+
+def _read_pin(scope) -> Optional[str]:
+    for name, value in scope.get("headers", ()):
+        if name != b"cookie":
+            continue
+        for pair in value.decode("latin-1").split(";"):
+            key, _, cookie_value = pair.strip().partition("=")
+            if key == PIN_COOKIE:
+                return cookie_value
+    return None
@@ -0,0 +1,217 @@
+"""
+Storage interface for the storefront data: users, categories, products,
+carts, wishlists and customer orders.
+
+``SupabaseRepository`` talks PostgREST (the default). ``SQLiteRepository``
+runs the same operations as direct SQL for single-node deployments, tests
+and benchmarks. Every order read and write (checkout, admin listing and
+export, the change feed, status updates and tracking) goes through the
+repository; only the analytics rollups are Supabase-only.
+
+Cart and wishlist lines are returned as dicts carrying the product
+snapshot (``product_id, quantity, name, price, image``); products carry
+``images`` as a list.
+"""
+
+from abc import ABC, abstractmethod
+from typing import Dict, List, Optional, Tuple
+
+
+class StorageError(Exception):
+    """Base class for domain errors raised by repositories"""
+
+
+class CartOperationError(StorageError):
+    """A PATCH /cart operation failed; the whole batch was rolled back"""
+
+    def __init__(self, reason: str, product_id: str):
+        super().__init__(f"{reason}:{product_id}")
+        self.reason = reason
+        self.product_id = product_id
+
+
+class EmptyCart(StorageError):
+    pass
+
+
+class ProductNotFound(StorageError):
+    pass
+
+
+class InsufficientStock(StorageError):
+    def __init__(self, name: str):
+        super().__init__(name)
+        self.name = name
+
+
+class Repository(ABC):
+    # Users
+
+    @abstractmethod
+    def get_user_by_email(self, email: str) -> Optional[dict]: ...
+
+    @abstractmethod
+    def create_user(self, user: dict) -> Optional[dict]: ...
+
+    # Categories
+
+    @abstractmethod
+    def list_categories(self) -> List[dict]: ...
+
+    @abstractmethod
+    def create_category(self, category: dict) -> dict: ...
+
+    @abstractmethod
+    def seed_catalog(self, categories: List[dict], products: List[dict]) -> bool:
+        """Insert the demo catalog; False when products already exist"""
+
+    # Products
+
+    @abstractmethod
+    def list_products(
+        self,
+        category: Optional[str],
+        featured: Optional[bool],
+        search: Optional[str],
+        limit: int,
+        skip: int
+    ) -> Tuple[List[dict], int]: ...
+
+    @abstractmethod
+    def get_product(self, product_id: str) -> Optional[dict]: ...
+
+    @abstractmethod
+    def get_products(self, product_ids: List[str]) -> List[dict]:
+        """product_id, name, price, images and stock for each existing id"""
+
+    @abstractmethod
+    def create_product(self, product: dict) -> dict: ...
+
+    @abstractmethod
+    def update_product(self, product_id: str, fields: dict) -> Optional[dict]: ...
+
+    @abstractmethod
+    def delete_product(self, product_id: str) -> bool: ...
+
+    @abstractmethod
+    def propagate_product_snapshot(self, product: dict):
+        """Copy name/price/image (and stock for wishlists) onto every line of the product"""
+
+    @abstractmethod
+    def remove_product_lines(self, product_id: str): ...
+
+    # Carts
+
+    @abstractmethod
+    def cart_lines(self, user_id: str) -> List[dict]: ...
+
+    @abstractmethod
+    def add_cart_item(self, user_id: str, product_id: str, quantity: int) -> dict:
+        """{"result": "added" | "not_found" | "insufficient_stock" | "stock_limit", "name": ...}"""
+
+    @abstractmethod
+    def apply_cart_operations(self, user_id: str, operations: List[dict]) -> List[dict]:
+        """Apply set/add/remove operations atomically; raises CartOperationError"""
+
+    @abstractmethod
+    def set_cart_quantity(self, user_id: str, product_id: str, quantity: int) -> bool:
+        """Set (or remove, when quantity <= 0) a line; False when the user has no cart"""
+
+    @abstractmethod
+    def clear_cart(self, user_id: str) -> bool: ...
+
+    @abstractmethod
+    def cart_counts(self, user_id: str) -> dict:
+        """{"lines": ..., "quantity": ...}"""
+
+    @abstractmethod
+    def merge_guest_cart(self, user_id: str, items: Dict[str, int]) -> int:
+        """Merge guest lines with greatest(existing, guest) capped at stock; returns lines merged"""
+
+    # Wishlists
+
+    @abstractmethod
+    def wishlist_lines(self, user_id: str) -> List[dict]: ...
+
+    @abstractmethod
+    def wishlist_product_ids(self, user_id: str) -> frozenset: ...
+
+    @abstractmethod
+    def add_wishlist_item(self, user_id: str, product_id: str) -> dict:
+        """{"result": "added" | "exists" | "not_found", "name": ...}"""
+
+    @abstractmethod
+    def remove_wishlist_item(self, user_id: str, product_id: str) -> bool: ...
+
+    @abstractmethod
+    def wishlist_count(self, user_id: str) -> int: ...
+
+    @abstractmethod
+    def move_wishlist_to_cart(self, user_id: str, product_ids: Optional[List[str]]) -> dict:
+        """{"moved": [...], "skipped": [...]}; one unit each, skipped when out of stock"""
+
+    @abstractmethod
+    def move_cart_to_wishlist(self, user_id: str, product_ids: Optional[List[str]]) -> dict: ...
+
+    # Orders
+
+    @abstractmethod
+    def place_order(self, user_id: str, order_id: str, shipping_address: dict, shipping: float, now: str) -> float:
+        """
+        Turn the cart into an order, decrement stock and clear the cart.
+        Returns the order total; raises EmptyCart, ProductNotFound or InsufficientStock.
+        """
+
+    @abstractmethod
+    def list_user_orders(self, user_id: str) -> List[dict]: ...
+
+    @abstractmethod
+    def get_order(self, order_id: str) -> Optional[dict]:
+        """The order with its ``items``, or None"""
+
+    @abstractmethod
+    def page_orders(
+        self,
+        status: Optional[str],
+        payment_status: Optional[str],
+        user_id: Optional[str],
+        created_from: Optional[str],
+        created_before: Optional[str],
+        after: Optional[Tuple[str, str]],
+        limit: int
+    ) -> List[dict]:
+        """
+        Orders newest first by (created_at, order_id), each with its
+        ``items``, starting just past the ``after`` key.
+        """
+
+    @abstractmethod
+    def order_changes(self, after_xid: str, after_seq: int, limit: int) -> List[dict]:
+        """
+        Orders changed after the (change_xid, change_seq) cursor, oldest
+        change first, each with its ``items``. A change is only returned
+        once no change ordered before it can still commit.
+        """
+
+    @abstractmethod
+    def update_order(self, order_id: str, fields: dict) -> Optional[dict]:
+        """The updated order row, or None when it does not exist"""
+
+    @abstractmethod
+    def bulk_update_order_tracking(self, updates: List[dict]) -> List[dict]:
+        """
+        Apply {"order_id", "status", "tracking_number", "tracking_provider"}
+        rows in one transaction; None fields keep their value. Returns the
+        updated order rows.
+        """
+
+    @abstractmethod
+    def tracking_orders(self, order_ids: List[str]) -> List[dict]:
+        """order_id, status, tracking_number and tracking_provider for each existing id"""
+
+    @abstractmethod
+    def order_stats(self) -> dict:
+        """
+        {"total_orders", "pending_orders", "confirmed_orders", "shipped_orders",
+        "delivered_orders", "total_products", "total_users", "total_revenue"}
+        """
@@ -0,0 +1,868 @@
+"""
+Repository backed by a local SQLite file, queried with direct SQL.
+
+Meant for single-node deployments, local development and benchmarks that
+should not depend on a PostgREST round trip. Each thread gets its own
+connection (WAL mode, so readers never block the writer). Operations that
+the Supabase backend runs as SQL functions are single ``BEGIN IMMEDIATE``
+transactions here, with the same semantics as ``migrations/006``-``010``.
+
+Products keep ``images`` as JSON text and orders keep ``shipping_address``
+as JSON text; both are decoded on the way out.
+
+Every order write stamps the row with the next ``change_seq``. Writers are
+serialized by ``BEGIN IMMEDIATE``, so changes commit in sequence order and
+the change feed needs no transaction ids: ``change_xid`` is always "0".
+"""
+
+import json
+import sqlite3
+import threading
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
+
+from services.storage.repository import (
+    CartOperationError,
+    EmptyCart,
+    InsufficientStock,
+    ProductNotFound,
+    Repository,
+)
+
+SCHEMA = """
+create table if not exists users (
+    user_id text primary key,
+    email text not null unique,
+    name text,
+    picture text,
+    role text not null default 'customer',
+    supabase_user_id text,
+    created_at text
+);
+
+create table if not exists categories (
+    category_id text primary key,
+    name text not null,
+    slug text not null,
+    image text
+);
+
+create table if not exists products (
+    product_id text primary key,
+    name text not null,
+    description text,
+    price real not null,
+    category text,
+    images text not null default '[]',
+    stock integer not null default 0,
+    featured integer not null default 0,
+    created_at text
+);
+create index if not exists products_category_idx on products (category);
+create index if not exists products_featured_idx on products (featured);
+
+create table if not exists carts (
+    id integer primary key autoincrement,
+    user_id text not null unique
+);
+
+create table if not exists cart_items (
+    id integer primary key autoincrement,
+    cart_id integer not null references carts (id) on delete cascade,
+    product_id text not null,
+    quantity integer not null,
+    name text,
+    price real,
+    image text,
+    unique (cart_id, product_id)
+);
+create index if not exists cart_items_product_idx on cart_items (product_id);
+
+create table if not exists wishlists (
+    id integer primary key autoincrement,
+    user_id text not null unique
+);
+
+create table if not exists wishlist_items (
+    id integer primary key autoincrement,
+    wishlist_id integer not null references wishlists (id) on delete cascade,
+    product_id text not null,
+    name text,
+    price real,
+    image text,
+    stock integer,
+    added_at text not null default (strftime('%Y-%m-%dT%H:%M:%fZ', 'now')),
+    unique (wishlist_id, product_id)
+);
+create index if not exists wishlist_items_product_idx on wishlist_items (product_id);
+
+create table if not exists orders (
+    order_id text primary key,
+    user_id text not null,
+    created_at text not null,
+    updated_at text not null,
+    subtotal real not null,
+    shipping real not null,
+    total real not null,
+    status text not null default 'pending',
+    payment_status text not null default 'pending',
+    shipping_address text,
+    tracking_number text,
+    tracking_provider text,
+    change_seq integer not null default 0
+);
+create index if not exists orders_user_created_idx on orders (user_id, created_at desc);
+create index if not exists orders_created_idx on orders (created_at desc, order_id desc);
+create index if not exists orders_change_seq_idx on orders (change_seq);
+
+create table if not exists order_items (
+    id integer primary key autoincrement,
+    order_id text not null references orders (order_id) on delete cascade,
+    product_id text not null,
+    name text not null,
+    price real not null,
+    image text,
+    quantity integer not null
+);
+create index if not exists order_items_order_idx on order_items (order_id);
+"""
+
+FIRST_IMAGE = "coalesce(json_extract(images, '$[0]'), '')"
+
+# Line inserts copy the product snapshot, like the 009 triggers
+INSERT_CART_LINE = f"""
+    insert into cart_items (cart_id, product_id, quantity, name, price, image)
+    select ?, product_id, ?, name, price, {FIRST_IMAGE}
+    from products where product_id = ?
+"""
+
+INSERT_WISHLIST_LINE = f"""
+    insert into wishlist_items (wishlist_id, product_id, name, price, image, stock)
+    select ?, product_id, name, price, {FIRST_IMAGE}, stock
+    from products where product_id = ?
+    on conflict (wishlist_id, product_id) do nothing
+"""
+
+NEXT_CHANGE_SEQ = "(select coalesce(max(change_seq), 0) + 1 from orders)"
+
+ORDER_UPDATE_COLUMNS = ("status", "payment_status", "tracking_number", "tracking_provider", "updated_at")
+
+PRODUCT_COLUMNS = ("product_id", "name", "description", "price", "category", "images", "stock", "featured", "created_at")
+
+
+def _product(row: sqlite3.Row) -> dict:
+    product = dict(row)
+    if "images" in product:
+        product["images"] = json.loads(product["images"] or "[]")
+    if "featured" in product:
+        product["featured"] = bool(product["featured"])
+    return product
+
+
+def _order(row: sqlite3.Row) -> dict:
+    order = dict(row)
+    order["shipping_address"] = json.loads(order["shipping_address"]) if order["shipping_address"] else None
+    return order
+
+
+def _product_params(product: dict) -> dict:
+    params = dict(product)
+    if "images" in params:
+        params["images"] = json.dumps(params["images"] or [])
+    if "featured" in params:
+        params["featured"] = int(bool(params["featured"]))
+    return params
+
+
+class SQLiteRepository(Repository):
+    def __init__(self, path: str):
+        self.path = str(path)
+        self._local = threading.local()
+
+        self.conn.executescript(SCHEMA)
+
+    @property
+    def conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, isolation_level=None, timeout=30)
+            conn.row_factory = sqlite3.Row
+            conn.execute("pragma journal_mode = wal")
+            conn.execute("pragma synchronous = normal")
+            conn.execute("pragma foreign_keys = on")
+            self._local.conn = conn
+        return conn
+
+    @contextmanager
+    def _transaction(self):
+        """Write transaction; takes the write lock up front so read-then-write never deadlocks"""
+        conn = self.conn
+        conn.execute("begin immediate")
+        try:
+            yield conn
+        except BaseException:
+            conn.execute("rollback")
+            raise
+        conn.execute("commit")
+
+    def _ensure_container(self, conn, table: str, user_id: str) -> int:
+        conn.execute(f"insert into {table} (user_id) values (?) on conflict (user_id) do nothing", (user_id,))
+        return conn.execute(f"select id from {table} where user_id = ?", (user_id,)).fetchone()["id"]
+
+    def _container_id(self, conn, table: str, user_id: str) -> Optional[int]:
+        row = conn.execute(f"select id from {table} where user_id = ?", (user_id,)).fetchone()
+        return row["id"] if row else None
+
+    # Users
+
+    def get_user_by_email(self, email: str) -> Optional[dict]:
+        row = self.conn.execute("select * from users where email = ?", (email,)).fetchone()
+        return dict(row) if row else None
+
+    def create_user(self, user: dict) -> Optional[dict]:
+        columns = ", ".join(user)
+        placeholders = ", ".join(f":{column}" for column in user)
+
+        with self._transaction() as conn:
+            conn.execute(f"insert into users ({columns}) values ({placeholders})", user)
+
+        return self.get_user_by_email(user["email"])
+
+    # Categories
+
+    def list_categories(self) -> List[dict]:
+        return [dict(row) for row in self.conn.execute("select * from categories order by rowid")]
+
+    def create_category(self, category: dict) -> dict:
+        with self._transaction() as conn:
+            conn.execute(
+                "insert into categories (category_id, name, slug, image) values (:category_id, :name, :slug, :image)",
+                category
+            )
+            return dict(conn.execute(
+                "select * from categories where category_id = ?", (category["category_id"],)
+            ).fetchone())
+
+    def seed_catalog(self, categories: List[dict], products: List[dict]) -> bool:
+        with self._transaction() as conn:
+            if conn.execute("select 1 from products limit 1").fetchone():
+                return False
+
+            conn.executemany(
+                "insert into categories (category_id, name, slug, image) values (:category_id, :name, :slug, :image)",
+                categories
+            )
+            for product in products:
+                self._insert_product(conn, product)
+
+        return True
+
+    # Products
+
+    def list_products(
+        self,
+        category: Optional[str],
+        featured: Optional[bool],
+        search: Optional[str],
+        limit: int,
+        skip: int
+    ) -> Tuple[List[dict], int]:
+        conditions, params = [], []
+
+        if category:
+            conditions.append("category = ?")
+            params.append(category)
+
+        if featured is not None:
+            conditions.append("featured = ?")
+            params.append(int(featured))
+
+        if search:
+            # LIKE is case-insensitive for ASCII, matching ilike
+            conditions.append("(name like ? or description like ?)")
+            params.extend([f"%{search}%", f"%{search}%"])
+
+        where = f"where {' and '.join(conditions)}" if conditions else ""
+
+        conn = self.conn
+        total = conn.execute(f"select count(*) from products {where}", params).fetchone()[0]
+        rows = conn.execute(
+            f"select * from products {where} order by rowid limit ? offset ?",
+            [*params, limit, skip]
+        ).fetchall()
+
+        return [_product(row) for row in rows], total
+
+    def get_product(self, product_id: str) -> Optional[dict]:
+        row = self.conn.execute("select * from products where product_id = ?", (product_id,)).fetchone()
+        return _product(row) if row else None
+
+    def get_products(self, product_ids: List[str]) -> List[dict]:
+        if not product_ids:
+            return []
+
+        placeholders = ", ".join("?" * len(product_ids))
+        rows = self.conn.execute(
+            f"select product_id, name, price, images, stock from products where product_id in ({placeholders})",
+            product_ids
+        ).fetchall()
+
+        return [_product(row) for row in rows]
+
+    def _insert_product(self, conn, product: dict):
+        params = _product_params({column: product.get(column) for column in PRODUCT_COLUMNS})
+        conn.execute(
+            f"insert into products ({', '.join(PRODUCT_COLUMNS)}) "
+            f"values ({', '.join(f':{column}' for column in PRODUCT_COLUMNS)})",
+            params
+        )
+
+    def create_product(self, product: dict) -> dict:
+        with self._transaction() as conn:
+            self._insert_product(conn, product)
+
+        return self.get_product(product["product_id"])
+
+    def update_product(self, product_id: str, fields: dict) -> Optional[dict]:
+        params = _product_params({k: v for k, v in fields.items() if k in PRODUCT_COLUMNS})
+        assignments = ", ".join(f"{column} = :{column}" for column in params)
+
+        with self._transaction() as conn:
+            row = conn.execute(
+                f"update products set {assignments} where product_id = :product_id returning *",
+                {**params, "product_id": product_id}
+            ).fetchone()
+
+        return _product(row) if row else None
+
+    def delete_product(self, product_id: str) -> bool:
+        with self._transaction() as conn:
+            deleted = conn.execute("delete from products where product_id = ?", (product_id,)).rowcount
+
+        return deleted > 0
+
+    def propagate_product_snapshot(self, product: dict):
+        image = product["images"][0] if product.get("images") else ""
+
+        with self._transaction() as conn:
+            conn.execute(
+                "update cart_items set name = ?, price = ?, image = ? where product_id = ?",
+                (product["name"], product["price"], image, product["product_id"])
+            )
+            conn.execute(
+                "update wishlist_items set name = ?, price = ?, image = ?, stock = ? where product_id = ?",
+                (product["name"], product["price"], image, product["stock"], product["product_id"])
+            )
+
+    def remove_product_lines(self, product_id: str):
+        with self._transaction() as conn:
+            conn.execute("delete from cart_items where product_id = ?", (product_id,))
+            conn.execute("delete from wishlist_items where product_id = ?", (product_id,))
+
+    # Carts
+
+    def cart_lines(self, user_id: str) -> List[dict]:
+        rows = self.conn.execute(
+            """
+            select ci.product_id, ci.quantity, ci.name, ci.price, ci.image
+            from cart_items ci join carts c on c.id = ci.cart_id
+            where c.user_id = ?
+            order by ci.id
+            """,
+            (user_id,)
+        ).fetchall()
+
+        return [dict(row) for row in rows]
+
+    def add_cart_item(self, user_id: str, product_id: str, quantity: int) -> dict:
+        with self._transaction() as conn:
+            product = conn.execute(
+                "select stock, name from products where product_id = ?", (product_id,)
+            ).fetchone()
+
+            if not product:
+                return {"result": "not_found"}
+
+            if product["stock"] < quantity:
+                return {"result": "insufficient_stock", "name": product["name"]}
+
+            cart_id = self._ensure_container(conn, "carts", user_id)
+            line = conn.execute(
+                "select quantity from cart_items where cart_id = ? and product_id = ?", (cart_id, product_id)
+            ).fetchone()
+
+            if line is None:
+                conn.execute(INSERT_CART_LINE, (cart_id, quantity, product_id))
+                new_quantity = quantity
+            elif line["quantity"] + quantity <= product["stock"]:
+                new_quantity = line["quantity"] + quantity
+                conn.execute(
+                    "update cart_items set quantity = ? where cart_id = ? and product_id = ?",
+                    (new_quantity, cart_id, product_id)
+                )
+            else:
+                return {"result": "stock_limit", "name": product["name"], "cart_id": cart_id}
+
+        return {"result": "added", "name": product["name"], "quantity": new_quantity, "cart_id": cart_id}
+
+    def apply_cart_operations(self, user_id: str, operations: List[dict]) -> List[dict]:
+        with self._transaction() as conn:
+            cart_id = self._ensure_container(conn, "carts", user_id)
+
+            for operation in operations:
+                product_id = operation["product_id"]
+                quantity = operation.get("quantity") or 0
+
+                if operation["op"] == "remove":
+                    conn.execute("delete from cart_items where cart_id = ? and product_id = ?", (cart_id, product_id))
+                    continue
+
+                product = conn.execute("select stock from products where product_id = ?", (product_id,)).fetchone()
+                if not product:
+                    raise CartOperationError("not_found", product_id)
+
+                line = conn.execute(
+                    "select quantity from cart_items where cart_id = ? and product_id = ?", (cart_id, product_id)
+                ).fetchone()
+                current = line["quantity"] if line else 0
+                target = current + quantity if operation["op"] == "add" else quantity
+
+                if target <= 0:
+                    conn.execute("delete from cart_items where cart_id = ? and product_id = ?", (cart_id, product_id))
+                    continue
+
+                if target > product["stock"]:
+                    raise CartOperationError("stock_limit", product_id)
+
+                if line:
+                    conn.execute(
+                        "update cart_items set quantity = ? where cart_id = ? and product_id = ?",
+                        (target, cart_id, product_id)
+                    )
+                else:
+                    conn.execute(INSERT_CART_LINE, (cart_id, target, product_id))
+
+            rows = conn.execute(
+                """
+                select ci.product_id, ci.quantity, p.name, p.price, p.images
+                from cart_items ci join products p on p.product_id = ci.product_id
+                where ci.cart_id = ?
+                order by ci.id
+                """,
+                (cart_id,)
+            ).fetchall()
+
+        return [_product(row) for row in rows]
+
+    def set_cart_quantity(self, user_id: str, product_id: str, quantity: int) -> bool:
+        with self._transaction() as conn:
+            cart_id = self._container_id(conn, "carts", user_id)
+
+            if cart_id is None:
+                return False
+
+            if quantity <= 0:
+                conn.execute("delete from cart_items where cart_id = ? and product_id = ?", (cart_id, product_id))
+            else:
+                conn.execute(
+                    "update cart_items set quantity = ? where cart_id = ? and product_id = ?",
+                    (quantity, cart_id, product_id)
+                )
+
+        return True
+
+    def clear_cart(self, user_id: str) -> bool:
+        with self._transaction() as conn:
+            cart_id = self._container_id(conn, "carts", user_id)
+
+            if cart_id is None:
+                return False
+
+            conn.execute("delete from cart_items where cart_id = ?", (cart_id,))
+
+        return True
+
+    def cart_counts(self, user_id: str) -> dict:
+        row = self.conn.execute(
+            """
+            select count(ci.id) as lines, coalesce(sum(ci.quantity), 0) as quantity
+            from carts c join cart_items ci on ci.cart_id = c.id
+            where c.user_id = ?
+            """,
+            (user_id,)
+        ).fetchone()
+
+        return {"lines": row["lines"], "quantity": row["quantity"]}
+
+    def merge_guest_cart(self, user_id: str, items: Dict[str, int]) -> int:
+        merged = 0
+
+        with self._transaction() as conn:
+            cart_id = self._ensure_container(conn, "carts", user_id)
+
+            for product_id, quantity in items.items():
+                if quantity <= 0:
+                    continue
+
+                merged += conn.execute(
+                    f"""
+                    insert into cart_items (cart_id, product_id, quantity, name, price, image)
+                    select ?, product_id, min(?, stock), name, price, {FIRST_IMAGE}
+                    from products where product_id = ? and stock > 0
+                    on conflict (cart_id, product_id) do update
+                        set quantity = max(cart_items.quantity, excluded.quantity)
+                    """,
+                    (cart_id, quantity, product_id)
+                ).rowcount
+
+        return merged
+
+    # Wishlists
+
+    def wishlist_lines(self, user_id: str) -> List[dict]:
+        rows = self.conn.execute(
+            """
+            select wi.product_id, wi.name, wi.price, wi.image, wi.stock, wi.added_at
+            from wishlist_items wi join wishlists w on w.id = wi.wishlist_id
+            where w.user_id = ?
+            order by wi.id
+            """,
+            (user_id,)
+        ).fetchall()
+
+        return [dict(row) for row in rows]
+
+    def wishlist_product_ids(self, user_id: str) -> frozenset:
+        rows = self.conn.execute(
+            """
+            select wi.product_id
+            from wishlist_items wi join wishlists w on w.id = wi.wishlist_id
+            where w.user_id = ?
+            """,
+            (user_id,)
+        ).fetchall()
+
+        return frozenset(row["product_id"] for row in rows)
+
+    def add_wishlist_item(self, user_id: str, product_id: str) -> dict:
+        with self._transaction() as conn:
+            product = conn.execute("select name from products where product_id = ?", (product_id,)).fetchone()
+
+            if not product:
+                return {"result": "not_found"}
+
+            wishlist_id = self._ensure_container(conn, "wishlists", user_id)
+            added = conn.execute(INSERT_WISHLIST_LINE, (wishlist_id, product_id)).rowcount
+
+        return {"result": "added" if added else "exists", "name": product["name"]}
+
+    def remove_wishlist_item(self, user_id: str, product_id: str) -> bool:
+        with self._transaction() as conn:
+            wishlist_id = self._container_id(conn, "wishlists", user_id)
+
+            if wishlist_id is None:
+                return False
+
+            conn.execute(
+                "delete from wishlist_items where wishlist_id = ? and product_id = ?", (wishlist_id, product_id)
+            )
+
+        return True
+
+    def wishlist_count(self, user_id: str) -> int:
+        return len(self.wishlist_product_ids(user_id))
+
+    def _filtered_lines(self, conn, table: str, column: str, container_id: int, product_ids: Optional[List[str]]):
+        query = f"select product_id from {table} where {column} = ?"
+        params = [container_id]
+
+        if product_ids is not None:
+            query += f" and product_id in ({', '.join('?' * len(product_ids))})"
+            params.extend(product_ids)
+
+        return [row["product_id"] for row in conn.execute(query + " order by id", params)]
+
+    def move_wishlist_to_cart(self, user_id: str, product_ids: Optional[List[str]]) -> dict:
+        moved, skipped = [], []
+
+        with self._transaction() as conn:
+            wishlist_id = self._container_id(conn, "wishlists", user_id)
+
+            if wishlist_id is None:
+                return {"moved": [], "skipped": []}
+
+            cart_id = self._ensure_container(conn, "carts", user_id)
+
+            for product_id in self._filtered_lines(conn, "wishlist_items", "wishlist_id", wishlist_id, product_ids):
+                row = conn.execute(
+                    """
+                    select p.stock, ci.quantity
+                    from products p
+                    left join cart_items ci on ci.cart_id = ? and ci.product_id = p.product_id
+                    where p.product_id = ?
+                    """,
+                    (cart_id, product_id)
+                ).fetchone()
+
+                if row is None or (row["quantity"] or 0) + 1 > row["stock"]:
+                    skipped.append(product_id)
+                    continue
+
+                if row["quantity"] is None:
+                    conn.execute(INSERT_CART_LINE, (cart_id, 1, product_id))
+                else:
+                    conn.execute(
+                        "update cart_items set quantity = quantity + 1 where cart_id = ? and product_id = ?",
+                        (cart_id, product_id)
+                    )
+
+                conn.execute(
+                    "delete from wishlist_items where wishlist_id = ? and product_id = ?", (wishlist_id, product_id)
+                )
+                moved.append(product_id)
+
+        return {"moved": moved, "skipped": skipped}
+
+    def move_cart_to_wishlist(self, user_id: str, product_ids: Optional[List[str]]) -> dict:
+        with self._transaction() as conn:
+            cart_id = self._container_id(conn, "carts", user_id)
+
+            if cart_id is None:
+                return {"moved": [], "skipped": []}
+
+            wishlist_id = self._ensure_container(conn, "wishlists", user_id)
+            moved = self._filtered_lines(conn, "cart_items", "cart_id", cart_id, product_ids)
+
+            for product_id in moved:
+                conn.execute("delete from cart_items where cart_id = ? and product_id = ?", (cart_id, product_id))
+                conn.execute(INSERT_WISHLIST_LINE, (wishlist_id, product_id))
+
+        return {"moved": moved, "skipped": []}
+
+    # Orders
+
+    def place_order(self, user_id: str, order_id: str, shipping_address: dict, shipping: float, now: str) -> float:
+        # Pricing, stock decrement, wishlist stock snapshots and cart clear commit together
+        with self._transaction() as conn:
+            cart_id = self._container_id(conn, "carts", user_id)
+
+            lines = conn.execute(
+                f"""
+                select ci.product_id, ci.quantity, p.product_id as live_id, p.name, p.price, p.stock,
+                       {FIRST_IMAGE} as image
+                from cart_items ci left join products p on p.product_id = ci.product_id
+                where ci.cart_id = ?
+                order by ci.id
+                """,
+                (cart_id,)
+            ).fetchall() if cart_id is not None else []
+
+            if not lines:
+                raise EmptyCart()
+
+            for line in lines:
+                if line["live_id"] is None:
+                    raise ProductNotFound(line["product_id"])
+                if line["stock"] < line["quantity"]:
+                    raise InsufficientStock(line["name"])
+
+            subtotal = sum(float(line["price"]) * line["quantity"] for line in lines)
+            total = subtotal + shipping
+
+            conn.execute(
+                f"""
+                insert into orders (order_id, user_id, created_at, updated_at, subtotal, shipping, total,
+                                    status, payment_status, shipping_address, change_seq)
+                values (?, ?, ?, ?, ?, ?, ?, 'pending', 'pending', ?, {NEXT_CHANGE_SEQ})
+                """,
+                (order_id, user_id, now, now, subtotal, shipping, total, json.dumps(shipping_address))
+            )
+            conn.executemany(
+                "insert into order_items (order_id, product_id, name, price, image, quantity) values (?, ?, ?, ?, ?, ?)",
+                [
+                    (order_id, line["product_id"], line["name"], float(line["price"]), line["image"], line["quantity"])
+                    for line in lines
+                ]
+            )
+            conn.executemany(
+                "update products set stock = stock - ? where product_id = ?",
+                [(line["quantity"], line["product_id"]) for line in lines]
+            )
+            conn.executemany(
+                "update wishlist_items set stock = (select stock from products where product_id = ?) where product_id = ?",
+                [(line["product_id"], line["product_id"]) for line in lines]
+            )
+            conn.execute("delete from cart_items where cart_id = ?", (cart_id,))
+
+        return total
+
+    def list_user_orders(self, user_id: str) -> List[dict]:
+        rows = self.conn.execute(
+            "select * from orders where user_id = ? order by created_at desc", (user_id,)
+        ).fetchall()
+
+        return [_order(row) for row in rows]
+
+    def get_order(self, order_id: str) -> Optional[dict]:
+        conn = self.conn
+        row = conn.execute("select * from orders where order_id = ?", (order_id,)).fetchone()
+
+        if not row:
+            return None
+
+        items = conn.execute(
+            "select product_id, name, price, image, quantity from order_items where order_id = ? order by id",
+            (order_id,)
+        ).fetchall()
+
+        return {**_order(row), "items": [dict(item) for item in items]}
+
+    def _with_items(self, conn, rows: List[sqlite3.Row]) -> List[dict]:
+        orders = [{**_order(row), "items": []} for row in rows]
+        if not orders:
+            return orders
+
+        by_id = {order["order_id"]: order for order in orders}
+        items = conn.execute(
+            f"""
+            select order_id, product_id, name, price, image, quantity
+            from order_items where order_id in ({', '.join('?' * len(by_id))})
+            order by id
+            """,
+            list(by_id)
+        ).fetchall()
+
+        for item in items:
+            by_id[item["order_id"]]["items"].append({k: item[k] for k in item.keys() if k != "order_id"})
+
+        return orders
+
+    def page_orders(
+        self,
+        status: Optional[str],
+        payment_status: Optional[str],
+        user_id: Optional[str],
+        created_from: Optional[str],
+        created_before: Optional[str],
+        after: Optional[Tuple[str, str]],
+        limit: int
+    ) -> List[dict]:
+        conditions, params = [], []
+
+        for column, value in (("status", status), ("payment_status", payment_status), ("user_id", user_id)):
+            if value:
+                conditions.append(f"{column} = ?")
+                params.append(value)
+
+        if created_from:
+            conditions.append("created_at >= ?")
+            params.append(created_from)
+
+        if created_before:
+            conditions.append("created_at < ?")
+            params.append(created_before)
+
+        if after:
+            conditions.append("(created_at < ? or (created_at = ? and order_id < ?))")
+            params.extend([after[0], after[0], after[1]])
+
+        where = f"where {' and '.join(conditions)}" if conditions else ""
+
+        conn = self.conn
+        rows = conn.execute(
+            f"select * from orders {where} order by created_at desc, order_id desc limit ?",
+            [*params, limit]
+        ).fetchall()
+
+        return self._with_items(conn, rows)
+
+    def order_changes(self, after_xid: str, after_seq: int, limit: int) -> List[dict]:
+        conn = self.conn
+        rows = conn.execute(
+            "select * from orders where change_seq > ? order by change_seq limit ?", (after_seq, limit)
+        ).fetchall()
+
+        return [{**order, "change_xid": "0"} for order in self._with_items(conn, rows)]
+
+    def update_order(self, order_id: str, fields: dict) -> Optional[dict]:
+        params = {k: v for k, v in fields.items() if k in ORDER_UPDATE_COLUMNS}
+        assignments = ", ".join(f"{column} = :{column}" for column in params)
+
+        with self._transaction() as conn:
+            row = conn.execute(
+                f"update orders set {assignments}, change_seq = {NEXT_CHANGE_SEQ} "
+                "where order_id = :order_id returning *",
+                {**params, "order_id": order_id}
+            ).fetchone()
+
+        return _order(row) if row else None
+
+    def bulk_update_order_tracking(self, updates: List[dict]) -> List[dict]:
+        now = datetime.now(timezone.utc).isoformat()
+        updated = []
+
+        with self._transaction() as conn:
+            # One statement per row, so every order gets its own change_seq
+            for update in updates:
+                row = conn.execute(
+                    f"""
+                    update orders
+                    set status = coalesce(:status, status),
+                        tracking_number = coalesce(:tracking_number, tracking_number),
+                        tracking_provider = coalesce(:tracking_provider, tracking_provider),
+                        updated_at = :now,
+                        change_seq = {NEXT_CHANGE_SEQ}
+                    where order_id = :order_id
+                    returning *
+                    """,
+                    {
+                        "order_id": update["order_id"],
+                        "status": update.get("status"),
+                        "tracking_number": update.get("tracking_number"),
+                        "tracking_provider": update.get("tracking_provider"),
+                        "now": now
+                    }
+                ).fetchone()
+
+                if row:
+                    updated.append(_order(row))
+
+        return updated
+
+    def tracking_orders(self, order_ids: List[str]) -> List[dict]:
+        if not order_ids:
+            return []
+
+        rows = self.conn.execute(
+            f"""
+            select order_id, status, tracking_number, tracking_provider
+            from orders where order_id in ({', '.join('?' * len(order_ids))})
+            """,
+            order_ids
+        ).fetchall()
+
+        return [dict(row) for row in rows]
+
+    def order_stats(self) -> dict:
+        row = self.conn.execute(
+            """
+            select count(*) as total_orders,
+                   coalesce(sum(status = 'pending'), 0) as pending_orders,
+                   coalesce(sum(status = 'confirmed'), 0) as confirmed_orders,
+                   coalesce(sum(status = 'shipped'), 0) as shipped_orders,
+                   coalesce(sum(status = 'delivered'), 0) as delivered_orders,
+                   (select count(*) from products) as total_products,
+                   (select count(*) from users) as total_users,
+                   coalesce(sum(case when payment_status = 'paid' then total end), 0) as total_revenue
+            from orders
+            """
+        ).fetchone()
+
+        return dict(row)
+
+    def close(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
@@ -0,0 +1,577 @@
+"""
+Repository backed by Supabase / PostgREST.
+
+Multi-statement operations (add to cart, PATCH /cart, bulk moves, guest
+cart merge, checkout) run as the SQL functions in ``migrations/``. Cart
+and wishlist ids are resolved once per user and kept in
+``container_id_cache``.
+
+With a ``ReplicaSet``, catalog reads (categories, listings, product
+lookups) go to the read replicas; everything else uses ``client``.
+"""
+
+import logging
+from typing import Any, Dict, List, Optional, Tuple
+
+from postgrest.exceptions import APIError
+
+from services.storage.repository import (
+    CartOperationError,
+    EmptyCart,
+    InsufficientStock,
+    ProductNotFound,
+    Repository,
+)
+
+logger = logging.getLogger(__name__)
+
+ORDER_ITEMS_EMBED = "order_items(product_id, name, price, image, quantity)"
+TRACKING_FIELDS = "order_id, status, tracking_number, tracking_provider"
+
+
+def _flatten_order_items(orders: List[dict]) -> List[dict]:
+    for order in orders:
+        order["items"] = order.pop("order_items", None) or []
+    return orders
+
+
+class SupabaseRepository(Repository):
+    def __init__(self, client, container_id_cache, replicas=None):
+        self.client = client
+        self.container_id_cache = container_id_cache
+        self.replicas = replicas
+
+    @property
+    def reader(self):
+        """Client for catalog reads"""
+        replica = self.replicas.reader() if self.replicas else None
+        return replica or self.client
+
+    # Containers
+
+    def get_container_id(self, table: str, user_id: str, create: bool = True) -> Optional[Any]:
+        """
+        Resolve the user's cart or wishlist id ("carts" / "wishlists").
+        Creation is an upsert on the unique user_id, so concurrent first
+        requests all get the same row in one round trip.
+        Returns None only when create=False and the user has none yet.
+        """
+        key = (table, user_id)
+        cached = self.container_id_cache.get(key)
+        if cached is not None:
+            return cached
+
+        if create:
+            resp = self.client.table(table) \
+                .upsert({"user_id": user_id}, on_conflict="user_id") \
+                .execute()
+        else:
+            resp = self.client.table(table) \
+                .select("id") \
+                .eq("user_id", user_id) \
+                .execute()
+
+        if not resp.data:
+            if create:
+                raise RuntimeError(f"Failed to create {table} row for {user_id}")
+            return None
+
+        container_id = resp.data[0]["id"]
+        self.container_id_cache.set(key, container_id)
+        return container_id
+
+    def get_cart_id(self, user_id: str, create: bool = True):
+        return self.get_container_id("carts", user_id, create)
+
+    def get_wishlist_id(self, user_id: str, create: bool = True):
+        return self.get_container_id("wishlists", user_id, create)
+
+    # Users
+
+    def get_user_by_email(self, email: str) -> Optional[dict]:
+        resp = self.client.table("users") \
+            .select("*") \
+            .eq("email", email) \
+            .execute()
+
+        return resp.data[0] if resp.data else None
+
+    def create_user(self, user: dict) -> Optional[dict]:
+        self.client.table("users").insert(user).execute()
+
+        resp = self.client.table("users") \
+            .select("*") \
+            .eq("user_id", user["user_id"]) \
+            .execute()
+
+        return resp.data[0] if resp.data else None
+
+    # Categories
+
+    def list_categories(self) -> List[dict]:
+        resp = self.reader.table("categories") \
+            .select("*") \
+            .execute()
+
+        return resp.data or []
+
+    def create_category(self, category: dict) -> dict:
+        self.client.table("categories").insert(category).execute()
+
+        created = self.client.table("categories") \
+            .select("*") \
+            .eq("category_id", category["category_id"]) \
+            .single() \
+            .execute()
+
+        return created.data
+
+    def seed_catalog(self, categories: List[dict], products: List[dict]) -> bool:
+        existing = self.client.table("products") \
+            .select("product_id") \
+            .limit(1) \
+            .execute()
+
+        if existing.data:
+            return False
+
+        self.client.table("categories").insert(categories).execute()
+        self.client.table("products").insert(products).execute()
+        return True
+
+    # Products
+
+    def list_products(
+        self,
+        category: Optional[str],
+        featured: Optional[bool],
+        search: Optional[str],
+        limit: int,
+        skip: int
+    ) -> Tuple[List[dict], int]:
+        query = self.reader.table("products").select("*", count="exact")
+
+        if category:
+            query = query.eq("category", category)
+
+        if featured is not None:
+            query = query.eq("featured", featured)
+
+        if search:
+            query = query.or_(
+                f"name.ilike.%{search}%,description.ilike.%{search}%"
+            )
+
+        resp = query.range(skip, skip + limit - 1).execute()
+        return resp.data or [], resp.count or 0
+
+    def get_product(self, product_id: str) -> Optional[dict]:
+        resp = self.reader.table("products") \
+            .select("*") \
+            .eq("product_id", product_id) \
+            .maybe_single() \
+            .execute()
+
+        return resp.data if resp else None
+
+    def get_products(self, product_ids: List[str]) -> List[dict]:
+        resp = self.reader.table("products") \
+            .select("product_id, name, price, images, stock") \
+            .in_("product_id", product_ids) \
+            .execute()
+
+        return resp.data or []
+
+    def create_product(self, product: dict) -> dict:
+        self.client.table("products").insert(product).execute()
+
+        created = self.client.table("products") \
+            .select("*") \
+            .eq("product_id", product["product_id"]) \
+            .single() \
+            .execute()
+
+        return created.data
+
+    def update_product(self, product_id: str, fields: dict) -> Optional[dict]:
+        resp = self.client.table("products") \
+            .update(fields) \
+            .eq("product_id", product_id) \
+            .execute()
+
+        return resp.data[0] if resp.data else None
+
+    def delete_product(self, product_id: str) -> bool:
+        resp = self.client.table("products") \
+            .delete() \
+            .eq("product_id", product_id) \
+            .execute()
+
+        return bool(resp.data)
+
+    def propagate_product_snapshot(self, product: dict):
+        snapshot = {
+            "name": product["name"],
+            "price": product["price"],
+            "image": product["images"][0] if product.get("images") else ""
+        }
+
+        self.client.table("cart_items") \
+            .update(snapshot) \
+            .eq("product_id", product["product_id"]) \
+            .execute()
+
+        self.client.table("wishlist_items") \
+            .update({**snapshot, "stock": product["stock"]}) \
+            .eq("product_id", product["product_id"]) \
+            .execute()
+
+    def remove_product_lines(self, product_id: str):
+        for table in ("cart_items", "wishlist_items"):
+            self.client.table(table) \
+                .delete() \
+                .eq("product_id", product_id) \
+                .execute()
+
+    # Carts
+
+    def cart_lines(self, user_id: str) -> List[dict]:
+        cart_id = self.get_cart_id(user_id)
+
+        # Lines carry their own product snapshot, no join needed
+        resp = self.client.table("cart_items") \
+            .select("product_id, quantity, name, price, image") \
+            .eq("cart_id", cart_id) \
+            .order("id") \
+            .execute()
+
+        return resp.data or []
+
+    def add_cart_item(self, user_id: str, product_id: str, quantity: int) -> dict:
+        # Stock check, cart get-or-create and line upsert in one atomic call
+        resp = self.client.rpc("add_cart_item", {
+            "p_user_id": user_id,
+            "p_product_id": product_id,
+            "p_quantity": quantity
+        }).execute()
+
+        result = resp.data or {}
+        if result.get("cart_id") is not None:
+            self.container_id_cache.set(("carts", user_id), result["cart_id"])
+
+        return result
+
+    def apply_cart_operations(self, user_id: str, operations: List[dict]) -> List[dict]:
+        try:
+            resp = self.client.rpc("apply_cart_operations", {
+                "p_user_id": user_id,
+                "p_operations": operations
+            }).execute()
+        except APIError as e:
+            reason, _, product_id = (e.message or "").partition(":")
+            if reason in ("not_found", "stock_limit"):
+                raise CartOperationError(reason, product_id)
+            raise
+
+        self.container_id_cache.set(("carts", user_id), resp.data["cart_id"])
+        return resp.data["items"]
+
+    def set_cart_quantity(self, user_id: str, product_id: str, quantity: int) -> bool:
+        cart_id = self.get_cart_id(user_id, create=False)
+
+        if cart_id is None:
+            return False
+
+        if quantity <= 0:
+            self.client.table("cart_items") \
+                .delete() \
+                .eq("cart_id", cart_id) \
+                .eq("product_id", product_id) \
+                .execute()
+        else:
+            self.client.table("cart_items") \
+                .update({"quantity": quantity}) \
+                .eq("cart_id", cart_id) \
+                .eq("product_id", product_id) \
+                .execute()
+
+        return True
+
+    def clear_cart(self, user_id: str) -> bool:
+        cart_id = self.get_cart_id(user_id, create=False)
+
+        if cart_id is None:
+            return False
+
+        self.client.table("cart_items") \
+            .delete() \
+            .eq("cart_id", cart_id) \
+            .execute()
+
+        return True
+
+    def cart_counts(self, user_id: str) -> dict:
+        # The cart and its lines come back in one query
+        resp = self.client.table("carts") \
+            .select("id, cart_items(quantity)") \
+            .eq("user_id", user_id) \
+            .execute()
+
+        lines = []
+        for cart in resp.data or []:
+            self.container_id_cache.set(("carts", user_id), cart["id"])
+            lines.extend(cart.get("cart_items") or [])
+
+        return {
+            "lines": len(lines),
+            "quantity": sum(line["quantity"] for line in lines)
+        }
+
+    def merge_guest_cart(self, user_id: str, items: Dict[str, int]) -> int:
+        resp = self.client.rpc("merge_guest_cart", {
+            "p_user_id": user_id,
+            "p_items": [
+                {"product_id": product_id, "quantity": quantity}
+                for product_id, quantity in items.items()
+            ]
+        }).execute()
+
+        self.container_id_cache.set(("carts", user_id), resp.data["cart_id"])
+        return resp.data.get("merged", 0)
+
+    # Wishlists
+
+    def wishlist_lines(self, user_id: str) -> List[dict]:
+        wishlist_id = self.get_wishlist_id(user_id)
+
+        resp = self.client.table("wishlist_items") \
+            .select("product_id, name, price, image, stock, added_at") \
+            .eq("wishlist_id", wishlist_id) \
+            .execute()
+
+        return resp.data or []
+
+    def wishlist_product_ids(self, user_id: str) -> frozenset:
+        # The wishlist and its items come back in one embedded query
+        resp = self.client.table("wishlists") \
+            .select("id, wishlist_items(product_id)") \
+            .eq("user_id", user_id) \
+            .execute()
+
+        return frozenset(
+            item["product_id"]
+            for wishlist in resp.data or []
+            for item in wishlist.get("wishlist_items") or []
+        )
+
+    def add_wishlist_item(self, user_id: str, product_id: str) -> dict:
+        product_resp = self.client.table("products") \
+            .select("product_id, name") \
+            .eq("product_id", product_id) \
+            .execute()
+
+        if not product_resp.data:
+            return {"result": "not_found"}
+
+        name = product_resp.data[0]["name"]
+        wishlist_id = self.get_wishlist_id(user_id)
+
+        exists_resp = self.client.table("wishlist_items") \
+            .select("id") \
+            .eq("wishlist_id", wishlist_id) \
+            .eq("product_id", product_id) \
+            .execute()
+
+        if exists_resp.data:
+            return {"result": "exists", "name": name}
+
+        self.client.table("wishlist_items").insert({
+            "wishlist_id": wishlist_id,
+            "product_id": product_id
+        }).execute()
+
+        return {"result": "added", "name": name}
+
+    def remove_wishlist_item(self, user_id: str, product_id: str) -> bool:
+        wishlist_id = self.get_wishlist_id(user_id, create=False)
+
+        if wishlist_id is None:
+            return False
+
+        self.client.table("wishlist_items") \
+            .delete() \
+            .eq("wishlist_id", wishlist_id) \
+            .eq("product_id", product_id) \
+            .execute()
+
+        return True
+
+    def wishlist_count(self, user_id: str) -> int:
+        wishlist_id = self.get_wishlist_id(user_id, create=False)
+
+        if wishlist_id is None:
+            return 0
+
+        resp = self.client.table("wishlist_items") \
+            .select("id", count="exact") \
+            .eq("wishlist_id", wishlist_id) \
+            .execute()
+
+        return resp.count or 0
+
+    def _move(self, function: str, user_id: str, product_ids: Optional[List[str]]) -> dict:
+        resp = self.client.rpc(function, {
+            "p_user_id": user_id,
+            "p_product_ids": product_ids
+        }).execute()
+
+        return resp.data or {"moved": [], "skipped": []}
+
+    def move_wishlist_to_cart(self, user_id: str, product_ids: Optional[List[str]]) -> dict:
+        return self._move("move_wishlist_to_cart", user_id, product_ids)
+
+    def move_cart_to_wishlist(self, user_id: str, product_ids: Optional[List[str]]) -> dict:
+        return self._move("move_cart_to_wishlist", user_id, product_ids)
+
+    # Orders
+
+    def place_order(self, user_id: str, order_id: str, shipping_address: dict, shipping: float, now: str) -> float:
+        # Stock check, order + items insert, stock decrement and cart clear in one transaction
+        try:
+            resp = self.client.rpc("place_order", {
+                "p_user_id": user_id,
+                "p_order_id": order_id,
+                "p_shipping_address": shipping_address,
+                "p_shipping": shipping,
+                "p_now": now
+            }).execute()
+        except APIError as e:
+            reason, _, detail = (e.message or "").partition(":")
+            if reason == "empty_cart":
+                raise EmptyCart()
+            if reason == "not_found":
+                raise ProductNotFound(detail)
+            if reason == "insufficient_stock":
+                raise InsufficientStock(detail)
+            raise
+
+        return float(resp.data)
+
+    def list_user_orders(self, user_id: str) -> List[dict]:
+        resp = self.client.table("orders") \
+            .select("*") \
+            .eq("user_id", user_id) \
+            .order("created_at", desc=True) \
+            .execute()
+
+        return resp.data or []
+
+    def get_order(self, order_id: str) -> Optional[dict]:
+        order_resp = self.client.table("orders") \
+            .select("*") \
+            .eq("order_id", order_id) \
+            .execute()
+
+        if not order_resp.data:
+            return None
+
+        items = self.client.table("order_items") \
+            .select("product_id, name, price, image, quantity") \
+            .eq("order_id", order_id) \
+            .execute()
+
+        return {**order_resp.data[0], "items": items.data or []}
+
+    def page_orders(
+        self,
+        status: Optional[str],
+        payment_status: Optional[str],
+        user_id: Optional[str],
+        created_from: Optional[str],
+        created_before: Optional[str],
+        after: Optional[Tuple[str, str]],
+        limit: int
+    ) -> List[dict]:
+        # Items are embedded, so one request returns a whole page
+        query = self.client.table("orders") \
+            .select(f"*, {ORDER_ITEMS_EMBED}") \
+            .order("created_at", desc=True) \
+            .order("order_id", desc=True)
+
+        if status:
+            query = query.eq("status", status)
+
+        if payment_status:
+            query = query.eq("payment_status", payment_status)
+
+        if user_id:
+            query = query.eq("user_id", user_id)
+
+        if created_from:
+            query = query.gte("created_at", created_from)
+
+        if created_before:
+            query = query.lt("created_at", created_before)
+
+        if after:
+            created_at, order_id = after
+            query = query.or_(
+                f'created_at.lt."{created_at}",'
+                f'and(created_at.eq."{created_at}",order_id.lt."{order_id}")'
+            )
+
+        resp = query.limit(limit).execute()
+        return _flatten_order_items(resp.data or [])
+
+    def order_changes(self, after_xid: str, after_seq: int, limit: int) -> List[dict]:
+        # Visibility rules live in the order_changes function (migrations/012)
+        resp = self.client.rpc("order_changes", {
+            "p_after_xid": after_xid,
+            "p_after_seq": after_seq,
+            "p_limit": limit
+        }).execute()
+
+        return _flatten_order_items(resp.data or [])
+
+    def update_order(self, order_id: str, fields: dict) -> Optional[dict]:
+        resp = self.client.table("orders") \
+            .update(fields) \
+            .eq("order_id", order_id) \
+            .execute()
+
+        return resp.data[0] if resp.data else None
+
+    def bulk_update_order_tracking(self, updates: List[dict]) -> List[dict]:
+        resp = self.client.rpc("bulk_update_order_tracking", {"updates": updates}).execute()
+        return resp.data or []
+
+    def tracking_orders(self, order_ids: List[str]) -> List[dict]:
+        resp = self.client.table("orders") \
+            .select(TRACKING_FIELDS) \
+            .in_("order_id", order_ids) \
+            .execute()
+
+        return resp.data or []
+
+    def order_stats(self) -> dict:
+        def count(table: str, column: str = "id", **filters) -> int:
+            query = self.client.table(table).select(column, count="exact")
+            for field, value in filters.items():
+                query = query.eq(field, value)
+            return query.execute().count or 0
+
+        revenue_resp = self.client.table("orders") \
+            .select("total") \
+            .eq("payment_status", "paid") \
+            .execute()
+
+        return {
+            "total_orders": count("orders"),
+            "pending_orders": count("orders", status="pending"),
+            "confirmed_orders": count("orders", status="confirmed"),
+            "shipped_orders": count("orders", status="shipped"),
+            "delivered_orders": count("orders", status="delivered"),
+            "total_products": count("products"),
+            "total_users": count("users", "user_id"),
+            "total_revenue": sum(float(order["total"]) for order in revenue_resp.data or [])
+        }
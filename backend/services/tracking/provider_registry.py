@@ -0,0 +1,53 @@
+"""
+Carrier tracking URL templates.
+
+Providers are loaded from a JSON file keyed by provider id::
+
+    {"delhivery": {"name": "Delhivery", "url": "https://.../{tracking_number}"}}
+
+Adding a carrier only needs a new entry in the file.
+"""
+
+import json
+import logging
+from pathlib import Path
+from typing import Dict, List, Optional
+from urllib.parse import quote
+
+logger = logging.getLogger(__name__)
+
+
+class TrackingProviderRegistry:
+    def __init__(self, providers: Optional[Dict[str, dict]] = None):
+        self._providers = {
+            key.lower(): value for key, value in (providers or {}).items()
+        }
+
+    @classmethod
+    def load(cls, path: Path) -> "TrackingProviderRegistry":
+        try:
+            with open(path) as f:
+                providers = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.error(f"Failed to load tracking providers from {path}: {e}")
+            providers = {}
+
+        registry = cls(providers)
+        logger.info(f"Loaded {len(registry._providers)} tracking providers")
+        return registry
+
+    def providers(self) -> List[dict]:
+        return [
+            {"id": key, "name": value.get("name", key)}
+            for key, value in sorted(self._providers.items())
+        ]
+
+    def tracking_url(self, provider: Optional[str], tracking_number: Optional[str]) -> Optional[str]:
+        if not provider or not tracking_number:
+            return None
+
+        entry = self._providers.get(provider.lower())
+        if not entry or not entry.get("url"):
+            return None
+
+        return entry["url"].format(tracking_number=quote(tracking_number, safe=""))
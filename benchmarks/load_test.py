@@ -0,0 +1,364 @@
+"""
+Load-test driver for the backend, built from the ECommerceAPITester flows.
+
+Virtual users replay one workload in a loop for a fixed duration:
+
+    browse    categories, product listing/search, featured, product detail
+    cart      add to cart, view cart, update quantity, session summary
+    checkout  add to cart, place order, list orders, order detail
+    admin     order list, order search page, dashboard stats
+
+Per endpoint (method + route template) it reports request count, errors,
+throughput and p50/p95/p99/max latency, and writes everything as JSON so
+runs can be diffed over time.
+
+By default the PostgREST stand-in and the backend (uvicorn, separate
+process) are started locally; pass --base-url to drive a running server.
+``--storage sqlite`` runs the storefront against a fresh SQLite file seeded
+with the same catalog (admin reporting still goes through the stand-in).
+``--replicas N`` adds read-only stand-in endpoints for catalog reads.
+
+    python -m benchmarks.load_test --latency-ms 5 --concurrency 20 --duration 30
+    python -m benchmarks.load_test --storage sqlite --output test_reports/benchmarks/sqlite.json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import statistics
+import subprocess
+import sys
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime, timezone
+from pathlib import Path
+
+import httpx
+
+from .postgrest_standin import ADMIN_EMAIL, ReplicaStore, StandinStore, bench_token, create_standin_app, seed_store
+
+REPO_DIR = Path(__file__).resolve().parents[1]
+BACKEND_DIR = REPO_DIR / "backend"
+
+SHIPPING_ADDRESS = {
+    "full_name": "Bench User",
+    "phone": "9876543210",
+    "address_line1": "1 Load Test Road",
+    "city": "Mumbai",
+    "state": "Maharashtra",
+    "pincode": "400001",
+}
+
+
+class Recorder:
+    def __init__(self):
+        self.latencies = defaultdict(list)
+        self.errors = defaultdict(int)
+
+    async def call(self, client: httpx.AsyncClient, label: str, method: str, url: str, **kwargs):
+        start = time.perf_counter()
+        try:
+            response = await client.request(method, url, **kwargs)
+            failed = response.status_code >= 400
+        except httpx.HTTPError:
+            response, failed = None, True
+        self.latencies[label].append(time.perf_counter() - start)
+        if failed:
+            self.errors[label] += 1
+        return response
+
+    def report(self, elapsed: float) -> dict:
+        endpoints = {}
+        for label, samples in sorted(self.latencies.items()):
+            ordered = sorted(samples)
+            endpoints[label] = {
+                "requests": len(ordered),
+                "errors": self.errors[label],
+                "throughput_rps": round(len(ordered) / elapsed, 2),
+                "mean_ms": round(statistics.fmean(ordered) * 1000, 2),
+                "p50_ms": round(percentile(ordered, 0.50) * 1000, 2),
+                "p95_ms": round(percentile(ordered, 0.95) * 1000, 2),
+                "p99_ms": round(percentile(ordered, 0.99) * 1000, 2),
+                "max_ms": round(ordered[-1] * 1000, 2),
+            }
+
+        total = sum(len(samples) for samples in self.latencies.values())
+        return {
+            "duration_s": round(elapsed, 2),
+            "requests": total,
+            "errors": sum(self.errors.values()),
+            "throughput_rps": round(total / elapsed, 2),
+            "endpoints": endpoints,
+        }
+
+
+def percentile(ordered, q):
+    """Nearest-rank percentile of an already sorted list"""
+    index = max(0, min(len(ordered) - 1, int(round(q * len(ordered) + 0.5)) - 1))
+    return ordered[index]
+
+
+# ---------------------------------------------------------------------------
+# Workloads
+# ---------------------------------------------------------------------------
+
+async def browse(client, recorder, context, user):
+    await recorder.call(client, "GET /categories", "GET", "/categories")
+    await recorder.call(client, "GET /products", "GET", "/products", params={"limit": 20, "skip": random.randrange(0, 100)})
+    await recorder.call(client, "GET /products?featured", "GET", "/products", params={"featured": "true", "limit": 6})
+    await recorder.call(client, "GET /products?search", "GET", "/products", params={"search": f"Product {random.randrange(50)}"})
+    await recorder.call(client, "GET /products/{id}", "GET", f"/products/{random.choice(context['product_ids'])}")
+
+
+async def cart(client, recorder, context, user):
+    product_id = random.choice(context["product_ids"])
+    await recorder.call(client, "POST /cart/add", "POST", "/cart/add", json={"product_id": product_id, "quantity": 1}, headers=user)
+    await recorder.call(client, "GET /cart", "GET", "/cart", headers=user)
+    await recorder.call(client, "PUT /cart/update", "PUT", "/cart/update", json={"product_id": product_id, "quantity": 2}, headers=user)
+    await recorder.call(client, "GET /session/summary", "GET", "/session/summary", headers=user)
+
+
+async def checkout(client, recorder, context, user):
+    for product_id in random.sample(context["product_ids"], 3):
+        await recorder.call(client, "POST /cart/add", "POST", "/cart/add", json={"product_id": product_id, "quantity": 1}, headers=user)
+
+    response = await recorder.call(client, "POST /orders", "POST", "/orders", json={"shipping_address": SHIPPING_ADDRESS}, headers=user)
+    await recorder.call(client, "GET /orders", "GET", "/orders", headers=user)
+
+    if response is not None and response.status_code == 200:
+        order_id = response.json()["order_id"]
+        await recorder.call(client, "GET /orders/{id}", "GET", f"/orders/{order_id}", headers=user)
+
+
+async def admin(client, recorder, context, user):
+    headers = context["admin_headers"]
+    await recorder.call(client, "GET /admin/orders", "GET", "/admin/orders", params={"status": "pending"}, headers=headers)
+    await recorder.call(client, "GET /admin/orders/search", "GET", "/admin/orders/search", params={"limit": 50}, headers=headers)
+    await recorder.call(client, "GET /admin/stats", "GET", "/admin/stats", headers=headers)
+
+
+WORKLOADS = {"browse": browse, "cart": cart, "checkout": checkout, "admin": admin}
+
+
+async def run_workload(name: str, api_url: str, context: dict, concurrency: int, duration: float) -> dict:
+    recorder = Recorder()
+    workload = WORKLOADS[name]
+    deadline = time.perf_counter() + duration
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    async with httpx.AsyncClient(base_url=api_url, timeout=30, limits=limits) as client:
+        async def virtual_user(index: int):
+            user = {"Authorization": f"Bearer {bench_token(f'{name}-vu{index}@bench.local')}"}
+            while time.perf_counter() < deadline:
+                await workload(client, recorder, context, user)
+
+        start = time.perf_counter()
+        await asyncio.gather(*[virtual_user(index) for index in range(concurrency)])
+        return recorder.report(time.perf_counter() - start)
+
+
+# ---------------------------------------------------------------------------
+# Local environment
+# ---------------------------------------------------------------------------
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def serve_in_thread(app):
+    import uvicorn
+
+    port = free_port()
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+    return server, f"http://127.0.0.1:{port}"
+
+
+def start_standin(latency_ms: float, jitter_ms: float, products: int, replicas: int = 0, replica_lag_ms: float = 0.0):
+    """Primary stand-in plus optional read-only replicas; returns (servers, primary_url, replica_urls)"""
+    store = StandinStore()
+    seed_store(store, products=products)
+
+    server, url = serve_in_thread(create_standin_app(store, latency_ms, jitter_ms))
+    servers, replica_urls = [server], []
+
+    for _ in range(replicas):
+        replica = ReplicaStore(store, replica_lag_ms / 1000)
+        server, replica_url = serve_in_thread(create_standin_app(replica, latency_ms, jitter_ms, read_only=True))
+        servers.append(server)
+        replica_urls.append(replica_url)
+
+    return servers, url, replica_urls
+
+
+def seed_sqlite(path: Path, products: int):
+    """Fresh SQLite store with the stand-in catalog and admin account"""
+    sys.path.insert(0, str(BACKEND_DIR))
+    from services.storage.sqlite_repository import SQLiteRepository
+
+    for suffix in ("", "-wal", "-shm"):
+        Path(f"{path}{suffix}").unlink(missing_ok=True)
+    path.parent.mkdir(parents=True, exist_ok=True)
+
+    store = StandinStore()
+    seed_store(store, products=products)
+
+    repo = SQLiteRepository(path)
+    repo.seed_catalog(store.tables["categories"], store.tables["products"])
+    for user in store.tables["users"]:
+        repo.create_user(user)
+    repo.close()
+
+
+def start_backend(supabase_url: str, workers: int, log_path: Path, sqlite_path: Path = None, replica_urls=()):
+    port = free_port()
+    env = {
+        **os.environ,
+        "SUPABASE_URL": supabase_url,
+        "SUPABASE_SERVICE_ROLE_KEY": "bench-service-role-key",
+        "ENVIRONMENT": "development",
+    }
+    if sqlite_path:
+        env.update(STORAGE_BACKEND="sqlite", SQLITE_PATH=str(sqlite_path))
+    if replica_urls:
+        env["SUPABASE_REPLICA_URLS"] = ",".join(replica_urls)
+    log_path.parent.mkdir(parents=True, exist_ok=True)
+    # A snapshot left by an earlier run would warm this one with other data
+    snapshot_path = log_path.parent / "catalog.snapshot"
+    snapshot_path.unlink(missing_ok=True)
+    env.setdefault("CATALOG_SNAPSHOT_PATH", str(snapshot_path))
+    log_file = open(log_path, "w")
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "server:app", "--host", "127.0.0.1", "--port", str(port),
+         "--workers", str(workers), "--log-level", "warning"],
+        cwd=BACKEND_DIR,
+        env=env,
+        stdout=log_file,
+        stderr=subprocess.STDOUT,
+    )
+
+    base_url = f"http://127.0.0.1:{port}"
+    for _ in range(200):
+        try:
+            if httpx.get(f"{base_url}/health", timeout=1).status_code == 200:
+                return process, base_url
+        except httpx.HTTPError:
+            pass
+        if process.poll() is not None:
+            raise RuntimeError(f"Backend exited during startup, see {log_path}")
+        time.sleep(0.1)
+
+    process.terminate()
+    raise RuntimeError("Backend did not become healthy")
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "HEAD"], cwd=REPO_DIR, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def print_summary(results: dict):
+    for name, result in results["workloads"].items():
+        print(f"\n{name}: {result['requests']} requests, {result['errors']} errors, {result['throughput_rps']} req/s")
+        print(f"  {'endpoint':<28}{'req':>7}{'err':>6}{'rps':>9}{'p50':>9}{'p95':>9}{'p99':>9}{'max':>9}")
+        for label, stats in result["endpoints"].items():
+            print(
+                f"  {label:<28}{stats['requests']:>7}{stats['errors']:>6}{stats['throughput_rps']:>9}"
+                f"{stats['p50_ms']:>9}{stats['p95_ms']:>9}{stats['p99_ms']:>9}{stats['max_ms']:>9}"
+            )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Backend load test")
+    parser.add_argument("--base-url", help="Drive an already running backend instead of starting one")
+    parser.add_argument("--workloads", default=",".join(WORKLOADS), help="Comma separated: " + ", ".join(WORKLOADS))
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--duration", type=float, default=15.0, help="Seconds per workload")
+    parser.add_argument("--latency-ms", type=float, default=5.0, help="Stand-in latency per database call")
+    parser.add_argument("--jitter-ms", type=float, default=2.0)
+    parser.add_argument("--products", type=int, default=200)
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn workers for the local backend")
+    parser.add_argument("--storage", choices=["supabase", "sqlite"], default="supabase",
+                        help="Storefront storage backend for the local backend")
+    parser.add_argument("--replicas", type=int, default=0, help="Read-only stand-in replicas for catalog reads")
+    parser.add_argument("--replica-lag-ms", type=float, default=0.0)
+    parser.add_argument("--output", default=str(REPO_DIR / "test_reports" / "benchmarks" / "load_test.json"))
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    random.seed(args.seed)
+    workloads = [name.strip() for name in args.workloads.split(",") if name.strip()]
+    unknown = set(workloads) - set(WORKLOADS)
+    if unknown:
+        parser.error(f"Unknown workloads: {', '.join(sorted(unknown))}")
+
+    output = Path(args.output)
+    standins, backend = [], None
+    base_url = args.base_url
+    if not base_url:
+        standins, supabase_url, replica_urls = start_standin(
+            args.latency_ms, args.jitter_ms, args.products, args.replicas, args.replica_lag_ms
+        )
+        sqlite_path = None
+        if args.storage == "sqlite":
+            sqlite_path = output.with_suffix(".sqlite3")
+            seed_sqlite(sqlite_path, args.products)
+        backend, base_url = start_backend(
+            supabase_url, args.workers, output.with_suffix(".backend.log"), sqlite_path, replica_urls
+        )
+
+    try:
+        api_url = f"{base_url.rstrip('/')}/api"
+        products = httpx.get(f"{api_url}/products", params={"limit": 100}, timeout=30).json()["products"]
+        context = {
+            "product_ids": [product["product_id"] for product in products],
+            "admin_headers": {"Authorization": f"Bearer {bench_token(ADMIN_EMAIL)}"},
+        }
+
+        results = {
+            "meta": {
+                "timestamp": datetime.now(timezone.utc).isoformat(),
+                "git_commit": git_commit(),
+                "base_url": args.base_url or "local stand-in",
+                "concurrency": args.concurrency,
+                "duration_s": args.duration,
+                "latency_ms": None if args.base_url else args.latency_ms,
+                "jitter_ms": None if args.base_url else args.jitter_ms,
+                "workers": None if args.base_url else args.workers,
+                "storage": None if args.base_url else args.storage,
+                "replicas": None if args.base_url else args.replicas,
+                "products": None if args.base_url else args.products,
+            },
+            "workloads": {},
+        }
+
+        for name in workloads:
+            results["workloads"][name] = asyncio.run(
+                run_workload(name, api_url, context, args.concurrency, args.duration)
+            )
+    finally:
+        if backend:
+            backend.terminate()
+            backend.wait(timeout=10)
+        for standin in standins:
+            standin.should_exit = True
+
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(results, indent=2))
+
+    print_summary(results)
+    print(f"\nResults written to {output}")
+
+
+if __name__ == "__main__":
+    main()
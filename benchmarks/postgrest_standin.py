@@ -0,0 +1,398 @@
+"""
+Local PostgREST + GoTrue stand-in for benchmarking without a Supabase project.
+
+Serves ``/rest/v1`` and ``/auth/v1/user`` over HTTP on top of the in-memory
+``FakeSupabase`` store from the test suite, so the backend runs unchanged
+with ``SUPABASE_URL`` pointed here and still pays for real HTTP round trips.
+Every request can be delayed by a fixed latency plus random jitter to
+approximate the network distance to a hosted database.
+
+Only the PostgREST subset the backend uses is implemented: select with
+embedded resources, insert/upsert/update/delete, comparison and ``in``
+filters, ``or``, ``order``, ``limit``/``offset``, ``count=exact`` and the
+``add_cart_item`` and ``place_order`` functions.
+
+``ReplicaStore`` plus ``read_only=True`` gives a second endpoint that serves
+a copy of the primary refreshed every ``lag_seconds`` and rejects writes,
+for exercising read-replica routing.
+
+    python -m benchmarks.postgrest_standin --port 54321 --latency-ms 5
+    python -m benchmarks.postgrest_standin --port 54321 --replica-port 54322 --replica-lag-ms 500
+"""
+
+import argparse
+import asyncio
+import copy
+import random
+import time
+import uuid
+from datetime import datetime, timezone
+
+import jwt
+from postgrest.exceptions import APIError
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse, Response
+from starlette.routing import Route
+
+from tests.fake_supabase import FakeSupabase, _split_top_level
+
+ADMIN_EMAIL = "admin@bench.local"
+
+# Columns copied from products onto cart/wishlist lines (migration 009)
+SNAPSHOT_COLUMNS = {
+    "cart_items": ("name", "price", "image"),
+    "wishlist_items": ("name", "price", "image", "stock"),
+}
+
+RESERVED_PARAMS = {"select", "order", "limit", "offset", "on_conflict", "columns", "or"}
+
+
+class StandinStore(FakeSupabase):
+    """FakeSupabase plus the triggers and functions the backend relies on"""
+
+    def __init__(self):
+        super().__init__()
+        self.functions["add_cart_item"] = add_cart_item
+        self.functions["place_order"] = place_order
+
+    def write_row(self, table, row, on_conflict=None):
+        if table in SNAPSHOT_COLUMNS and "product_id" in row:
+            product = self.find("products", product_id=row["product_id"])
+            if product:
+                snapshot = {**product, "image": (product.get("images") or [""])[0]}
+                for column in SNAPSHOT_COLUMNS[table]:
+                    row.setdefault(column, snapshot.get(column))
+        return super().write_row(table, row, on_conflict)
+
+    def find(self, table, **match):
+        for row in self.tables.get(table, []):
+            if all(str(row.get(key)) == str(value) for key, value in match.items()):
+                return row
+        return None
+
+
+class ReplicaStore(StandinStore):
+    """Read-only copy of a primary store that catches up every ``lag_seconds``"""
+
+    def __init__(self, primary: StandinStore, lag_seconds: float = 0.0):
+        super().__init__()
+        self.primary = primary
+        self.lag_seconds = lag_seconds
+        self.synced_at = 0.0
+        self.sync()
+
+    def sync(self):
+        # Without lag the replica simply shares the primary's rows
+        self.tables = copy.deepcopy(self.primary.tables) if self.lag_seconds else self.primary.tables
+        self.synced_at = time.monotonic()
+
+    def catch_up(self):
+        if self.lag_seconds and time.monotonic() - self.synced_at >= self.lag_seconds:
+            self.sync()
+
+
+def add_cart_item(store: StandinStore, p_user_id, p_product_id, p_quantity):
+    product = store.find("products", product_id=p_product_id)
+    if not product:
+        return {"result": "not_found"}
+    if product["stock"] < p_quantity:
+        return {"result": "insufficient_stock", "name": product["name"]}
+
+    cart = store.write_row("carts", {"user_id": p_user_id}, on_conflict="user_id")
+    line = store.find("cart_items", cart_id=cart["id"], product_id=p_product_id)
+
+    if line is None:
+        line = store.write_row("cart_items", {"cart_id": cart["id"], "product_id": p_product_id, "quantity": p_quantity})
+    elif line["quantity"] + p_quantity > product["stock"]:
+        return {"result": "stock_limit", "name": product["name"], "cart_id": cart["id"]}
+    else:
+        line["quantity"] += p_quantity
+
+    return {"result": "added", "name": product["name"], "quantity": line["quantity"], "cart_id": cart["id"]}
+
+
+def _raise(message: str):
+    raise APIError({"code": "P0001", "message": message, "details": None, "hint": None})
+
+
+def place_order(store: StandinStore, p_user_id, p_order_id, p_shipping_address, p_shipping, p_now):
+    """Mirror of migrations/013: validate everything, then write"""
+    cart = store.find("carts", user_id=p_user_id)
+    lines = [line for line in store.tables.get("cart_items", []) if cart and line["cart_id"] == cart["id"]]
+    if not lines:
+        _raise("empty_cart")
+
+    products = []
+    for line in lines:
+        product = store.find("products", product_id=line["product_id"])
+        if not product:
+            _raise(f"not_found:{line['product_id']}")
+        products.append(product)
+
+    for line, product in zip(lines, products):
+        if product["stock"] < line["quantity"]:
+            _raise(f"insufficient_stock:{product['name']}")
+
+    subtotal = sum(float(product["price"]) * line["quantity"] for line, product in zip(lines, products))
+    store.write_row("orders", {
+        "order_id": p_order_id,
+        "user_id": p_user_id,
+        "created_at": p_now,
+        "updated_at": p_now,
+        "subtotal": subtotal,
+        "shipping": p_shipping,
+        "total": subtotal + p_shipping,
+        "status": "pending",
+        "payment_status": "pending",
+        "shipping_address": p_shipping_address,
+    })
+
+    for line, product in zip(lines, products):
+        store.write_row("order_items", {
+            "order_id": p_order_id,
+            "product_id": product["product_id"],
+            "name": product["name"],
+            "price": float(product["price"]),
+            "image": (product.get("images") or [""])[0],
+            "quantity": line["quantity"],
+        })
+        product["stock"] -= line["quantity"]
+        for wished in store.tables.get("wishlist_items", []):
+            if wished["product_id"] == product["product_id"]:
+                wished["stock"] = product["stock"]
+
+    store.tables["cart_items"] = [line for line in store.tables["cart_items"] if line["cart_id"] != cart["id"]]
+    return subtotal + p_shipping
+
+
+def seed_store(store: StandinStore, products: int = 200, categories: int = 8):
+    """Catalog plus an admin account, enough for every benchmark workload"""
+    now = datetime.now(timezone.utc).isoformat()
+
+    store.tables["categories"] = [
+        {
+            "category_id": f"cat_{index}",
+            "name": f"Category {index}",
+            "slug": f"category-{index}",
+            "image": None,
+            "description": None,
+        }
+        for index in range(categories)
+    ]
+
+    store.tables["products"] = [
+        {
+            "id": index + 1,
+            "product_id": f"prod_{index:05d}",
+            "name": f"Product {index}",
+            "description": f"Benchmark product {index}",
+            "price": float(100 + index % 900),
+            "category": f"category-{index % categories}",
+            "images": [f"https://img.example.com/{index}.jpg"],
+            "stock": 10 ** 9,
+            "featured": index % 10 == 0,
+            "created_at": now,
+        }
+        for index in range(products)
+    ]
+
+    store.tables["users"] = [{
+        "user_id": "user_bench_admin",
+        "email": ADMIN_EMAIL,
+        "name": "Bench Admin",
+        "role": "admin",
+        "created_at": now,
+    }]
+
+
+# ---------------------------------------------------------------------------
+# PostgREST request translation
+# ---------------------------------------------------------------------------
+
+def _unquote(value: str) -> str:
+    return value[1:-1] if len(value) >= 2 and value[0] == value[-1] == '"' else value
+
+
+def _apply_filter(query, column: str, expression: str):
+    op, _, value = expression.partition(".")
+    negate = op == "not"
+    if negate:
+        op, _, value = value.partition(".")
+
+    before = len(query.filters)
+    if op == "in":
+        query.in_(column, [_unquote(part) for part in _split_top_level(value.strip("()"))])
+    elif op in ("like", "ilike"):
+        query.ilike(column, _unquote(value).replace("*", "%"))
+    elif op == "is":
+        query.is_(column, None if value == "null" else value == "true")
+    else:
+        getattr(query, op)(column, _unquote(value))
+
+    if negate:
+        check = query.filters.pop(before)
+        query.filters.append(lambda row: not check(row))
+
+
+def _build_query(store: StandinStore, table: str, request: Request):
+    query = store.table(table)
+    params = request.query_params
+    prefer = request.headers.get("prefer", "")
+
+    query.select(params.get("select", "*"), count="exact" if "count=exact" in prefer else None)
+
+    for column, expression in params.multi_items():
+        if column == "or":
+            query.or_(expression[1:-1])
+        elif column not in RESERVED_PARAMS and "." not in column:
+            _apply_filter(query, column, expression)
+
+    for term in filter(None, params.get("order", "").split(",")):
+        column, _, direction = term.partition(".")
+        query.order(column, desc=direction.startswith("desc"))
+
+    offset = int(params.get("offset", 0))
+    if "limit" in params:
+        query.range(offset, offset + int(params["limit"]) - 1)
+    elif offset:
+        query.range(offset, 10 ** 9)
+
+    return query
+
+
+def _error(status: int, message: str, code: str = "PGRST000") -> JSONResponse:
+    return JSONResponse({"code": code, "message": message, "details": None, "hint": None}, status_code=status)
+
+
+def create_standin_app(
+    store: StandinStore,
+    latency_ms: float = 0.0,
+    jitter_ms: float = 0.0,
+    read_only: bool = False
+) -> Starlette:
+    async def delay():
+        if latency_ms or jitter_ms:
+            await asyncio.sleep((latency_ms + random.uniform(0, jitter_ms)) / 1000)
+        if isinstance(store, ReplicaStore):
+            store.catch_up()
+
+    def read_only_error():
+        return _error(405, "cannot execute statement in a read-only transaction", "25006")
+
+    async def table_endpoint(request: Request):
+        await delay()
+        if read_only and request.method not in ("GET", "HEAD"):
+            return read_only_error()
+
+        table = request.path_params["table"]
+        prefer = request.headers.get("prefer", "")
+        query = _build_query(store, table, request)
+
+        if request.method in ("POST", "PATCH"):
+            payload = await request.json()
+            if request.method == "PATCH":
+                query.update(payload)
+            elif "resolution=merge-duplicates" in prefer:
+                query.upsert(payload, on_conflict=request.query_params.get("on_conflict"))
+            else:
+                query.insert(payload)
+        elif request.method == "DELETE":
+            query.delete()
+
+        if request.headers.get("accept") == "application/vnd.pgrst.object+json":
+            query.single()
+            result = query.execute()
+            if result.data is None:
+                return _error(406, "JSON object requested, multiple (or no) rows returned", "PGRST116")
+        else:
+            result = query.execute()
+
+        if "return=minimal" in prefer:
+            return Response(status_code=201 if request.method == "POST" else 204)
+
+        headers = {}
+        if result.count is not None:
+            shown = len(result.data) if isinstance(result.data, list) else 1
+            headers["Content-Range"] = f"0-{max(shown - 1, 0)}/{result.count}"
+
+        status = 201 if request.method == "POST" else 200
+        if request.method == "HEAD":
+            return Response(status_code=200, headers=headers)
+        return JSONResponse(result.data, status_code=status, headers=headers)
+
+    async def rpc_endpoint(request: Request):
+        await delay()
+        if read_only:
+            return read_only_error()
+
+        function = store.functions.get(request.path_params["function"])
+        if function is None:
+            return _error(404, f"Could not find the function {request.path_params['function']}", "PGRST202")
+        params = await request.json() if request.method == "POST" else dict(request.query_params)
+        try:
+            return JSONResponse(function(store, **params))
+        except APIError as e:
+            return _error(400, e.message, e.code)
+
+    async def auth_user(request: Request):
+        """Accepts any bearer JWT that carries email and sub claims"""
+        await delay()
+        token = request.headers.get("authorization", "").removeprefix("Bearer ")
+        try:
+            claims = jwt.decode(token, options={"verify_signature": False})
+        except jwt.DecodeError:
+            return JSONResponse({"message": "invalid JWT"}, status_code=401)
+        return JSONResponse({"id": claims.get("sub"), "email": claims.get("email"), "aud": "authenticated"})
+
+    methods = ["GET", "HEAD", "POST", "PATCH", "DELETE"]
+    return Starlette(routes=[
+        Route("/rest/v1/rpc/{function}", rpc_endpoint, methods=["GET", "POST"]),
+        Route("/rest/v1/{table}", table_endpoint, methods=methods),
+        Route("/auth/v1/user", auth_user, methods=["GET"]),
+    ])
+
+
+def bench_token(email: str) -> str:
+    """Unsigned-in-practice JWT the stand-in (and the backend's decode) accepts"""
+    return jwt.encode(
+        {"email": email, "sub": str(uuid.uuid5(uuid.NAMESPACE_DNS, email)), "user_metadata": {"name": email}},
+        "bench-secret",
+        algorithm="HS256"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=54321)
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--jitter-ms", type=float, default=0.0)
+    parser.add_argument("--products", type=int, default=200)
+    parser.add_argument("--replica-port", type=int, help="Also serve a read-only replica on this port")
+    parser.add_argument("--replica-lag-ms", type=float, default=0.0)
+    args = parser.parse_args()
+
+    import uvicorn
+
+    store = StandinStore()
+    seed_store(store, products=args.products)
+
+    apps = {args.port: create_standin_app(store, args.latency_ms, args.jitter_ms)}
+    if args.replica_port:
+        replica = ReplicaStore(store, args.replica_lag_ms / 1000)
+        apps[args.replica_port] = create_standin_app(replica, args.latency_ms, args.jitter_ms, read_only=True)
+
+    servers = [
+        uvicorn.Server(uvicorn.Config(app, host=args.host, port=port, log_level="warning"))
+        for port, app in apps.items()
+    ]
+
+    async def serve():
+        await asyncio.gather(*(server.serve() for server in servers))
+
+    asyncio.run(serve())
+
+
+if __name__ == "__main__":
+    main()
@@ -259,7 +259,14 @@ const CartProvider = ({ children }) => {
 
   const fetchCart = useCallback(async () => {
     if (!user) {
-      setCart({ items: [], subtotal: 0, shipping: 0, total: 0 });
+      // Guest cart lives in a signed cookie and is merged on login
+      try {
+        const res = await axios.get(`${API}/guest-cart`, { withCredentials: true });
+        setCart(res.data);
+      } catch (err) {
+        logger.error('Fetch guest cart failed:', err.response?.data || err.message);
+        setCart({ items: [], subtotal: 0, shipping: 0, total: 0 });
+      }
       return;
     }
 
@@ -336,13 +343,14 @@ const CartProvider = ({ children }) => {
         return;
       }
 
-      const res = await axios.get(`${API}/wishlist/count`, {
+      // Badge counts come from the cached session summary
+      const res = await axios.get(`${API}/session/summary`, {
         headers,
         withCredentials: true
       });
       
-      logger.log('Wishlist count:', res.data.count);
-      setWishlistCount(res.data.count);
+      logger.log('Wishlist count:', res.data.wishlist.count);
+      setWishlistCount(res.data.wishlist.count);
     } catch (err) {
       logger.error('Wishlist count failed:', err.response?.data || err.message);
     }
@@ -358,8 +366,20 @@ const CartProvider = ({ children }) => {
 
   const addToCart = async (productId, quantity = 1) => {
     if (!user) {
-      toast.error('Please login first');
-      return false;
+      try {
+        const res = await axios.post(
+          `${API}/guest-cart/add`,
+          { product_id: productId, quantity },
+          { withCredentials: true }
+        );
+        setCart(res.data);
+        toast.success('Added to cart');
+        return true;
+      } catch (err) {
+        logger.error('Add to guest cart error:', err.response?.data || err.message);
+        toast.error(err.response?.data?.detail || 'Failed to add to cart');
+        return false;
+      }
     }
 
     try {
@@ -392,6 +412,22 @@ const CartProvider = ({ children }) => {
   };
 
   const updateQuantity = async (productId, quantity) => {
+    if (!user) {
+      try {
+        const res = await axios.put(
+          `${API}/guest-cart/update`,
+          { product_id: productId, quantity },
+          { withCredentials: true }
+        );
+        setCart(res.data);
+        toast.success('Cart updated');
+      } catch (err) {
+        logger.error('Update guest cart error:', err);
+        toast.error(err.response?.data?.detail || 'Failed to update cart');
+      }
+      return;
+    }
+
     try {
       const headers = await getAuthHeaders();
       
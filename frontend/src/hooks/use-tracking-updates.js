@@ -0,0 +1,57 @@
+import { useEffect, useRef } from 'react';
+import axios from 'axios';
+import { API } from '../App';
+
+const TERMINAL_STATUSES = ['delivered', 'cancelled'];
+const DEFAULT_POLL_SECONDS = 60;
+
+// Live tracking for one order. Uses the Server-Sent Events stream while the
+// server keeps it open; once the server closes it as idle (or refuses it
+// because the worker is full) the stream is closed for good and the
+// tracking endpoint is polled instead.
+export function useTrackingUpdates(orderId, onUpdate) {
+  const onUpdateRef = useRef(onUpdate);
+  onUpdateRef.current = onUpdate;
+
+  useEffect(() => {
+    let source = null;
+    let timer = null;
+    let stopped = false;
+
+    const poll = (seconds) => {
+      timer = setTimeout(async () => {
+        try {
+          const response = await axios.get(`${API}/tracking/${orderId}`);
+          if (stopped) return;
+          onUpdateRef.current(response.data);
+          if (TERMINAL_STATUSES.includes(response.data.status)) return;
+        } catch (error) {
+          console.error('Failed to poll tracking:', error);
+        }
+        if (!stopped) poll(seconds);
+      }, seconds * 1000);
+    };
+
+    if (typeof EventSource === 'undefined') {
+      poll(DEFAULT_POLL_SECONDS);
+    } else {
+      source = new EventSource(`${API}/tracking/${orderId}/events`);
+      source.addEventListener('tracking', (event) => onUpdateRef.current(JSON.parse(event.data)));
+      source.addEventListener('end', () => source.close());
+      source.addEventListener('idle', (event) => {
+        source.close();
+        poll(JSON.parse(event.data).poll_seconds || DEFAULT_POLL_SECONDS);
+      });
+      source.onerror = () => {
+        // Refused (503) streams are not retried by the browser
+        if (source.readyState === EventSource.CLOSED) poll(DEFAULT_POLL_SECONDS);
+      };
+    }
+
+    return () => {
+      stopped = true;
+      clearTimeout(timer);
+      if (source) source.close();
+    };
+  }, [orderId]);
+}
@@ -5,6 +5,7 @@ import { Header } from '../components/Header';
 import { Footer } from '../components/Footer';
 import { Button } from '../components/ui/button';
 import { useAuth, API } from '../App';
+import { useTrackingUpdates } from '../hooks/use-tracking-updates';
 import { ChevronLeft, Truck, MapPin, ExternalLink } from 'lucide-react';
 
 export const OrderDetailPage = () => {
@@ -27,6 +28,11 @@ export const OrderDetailPage = () => {
     fetchOrder();
   }, [orderId, getAuthHeaders]);
 
+  // Live status updates pushed by the server (polled once the stream goes idle)
+  useTrackingUpdates(orderId, ({ status, tracking_number, tracking_provider }) => {
+    setOrder((prev) => prev && { ...prev, status, tracking_number, tracking_provider });
+  });
+
   const formatPrice = (price) => new Intl.NumberFormat('en-IN', { style: 'currency', currency: 'INR', minimumFractionDigits: 0 }).format(price);
   const formatDate = (dateString) => new Date(dateString).toLocaleDateString('en-IN', { day: 'numeric', month: 'long', year: 'numeric', hour: '2-digit', minute: '2-digit' });
   const getStatusColor = (status) => {
@@ -5,6 +5,7 @@ import { Header } from '../components/Header';
 import { Footer } from '../components/Footer';
 import { Button } from '../components/ui/button';
 import { API } from '../App';
+import { useTrackingUpdates } from '../hooks/use-tracking-updates';
 import { ChevronLeft, Truck, Package, CheckCircle, Clock, ExternalLink } from 'lucide-react';
 
 export const TrackingPage = () => {
@@ -27,6 +28,12 @@ export const TrackingPage = () => {
     fetchTracking();
   }, [orderId]);
 
+  // Live status updates pushed by the server (polled once the stream goes idle)
+  useTrackingUpdates(orderId, (update) => {
+    setTracking(update);
+    setLoading(false);
+  });
+
   const getStatusSteps = () => {
     const steps = [
       { id: 'pending', label: 'Order Placed', icon: Package },
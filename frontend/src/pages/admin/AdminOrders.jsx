@@ -34,11 +34,15 @@ import {
   Eye
 } from 'lucide-react';
 
+const ORDERS_PAGE_SIZE = 50;
+
 export const AdminOrders = () => {
   const { getAuthHeaders } = useAuth();
   const [searchParams, setSearchParams] = useSearchParams();
   const [orders, setOrders] = useState([]);
+  const [nextCursor, setNextCursor] = useState(null);
   const [loading, setLoading] = useState(true);
+  const [loadingMore, setLoadingMore] = useState(false);
   const [statusFilter, setStatusFilter] = useState(searchParams.get('status') || '');
   const [searchQuery, setSearchQuery] = useState('');
   const [selectedOrders, setSelectedOrders] = useState([]);
@@ -50,15 +54,20 @@ export const AdminOrders = () => {
   const [dialogOpen, setDialogOpen] = useState(false);
   const [detailsDialogOpen, setDetailsDialogOpen] = useState(false);
 
-  const fetchOrders = async () => {
+  // Pages through /admin/orders/search; without a cursor the list restarts at the newest order
+  const fetchOrders = async (cursor = null) => {
     try {
       const headers = await getAuthHeaders(); // FIX: Added await
-      const params = statusFilter ? `?status=${statusFilter}` : '';
-      const response = await axios.get(`${API}/admin/orders${params}`, {
+      const params = new URLSearchParams({ limit: ORDERS_PAGE_SIZE });
+      if (statusFilter) params.set('status', statusFilter);
+      if (cursor) params.set('cursor', cursor);
+
+      const response = await axios.get(`${API}/admin/orders/search?${params.toString()}`, {
         withCredentials: true,
         headers
       });
-      setOrders(response.data);
+      setOrders(current => cursor ? [...current, ...response.data.orders] : response.data.orders);
+      setNextCursor(response.data.next_cursor);
     } catch (error) {
       console.error('Failed to fetch orders:', error);
       toast.error('Failed to load orders');
@@ -67,6 +76,12 @@ export const AdminOrders = () => {
     }
   };
 
+  const loadMoreOrders = async () => {
+    setLoadingMore(true);
+    await fetchOrders(nextCursor);
+    setLoadingMore(false);
+  };
+
   useEffect(() => {
     fetchOrders();
   }, [statusFilter]);
@@ -578,6 +593,20 @@ export const AdminOrders = () => {
                   </div>
                 </div>
               ))}
+
+              {nextCursor && (
+                <div className="flex justify-center pt-2">
+                  <Button
+                    variant="outline"
+                    className="rounded-full"
+                    onClick={loadMoreOrders}
+                    disabled={loadingMore}
+                    data-testid="load-more-orders-btn"
+                  >
+                    {loadingMore ? 'Loading...' : 'Load more orders'}
+                  </Button>
+                </div>
+              )}
             </div>
           )}
         </div>
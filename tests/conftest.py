@@ -0,0 +1,99 @@
+"""
+Runs the FastAPI app in process against ``FakeSupabase``.
+
+The fake is wrapped in the same ``InstrumentedClient`` the server uses, so
+every ``execute()`` is recorded with its query shape and tests can assert
+how many database round trips a handler makes.
+"""
+
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+BACKEND_DIR = Path(__file__).resolve().parents[1] / "backend"
+sys.path.insert(0, str(BACKEND_DIR))
+
+os.environ.setdefault("SUPABASE_URL", "http://localhost:54321")
+os.environ.setdefault("SUPABASE_SERVICE_ROLE_KEY", "test-service-role-key")
+
+import server  # noqa: E402
+from fastapi.testclient import TestClient  # noqa: E402
+from services.observability.instrumented_client import InstrumentedClient  # noqa: E402
+from services.storage.supabase_repository import SupabaseRepository  # noqa: E402
+
+from .fake_supabase import FakeSupabase  # noqa: E402
+
+CUSTOMER = {"user_id": "user_customer", "email": "customer@example.com", "name": "Customer", "role": "customer"}
+ADMIN = {"user_id": "user_admin", "email": "admin@example.com", "name": "Admin", "role": "admin"}
+
+USERS_BY_TOKEN = {"customer-token": CUSTOMER, "admin-token": ADMIN}
+
+
+class QueryRecorder:
+    def __init__(self):
+        self.events = []
+
+    def __call__(self, event):
+        self.events.append(event)
+
+    @property
+    def count(self) -> int:
+        return len(self.events)
+
+    def reset(self):
+        self.events.clear()
+
+    def describe(self) -> str:
+        return "\n".join(f"  {event.shape}" for event in self.events)
+
+
+@pytest.fixture(autouse=True)
+def clear_catalog_caches():
+    server.featured_products_cache.clear()
+    server.categories_cache.clear()
+
+
+@pytest.fixture
+def db():
+    return FakeSupabase()
+
+
+@pytest.fixture
+def queries(db, monkeypatch):
+    recorder = QueryRecorder()
+    instrumented = InstrumentedClient(db, [recorder], record_shapes=True)
+    monkeypatch.setattr(server, "supabase", instrumented)
+    monkeypatch.setattr(server, "storage", SupabaseRepository(instrumented, server.container_id_cache))
+
+    for cache in (
+        server.container_id_cache,
+        server.wishlist_products_cache,
+        server.session_summary_cache,
+        server.product_cache,
+        server.tracking_cache,
+    ):
+        cache.clear()
+
+    return recorder
+
+
+@pytest.fixture
+def client(queries, monkeypatch):
+    async def current_user(request):
+        token = request.headers.get("Authorization", "").removeprefix("Bearer ")
+        return USERS_BY_TOKEN.get(token)
+
+    monkeypatch.setattr(server, "get_current_user", current_user)
+    return TestClient(server.app)
+
+
+@pytest.fixture
+def customer_headers():
+    return {"Authorization": "Bearer customer-token"}
+
+
+@pytest.fixture
+def admin_headers():
+    return {"Authorization": "Bearer admin-token"}
@@ -0,0 +1,279 @@
+"""
+In-memory stand-in for the supabase-py client, covering the subset of the
+PostgREST query builder the backend uses: select (with one level of
+embedded resources), insert, upsert, update, delete, the usual filters,
+or_() expressions, ordering, ranges, count="exact" and rpc().
+"""
+
+import copy
+import itertools
+import re
+from datetime import datetime, timezone
+
+# (parent table, embedded table) -> (parent column, child column)
+FOREIGN_KEYS = {
+    ("orders", "order_items"): ("order_id", "order_id"),
+    ("carts", "cart_items"): ("id", "cart_id"),
+    ("wishlists", "wishlist_items"): ("id", "wishlist_id"),
+}
+
+
+class FakeResponse:
+    def __init__(self, data, count=None):
+        self.data = data
+        self.count = count
+
+
+def _split_top_level(text):
+    parts, depth, current, quoted = [], 0, "", False
+    for char in text:
+        if char == '"':
+            quoted = not quoted
+        if not quoted and char == "(":
+            depth += 1
+        if not quoted and char == ")":
+            depth -= 1
+        if char == "," and depth == 0 and not quoted:
+            parts.append(current.strip())
+            current = ""
+        else:
+            current += char
+    if current.strip():
+        parts.append(current.strip())
+    return parts
+
+
+def _coerce(actual, expected):
+    """Filter values sent over HTTP arrive as text; compare them like Postgres would"""
+    if isinstance(expected, str) and not isinstance(actual, str):
+        if isinstance(actual, bool):
+            return str(actual).lower(), expected.lower()
+        if isinstance(actual, (int, float)):
+            try:
+                return actual, float(expected)
+            except ValueError:
+                pass
+    return str(actual), str(expected)
+
+
+def _compare(op, actual, expected):
+    if op == "is":
+        return actual is None if expected in ("null", None) else actual == expected
+    if actual is None:
+        return False
+    if op == "in":
+        return any(_compare("eq", actual, value) for value in expected)
+    actual, expected = _coerce(actual, expected)
+    return {
+        "eq": actual == expected,
+        "neq": actual != expected,
+        "lt": actual < expected,
+        "lte": actual <= expected,
+        "gt": actual > expected,
+        "gte": actual >= expected,
+    }[op]
+
+
+def _ilike(actual, pattern):
+    regex = "^" + re.escape(pattern).replace("%", ".*") + "$"
+    return bool(re.match(regex, str(actual or ""), re.IGNORECASE))
+
+
+def _parse_expression(expression):
+    """PostgREST logic tree such as ``a.eq.1,and(b.lt."x",c.gt.2)``"""
+    match = re.match(r"^(and|or)\((.*)\)$", expression)
+    if match:
+        kind, inner = match.groups()
+        checks = [_parse_expression(part) for part in _split_top_level(inner)]
+        combine = any if kind == "or" else all
+        return lambda row: combine(check(row) for check in checks)
+
+    column, op, value = expression.split(".", 2)
+    value = value.strip('"')
+    if op == "ilike":
+        return lambda row: _ilike(row.get(column), value)
+    if op == "in":
+        value = value.strip("()").split(",")
+    return lambda row: _compare(op, row.get(column), value)
+
+
+class FakeQuery:
+    def __init__(self, db, table):
+        self.db = db
+        self.table = table
+        self.operation = "select"
+        self.columns = "*"
+        self.payload = None
+        self.on_conflict = None
+        self.count = None
+        self.filters = []
+        self.ordering = []
+        self.window = None
+        self.single_row = False
+
+    # Operations
+
+    def select(self, columns="*", count=None):
+        self.columns, self.count = columns, count
+        return self
+
+    def insert(self, payload, **kwargs):
+        self.operation, self.payload = "insert", payload
+        return self
+
+    def upsert(self, payload, on_conflict=None, **kwargs):
+        self.operation, self.payload, self.on_conflict = "upsert", payload, on_conflict
+        return self
+
+    def update(self, payload):
+        self.operation, self.payload = "update", payload
+        return self
+
+    def delete(self):
+        self.operation = "delete"
+        return self
+
+    # Filters and modifiers
+
+    def _filter(self, check):
+        self.filters.append(check)
+        return self
+
+    def eq(self, column, value):
+        return self._filter(lambda row: _compare("eq", row.get(column), value))
+
+    def neq(self, column, value):
+        return self._filter(lambda row: _compare("neq", row.get(column), value))
+
+    def lt(self, column, value):
+        return self._filter(lambda row: _compare("lt", row.get(column), value))
+
+    def lte(self, column, value):
+        return self._filter(lambda row: _compare("lte", row.get(column), value))
+
+    def gt(self, column, value):
+        return self._filter(lambda row: _compare("gt", row.get(column), value))
+
+    def gte(self, column, value):
+        return self._filter(lambda row: _compare("gte", row.get(column), value))
+
+    def in_(self, column, values):
+        return self._filter(lambda row: _compare("in", row.get(column), list(values)))
+
+    def is_(self, column, value):
+        return self._filter(lambda row: _compare("is", row.get(column), value))
+
+    def ilike(self, column, pattern):
+        return self._filter(lambda row: _ilike(row.get(column), pattern))
+
+    def or_(self, expression):
+        return self._filter(_parse_expression(f"or({expression})"))
+
+    def order(self, column, desc=False, **kwargs):
+        self.ordering.append((column, desc))
+        return self
+
+    def limit(self, size):
+        self.window = (0, size - 1)
+        return self
+
+    def range(self, start, end):
+        self.window = (start, end)
+        return self
+
+    def single(self):
+        self.single_row = True
+        return self
+
+    maybe_single = single
+
+    # Execution
+
+    def execute(self):
+        rows = self.db.tables.setdefault(self.table, [])
+
+        if self.operation in ("insert", "upsert"):
+            return FakeResponse([self.db.write_row(self.table, row, self.on_conflict) for row in
+                                 (self.payload if isinstance(self.payload, list) else [self.payload])])
+
+        matched = [row for row in rows if all(check(row) for check in self.filters)]
+
+        if self.operation == "update":
+            for row in matched:
+                row.update(copy.deepcopy(self.payload))
+            return FakeResponse(copy.deepcopy(matched))
+
+        if self.operation == "delete":
+            self.db.tables[self.table] = [row for row in rows if not any(row is hit for hit in matched)]
+            return FakeResponse(copy.deepcopy(matched))
+
+        for column, desc in reversed(self.ordering):
+            matched = sorted(matched, key=lambda row: (row.get(column) is None, row.get(column)), reverse=desc)
+
+        count = len(matched) if self.count else None
+        if self.window:
+            matched = matched[self.window[0]:self.window[1] + 1]
+
+        data = [self.db.project(self.table, row, self.columns) for row in matched]
+        if self.single_row:
+            return FakeResponse(data[0] if data else None, count)
+        return FakeResponse(data, count)
+
+
+class FakeRPC:
+    def __init__(self, db, name, params):
+        self.db = db
+        self.name = name
+        self.params = params
+
+    def execute(self):
+        return FakeResponse(self.db.functions[self.name](self.db, **self.params))
+
+
+class FakeSupabase:
+    def __init__(self):
+        self.tables = {}
+        self.functions = {}
+        self.ids = itertools.count(1)
+
+    def table(self, name):
+        return FakeQuery(self, name)
+
+    from_ = table
+
+    def rpc(self, name, params=None, **kwargs):
+        return FakeRPC(self, name, params or {})
+
+    def write_row(self, table, row, on_conflict=None):
+        rows = self.tables.setdefault(table, [])
+        row = copy.deepcopy(row)
+
+        if on_conflict:
+            keys = [key.strip() for key in on_conflict.split(",")]
+            for existing in rows:
+                if all(str(existing.get(key)) == str(row.get(key)) for key in keys):
+                    existing.update(row)
+                    return copy.deepcopy(existing)
+
+        row.setdefault("id", next(self.ids))
+        row.setdefault("created_at", datetime.now(timezone.utc).isoformat())
+        rows.append(row)
+        return copy.deepcopy(row)
+
+    def project(self, table, row, columns):
+        out = {}
+        for column in _split_top_level(columns):
+            embedded = re.match(r"^(\w+)(?:!\w+)?\((.*)\)$", column)
+            if column == "*":
+                out.update(copy.deepcopy(row))
+            elif embedded:
+                child, child_columns = embedded.groups()
+                parent_key, child_key = FOREIGN_KEYS[(table, child)]
+                out[child] = [
+                    self.project(child, child_row, child_columns)
+                    for child_row in self.tables.get(child, [])
+                    if str(child_row.get(child_key)) == str(row.get(parent_key))
+                ]
+            else:
+                out[column] = copy.deepcopy(row.get(column))
+        return out
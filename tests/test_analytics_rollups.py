@@ -0,0 +1,155 @@
+"""
+Daily sales rollups: rebuilds, the database-backed dirty-day refresh and
+backfills, against the fake client.
+"""
+
+from datetime import date
+
+import pytest
+
+import server
+from services.analytics.analytics_service import (
+    DIRTY_DAYS_TABLE,
+    ORDERS_ROLLUP_TABLE,
+    PRODUCTS_ROLLUP_TABLE,
+    AnalyticsService,
+)
+
+
+def replace_analytics_rollups(db, p_start, p_end, p_orders, p_products, p_dirty=None):
+    """Python mirror of the RPC in migration 011"""
+    marks = db.tables.setdefault(DIRTY_DAYS_TABLE, [])
+    current = {(mark["day"], mark["token"]) for mark in marks}
+
+    if p_dirty is not None and any((mark["day"], mark["token"]) not in current for mark in p_dirty):
+        return 0
+
+    for table, rows in ((ORDERS_ROLLUP_TABLE, p_orders), (PRODUCTS_ROLLUP_TABLE, p_products)):
+        kept = [row for row in db.tables.get(table, []) if not p_start <= row["day"] <= p_end]
+        db.tables[table] = kept + [dict(row) for row in rows]
+
+    if p_dirty is not None:
+        cleared = {(mark["day"], mark["token"]) for mark in p_dirty}
+        db.tables[DIRTY_DAYS_TABLE] = [mark for mark in marks if (mark["day"], mark["token"]) not in cleared]
+
+    return (date.fromisoformat(p_end) - date.fromisoformat(p_start)).days + 1
+
+
+def add_order(db, order_id, created_at, status="delivered", lines=(("prod_1", 100.0, 2),)):
+    """Insert an order and its items, marking its day dirty like the triggers do"""
+    db.tables.setdefault("orders", []).append({
+        "order_id": order_id,
+        "status": status,
+        "payment_status": "paid",
+        "total": sum(price * quantity for _, price, quantity in lines),
+        "created_at": created_at,
+    })
+    for product_id, price, quantity in lines:
+        db.tables.setdefault("order_items", []).append({
+            "order_id": order_id,
+            "product_id": product_id,
+            "name": product_id.title(),
+            "price": price,
+            "quantity": quantity,
+        })
+    mark(db, created_at[:10])
+
+
+def mark(db, day):
+    db.tokens = getattr(db, "tokens", 0) + 1
+    marks = [m for m in db.tables.setdefault(DIRTY_DAYS_TABLE, []) if m["day"] != day]
+    db.tables[DIRTY_DAYS_TABLE] = marks + [{"day": day, "token": db.tokens}]
+
+
+@pytest.fixture
+def service(db):
+    db.functions["replace_analytics_rollups"] = replace_analytics_rollups
+    return AnalyticsService(db)
+
+
+def test_rebuild_rolls_orders_up_per_day(db, service):
+    add_order(db, "order_1", "2024-03-01T10:00:00+00:00")
+    add_order(db, "order_2", "2024-03-01T23:30:00+00:00", lines=(("prod_1", 100.0, 1), ("prod_2", 50.0, 4)))
+    add_order(db, "order_3", "2024-03-02T08:00:00+00:00", status="cancelled")
+
+    assert service.rebuild_range(date(2024, 3, 1), date(2024, 3, 2)) == 2
+
+    summary = service.summary(date(2024, 3, 1), date(2024, 3, 2))
+    assert summary["orders"] == 2
+    assert summary["cancelled_orders"] == 1
+    assert summary["revenue"] == 500.0
+    assert summary["items"] == 7
+
+    # Cancelled orders never count towards product revenue
+    top = service.top_products(date(2024, 3, 1), date(2024, 3, 2))
+    assert [(product["product_id"], product["quantity"]) for product in top] == [("prod_2", 4), ("prod_1", 3)]
+
+
+def test_rebuild_only_replaces_days_in_range(db, service):
+    add_order(db, "order_1", "2024-03-01T10:00:00+00:00")
+    add_order(db, "order_2", "2024-03-02T10:00:00+00:00")
+    service.rebuild_range(date(2024, 3, 1), date(2024, 3, 2))
+
+    db.tables["orders"] = [order for order in db.tables["orders"] if order["order_id"] != "order_2"]
+    service.rebuild_range(date(2024, 3, 2), date(2024, 3, 2))
+
+    series = service.revenue_series(date(2024, 3, 1), date(2024, 3, 2))
+    assert [day["orders"] for day in series] == [1, 0]
+
+
+def test_refresh_rebuilds_dirty_days_and_clears_them(db, service):
+    add_order(db, "order_1", "2024-03-01T10:00:00+00:00")
+    add_order(db, "order_2", "2024-03-05T10:00:00+00:00")
+
+    assert service.refresh_dirty() == 2
+    assert db.tables[DIRTY_DAYS_TABLE] == []
+    assert service.summary(date(2024, 3, 1), date(2024, 3, 5))["orders"] == 2
+
+    assert service.refresh_dirty() == 0
+
+
+def test_day_marked_again_mid_rebuild_stays_dirty(db, service):
+    add_order(db, "order_1", "2024-03-01T10:00:00+00:00")
+    fetch_items = service._fetch_items
+
+    def write_during_rebuild(order_ids):
+        # Another worker places an order after this rebuild read the orders
+        add_order(db, "order_2", "2024-03-01T12:00:00+00:00")
+        return fetch_items(order_ids)
+
+    service._fetch_items = write_during_rebuild
+    assert service.refresh_dirty() == 0
+    assert [m["day"] for m in db.tables[DIRTY_DAYS_TABLE]] == ["2024-03-01"]
+
+    service._fetch_items = fetch_items
+    assert service.refresh_dirty() == 1
+    assert service.summary(date(2024, 3, 1), date(2024, 3, 1))["orders"] == 2
+
+
+def test_backfill_covers_the_range_in_chunks(db, service):
+    for day in range(1, 11):
+        add_order(db, f"order_{day}", f"2024-03-{day:02d}T10:00:00+00:00")
+
+    chunks = list(service.backfill(date(2024, 3, 1), date(2024, 3, 10), chunk_days=4))
+
+    assert chunks == [
+        (date(2024, 3, 1), date(2024, 3, 4)),
+        (date(2024, 3, 5), date(2024, 3, 8)),
+        (date(2024, 3, 9), date(2024, 3, 10)),
+    ]
+    assert service.summary(date(2024, 3, 1), date(2024, 3, 10))["orders"] == 10
+
+
+def test_analytics_reads_do_not_rebuild(client, db, queries, admin_headers, monkeypatch):
+    monkeypatch.setattr(server, "analytics", AnalyticsService(server.supabase))
+    add_order(db, "order_1", "2024-03-01T10:00:00+00:00")
+
+    response = client.get(
+        "/api/admin/analytics/summary",
+        params={"start": "2024-03-01", "end": "2024-03-01"},
+        headers=admin_headers
+    )
+
+    assert response.status_code == 200
+    # Only the rollup read; no rebuild inside the request
+    assert queries.count == 1, queries.describe()
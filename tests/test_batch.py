@@ -0,0 +1,117 @@
+"""
+POST /api/batch: sub-requests run concurrently in process, share the
+batch's user, and fail one by one (404, timeout, non-batchable route)
+without failing the batch.
+"""
+
+import time
+
+import pytest
+
+import server
+
+from .conftest import USERS_BY_TOKEN
+
+
+@pytest.fixture
+def auth_lookups(monkeypatch):
+    """Counts real token lookups; sub-requests must reuse the batch's user"""
+    lookups = []
+
+    async def current_user(request):
+        if "batch_user" in request.scope:
+            return request.scope["batch_user"]
+        token = request.headers.get("Authorization", "").removeprefix("Bearer ")
+        lookups.append(token)
+        return USERS_BY_TOKEN.get(token)
+
+    monkeypatch.setattr(server, "get_current_user", current_user)
+    return lookups
+
+
+@pytest.fixture
+def catalog(db):
+    db.tables["categories"] = [{"category_id": "cat_1", "name": "Tech", "slug": "tech", "image": None}]
+    db.tables["products"] = [
+        {"product_id": "prod_1", "name": "Lamp", "price": 100.0, "images": [], "stock": 5, "featured": True}
+    ]
+
+
+def batch(client, paths, headers=None):
+    response = client.post(
+        "/api/batch",
+        json={"requests": [{"id": str(index), "path": path} for index, path in enumerate(paths)]},
+        headers=headers or {},
+    )
+    return response, {item["id"]: item for item in response.json().get("responses", [])}
+
+
+def test_mixed_results_come_back_per_item(client, catalog, customer_headers):
+    response, items = batch(client, [
+        "/api/categories",
+        "/api/products/missing",
+        "/api/admin/stats",
+        "/api/tracking/order_1/events",
+        "/api/cart",
+    ], customer_headers)
+
+    assert response.status_code == 200
+    assert items["0"]["status"] == 200 and items["0"]["body"][0]["slug"] == "tech"
+    assert items["1"]["status"] == 404
+    assert items["2"]["status"] == 400  # blocking admin route
+    assert items["3"]["status"] == 400  # event stream
+    assert items["4"]["status"] == 200 and items["4"]["body"]["items"] == []
+
+
+def slow(seconds):
+    def read(*args):
+        time.sleep(seconds)
+        return []
+    return read
+
+
+def test_blocking_items_run_concurrently(client, catalog, customer_headers, monkeypatch):
+    monkeypatch.setattr(server.storage, "cart_lines", slow(0.3))
+    monkeypatch.setattr(server.storage, "list_user_orders", slow(0.3))
+    monkeypatch.setattr(server.storage, "wishlist_lines", slow(0.3))
+
+    started = time.monotonic()
+    _, items = batch(client, ["/api/cart", "/api/orders", "/api/wishlist"], customer_headers)
+    elapsed = time.monotonic() - started
+
+    assert [items[key]["status"] for key in "012"] == [200, 200, 200]
+    # Storage calls run off the event loop, so the items overlap
+    assert elapsed < 0.75
+
+
+def test_slow_item_times_out_alone(client, catalog, customer_headers, monkeypatch):
+    monkeypatch.setattr(server, "BATCH_ITEM_TIMEOUT_SECONDS", 0.2)
+    monkeypatch.setattr(server.storage, "wishlist_lines", slow(0.5))
+
+    _, items = batch(client, ["/api/wishlist", "/api/categories"], customer_headers)
+
+    assert items["0"] == {"id": "0", "status": 504, "body": {"detail": "Sub-request timed out"}}
+    assert items["1"]["status"] == 200
+
+
+def test_batch_size_is_limited(client):
+    response, _ = batch(client, ["/api/categories"] * (server.BATCH_MAX_REQUESTS + 1))
+    assert response.status_code == 400
+
+    response, _ = batch(client, [])
+    assert response.status_code == 400
+
+
+def test_auth_is_resolved_once_and_shared(client, queries, auth_lookups, customer_headers):
+    _, items = batch(client, ["/api/session/summary", "/api/cart", "/api/wishlist/count"], customer_headers)
+
+    assert [items[key]["status"] for key in "012"] == [200, 200, 200]
+    assert items["0"]["body"]["user"]["user_id"] == "user_customer"
+    assert auth_lookups == ["customer-token"]
+
+
+def test_anonymous_batch_gets_401_for_private_routes(client, catalog, auth_lookups):
+    _, items = batch(client, ["/api/cart", "/api/categories"])
+
+    assert items["0"]["status"] == 401
+    assert items["1"]["status"] == 200
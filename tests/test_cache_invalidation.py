@@ -0,0 +1,111 @@
+"""
+Per-worker caches are invalidated on every worker through the pub/sub
+backend, whether the write happened on the event loop or in a thread.
+"""
+
+import asyncio
+
+import pytest
+
+import server
+from benchmarks.postgrest_standin import StandinStore
+from services.cache.invalidation import CacheInvalidator
+from services.cache.ttl_cache import TTLCache
+
+
+class Bus:
+    """Stands in for Redis: every publish reaches every started backend"""
+
+    def __init__(self):
+        self.subscribers = []
+
+    def backend(self):
+        return BusBackend(self)
+
+
+class BusBackend:
+    def __init__(self, bus):
+        self.bus = bus
+        self.deliver = None
+
+    async def start(self, deliver):
+        self.deliver = deliver
+        self.bus.subscribers.append(deliver)
+
+    async def stop(self):
+        self.bus.subscribers.remove(self.deliver)
+
+    async def publish(self, name, event):
+        for deliver in self.bus.subscribers:
+            deliver(name, event)
+
+
+def worker(bus):
+    cache = TTLCache(ttl=300)
+    return cache, CacheInvalidator(bus.backend(), {"wishlist_products": cache})
+
+
+def test_invalidation_reaches_every_worker():
+    bus = Bus()
+    cache_a, worker_a = worker(bus)
+    cache_b, worker_b = worker(bus)
+
+    async def scenario():
+        await worker_a.start()
+        await worker_b.start()
+        for cache in (cache_a, cache_b):
+            cache.set("user_1", frozenset({"prod_1"}))
+            cache.set("user_2", frozenset({"prod_2"}))
+
+        worker_a.invalidate("wishlist_products", "user_1")
+        # The writing worker drops its own copy before anything is published
+        assert cache_a.get("user_1") is None
+        await asyncio.sleep(0)
+        assert cache_b.get("user_1") is None
+        assert cache_b.get("user_2") == frozenset({"prod_2"})
+
+        # Writes running in a thread (to_thread, background tasks) publish too
+        await asyncio.to_thread(worker_b.invalidate, "wishlist_products")
+        await asyncio.sleep(0.01)
+        assert len(cache_a) == 0 and len(cache_b) == 0
+
+        await worker_a.stop()
+        await worker_b.stop()
+
+    asyncio.run(scenario())
+
+
+def test_before_start_only_the_local_cache_is_cleared():
+    bus = Bus()
+    cache, invalidator = worker(bus)
+    cache.set("user_1", frozenset())
+
+    invalidator.invalidate("wishlist_products", "user_1")
+    invalidator.invalidate("unknown_cache", "user_1")
+
+    assert cache.get("user_1") is None
+
+
+@pytest.fixture
+def db():
+    store = StandinStore()
+    store.tables["products"] = [{"product_id": "prod_1", "name": "Lamp", "price": 100.0, "images": [], "stock": 5}]
+    return store
+
+
+def test_cart_mutations_are_reflected_in_the_session_summary(client, queries, customer_headers):
+    assert server.cache_invalidation.caches["session_summary"] is server.session_summary_cache
+
+    def cart_counts():
+        return client.get("/api/session/summary", headers=customer_headers).json()["cart"]
+
+    assert cart_counts() == {"lines": 0, "quantity": 0}
+
+    client.post("/api/cart/add", json={"product_id": "prod_1", "quantity": 2}, headers=customer_headers)
+    assert cart_counts() == {"lines": 1, "quantity": 2}
+
+    client.put("/api/cart/update", json={"product_id": "prod_1", "quantity": 4}, headers=customer_headers)
+    assert cart_counts() == {"lines": 1, "quantity": 4}
+
+    client.delete("/api/cart/clear", headers=customer_headers)
+    assert cart_counts() == {"lines": 0, "quantity": 0}
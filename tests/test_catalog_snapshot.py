@@ -0,0 +1,168 @@
+"""
+The on-disk catalog snapshot: file format, cache warming at startup and
+stale serving when the database fails.
+"""
+
+import asyncio
+import os
+import time
+
+import pytest
+
+import server
+from services.storage.catalog_snapshot import (
+    HEADER,
+    CatalogSnapshot,
+    CatalogSnapshotStore,
+    SnapshotError,
+    write_snapshot,
+)
+
+CATEGORIES = [{"category_id": "cat_1", "name": "Lighting", "slug": "lighting", "image": None}]
+
+PRODUCTS = [
+    {"product_id": "prod_z", "name": "Desk Lamp", "description": "Warm light", "price": 40.0,
+     "category": "lighting", "featured": True, "images": [], "stock": 3},
+    {"product_id": "prod_a", "name": "Floor Lamp", "description": "Tall", "price": 90.0,
+     "category": "lighting", "featured": False, "images": [], "stock": 1},
+    {"product_id": "prod_m", "name": "Rug", "description": "Soft LAMP-free rug", "price": 60.0,
+     "category": "home", "featured": True, "images": [], "stock": 8},
+]
+
+
+@pytest.fixture
+def snapshot_path(tmp_path):
+    path = tmp_path / "catalog.snapshot"
+    write_snapshot(str(path), CATEGORIES, PRODUCTS, created_at=1_700_000_000.0)
+    return path
+
+
+def test_round_trip_keeps_listing_order_and_finds_by_id(snapshot_path):
+    snapshot = CatalogSnapshot.open(str(snapshot_path))
+
+    assert snapshot.created_at == 1_700_000_000.0
+    assert snapshot.categories() == CATEGORIES
+    assert [product["product_id"] for product in snapshot.products()] == ["prod_z", "prod_a", "prod_m"]
+    assert snapshot.get_product("prod_m") == PRODUCTS[2]
+    assert snapshot.get_product("prod_b") is None
+
+
+def test_listing_filters_match_the_repository(snapshot_path):
+    snapshot = CatalogSnapshot.open(str(snapshot_path))
+
+    assert snapshot.list_products(None, True, None, 50, 0)[1] == 2
+    assert snapshot.list_products("lighting", None, None, 1, 1) == ([PRODUCTS[1]], 2)
+    # Search is case-insensitive over name and description
+    products, total = snapshot.list_products(None, None, "lamp", 50, 0)
+    assert total == 3 and products == PRODUCTS
+
+
+@pytest.mark.parametrize("damage", ["truncate", "flip", "version"])
+def test_damaged_files_are_rejected(snapshot_path, damage):
+    data = bytearray(snapshot_path.read_bytes())
+    if damage == "truncate":
+        data = data[:HEADER.size + 4]
+    elif damage == "flip":
+        data[-2] ^= 0xFF
+    else:
+        data[4] = 99
+
+    snapshot_path.write_bytes(bytes(data))
+
+    with pytest.raises(SnapshotError):
+        CatalogSnapshot.open(str(snapshot_path))
+
+
+def test_bad_file_keeps_the_loaded_snapshot(snapshot_path):
+    store = CatalogSnapshotStore(str(snapshot_path), interval=300, degraded_seconds=10)
+    loaded = store.load()
+
+    snapshot_path.write_bytes(b"garbage")
+    os.utime(snapshot_path, ns=(0, 0))
+
+    assert store.load() is loaded
+
+
+def test_refresh_writes_only_when_no_worker_has_recently(tmp_path):
+    store = CatalogSnapshotStore(str(tmp_path / "catalog.snapshot"), interval=300, degraded_seconds=10)
+    exports = []
+
+    def export():
+        exports.append(1)
+        return CATEGORIES, PRODUCTS
+
+    asyncio.run(store.refresh(export))
+    asyncio.run(store.refresh(export))
+
+    assert len(exports) == 1
+    assert len(store.snapshot) == 3
+
+
+class FailingCatalog:
+    """Storage whose database is down"""
+
+    def __init__(self):
+        self.calls = 0
+
+    def _fail(self, *args):
+        self.calls += 1
+        raise ConnectionError("database unavailable")
+
+    list_products = get_product = list_categories = _fail
+
+
+@pytest.fixture
+def snapshots(snapshot_path, monkeypatch):
+    store = CatalogSnapshotStore(str(snapshot_path), interval=300, degraded_seconds=10)
+    store.load()
+    monkeypatch.setattr(server, "catalog_snapshots", store)
+    return store
+
+
+def test_browse_falls_back_to_snapshot_marked_stale(client, snapshots, monkeypatch):
+    catalog = FailingCatalog()
+    monkeypatch.setattr(server, "storage", catalog)
+
+    response = client.get("/api/products", params={"category": "lighting"})
+    assert response.status_code == 200
+    assert response.json()["total"] == 2
+    assert response.headers["X-Catalog-Stale"] == snapshots.snapshot.created_at_iso
+    assert response.headers["Cache-Control"] == "no-store"
+
+    # Degraded: later reads go straight to the snapshot
+    assert client.get("/api/products/prod_a").json()["name"] == "Floor Lamp"
+    assert client.get("/api/products/prod_missing").status_code == 404
+    assert len(client.get("/api/categories").json()) == 1
+    assert catalog.calls == 1
+
+    assert 'catalog_snapshot_reads_total{read="products.get"} 2' in server.metrics.render()
+
+
+def test_healthy_reads_are_not_marked_stale(client, db, snapshots):
+    db.tables["products"] = [PRODUCTS[0]]
+
+    response = client.get("/api/products/prod_z")
+
+    assert response.status_code == 200
+    assert "X-Catalog-Stale" not in response.headers
+
+
+def test_startup_warms_home_page_caches(client, queries, snapshots):
+    snapshots.snapshot.created_at = time.time() - 60
+    server.warm_catalog_caches(snapshots.snapshot)
+
+    featured = client.get("/api/products", params={"featured": "true", "limit": server.HOME_FEATURED_LIMIT})
+    categories = client.get("/api/categories")
+
+    assert featured.json()["total"] == 2
+    assert categories.json() == CATEGORIES
+    assert "X-Catalog-Stale" not in featured.headers
+    # Both entries are past the TTL, so each starts one background refresh
+    assert queries.count <= 2
+
+
+def test_snapshot_older_than_max_age_does_not_warm(client, snapshots):
+    server.warm_catalog_caches(snapshots.snapshot)  # created_at is years ago
+
+    assert len(server.categories_cache) == 0
+    assert len(server.featured_products_cache) == 0
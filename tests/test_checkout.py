@@ -0,0 +1,77 @@
+"""
+Checkout is one ``place_order`` call: stock check, order insert, stock
+decrement and cart clear succeed or fail together.
+"""
+
+import pytest
+
+import server
+from benchmarks.postgrest_standin import StandinStore
+
+SHIPPING_ADDRESS = {
+    "full_name": "Customer",
+    "phone": "9999999999",
+    "address_line1": "1 Main Street",
+    "city": "Pune",
+    "state": "MH",
+    "pincode": "411001",
+}
+
+
+@pytest.fixture
+def db():
+    store = StandinStore()
+    store.tables["products"] = [
+        {"product_id": f"prod_{index}", "name": f"Product {index}", "price": 100.0, "images": [], "stock": 3}
+        for index in range(3)
+    ]
+    return store
+
+
+def checkout(client, headers):
+    return client.post("/api/orders", json={"shipping_address": SHIPPING_ADDRESS}, headers=headers)
+
+
+def test_checkout_is_one_round_trip(client, db, queries, customer_headers):
+    for index in range(3):
+        client.post("/api/cart/add", json={"product_id": f"prod_{index}", "quantity": 2}, headers=customer_headers)
+    queries.reset()
+
+    response = checkout(client, customer_headers)
+
+    assert response.status_code == 200
+    assert queries.count == 1, queries.describe()
+    assert response.json()["total"] == 600.0 + server.SHIPPING_RATE
+    assert [product["stock"] for product in db.tables["products"]] == [1, 1, 1]
+    assert len(db.tables["order_items"]) == 3
+    assert db.tables["cart_items"] == []
+
+
+def test_failed_checkout_changes_nothing(client, db, queries, customer_headers):
+    client.post("/api/cart/add", json={"product_id": "prod_0", "quantity": 2}, headers=customer_headers)
+    client.post("/api/cart/add", json={"product_id": "prod_1", "quantity": 3}, headers=customer_headers)
+    db.tables["products"][1]["stock"] = 2
+
+    response = checkout(client, customer_headers)
+
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Insufficient stock for Product 1"
+    assert [product["stock"] for product in db.tables["products"]] == [3, 2, 3]
+    assert "orders" not in db.tables
+    assert len(db.tables["cart_items"]) == 2
+
+
+def test_empty_cart_is_rejected(client, queries, customer_headers):
+    response = checkout(client, customer_headers)
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Cart is empty"
+
+
+def test_checkout_refreshes_wishlist_stock(client, db, queries, customer_headers):
+    client.post("/api/wishlist/add", json={"product_id": "prod_0"}, headers=customer_headers)
+    client.post("/api/cart/add", json={"product_id": "prod_0", "quantity": 3}, headers=customer_headers)
+
+    assert checkout(client, customer_headers).status_code == 200
+
+    items = client.get("/api/wishlist", headers=customer_headers).json()["items"]
+    assert [(item["product_id"], item["stock"]) for item in items] == [("prod_0", 0)]
@@ -0,0 +1,55 @@
+"""
+Guest cart cookie: quantities stay within ``MAX_QUANTITY`` whether they come
+from the codec, the add endpoint or the update endpoint.
+"""
+
+import pytest
+
+import server
+from services.cart.guest_cart import MAX_QUANTITY, GuestCartCodec
+
+
+@pytest.fixture
+def stocked(db, queries):
+    db.tables["products"] = [
+        {
+            "product_id": "prod_1",
+            "name": "Product 1",
+            "price": 100.0,
+            "images": ["https://img.example.com/1.jpg"],
+            "stock": 500,
+        }
+    ]
+
+
+def cookie_items(response):
+    return server.guest_cart_codec.decode(response.cookies[server.GUEST_CART_COOKIE])
+
+
+def test_encode_clamps_and_drops_non_positive_quantities():
+    codec = GuestCartCodec("secret")
+    token = codec.encode({"prod_1": 1000, "prod_2": 0, "prod_3": -4, "prod_4": 2})
+
+    assert codec.decode(token) == {"prod_1": MAX_QUANTITY, "prod_4": 2}
+
+
+def test_add_clamps_the_running_total(client, stocked):
+    client.post("/api/guest-cart/add", json={"product_id": "prod_1", "quantity": 90})
+    response = client.post("/api/guest-cart/add", json={"product_id": "prod_1", "quantity": 90})
+
+    assert response.status_code == 200
+    assert cookie_items(response) == {"prod_1": MAX_QUANTITY}
+    assert response.json()["items"][0]["quantity"] == MAX_QUANTITY
+
+
+@pytest.mark.parametrize("quantity", [0, -3])
+def test_add_rejects_non_positive_quantity(client, stocked, quantity):
+    response = client.post("/api/guest-cart/add", json={"product_id": "prod_1", "quantity": quantity})
+    assert response.status_code == 400
+
+
+def test_update_clamps_quantity(client, stocked):
+    response = client.put("/api/guest-cart/update", json={"product_id": "prod_1", "quantity": 10_000})
+
+    assert response.status_code == 200
+    assert cookie_items(response) == {"prod_1": MAX_QUANTITY}
@@ -0,0 +1,33 @@
+"""
+Query shapes keep columns and operators but never filter values, including
+values inside or_() expressions that contain commas, dots or parentheses.
+"""
+
+import pytest
+
+import server
+from services.observability.instrumented_client import strip_expression_values
+
+
+@pytest.mark.parametrize("expression, shape", [
+    ("status.eq.paid", "status.eq"),
+    ("price.gte.10.5", "price.gte"),
+    ("name.ilike.*foo(bar)*,slug.eq.lamp", "name.ilike,slug.eq"),
+    ('name.eq."a,b (c)",id.lt.9', "name.eq,id.lt"),
+    ('name.eq."say \\"hi\\", (x)",id.lt.9', "name.eq,id.lt"),
+    ("product_id.in.(p1,p2),stock.not.is.null", "product_id.in,stock.not.is"),
+    (
+        "created_at.lt.2026-01-01T00:00:00+00:00,and(created_at.eq.2026-01-01T00:00:00+00:00,order_id.lt.order_9)",
+        "created_at.lt,and(created_at.eq,order_id.lt)",
+    ),
+    ("not.or(name.ilike.*(secret)*,status.eq.x)", "not.or(name.ilike,status.eq)"),
+])
+def test_expression_values_are_stripped(expression, shape):
+    assert strip_expression_values(expression) == shape
+
+
+def test_recorded_shape_has_no_values(db, queries):
+    db.tables["products"] = []
+    server.supabase.table("products").select("product_id").or_("name.ilike.*foo(bar)*,description.ilike.*foo(bar)*").execute()
+
+    assert queries.events[-1].shape == "products select(product_id) or_(name.ilike,description.ilike)"
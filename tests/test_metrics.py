@@ -0,0 +1,107 @@
+"""
+Request metrics: routes are labelled by their template, the per-request
+context is reset after each request, the exposition parses as Prometheus
+text, and /metrics is never public.
+"""
+
+import asyncio
+import re
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+import server
+from services.observability import metrics as metrics_module
+from services.observability.instrumented_client import QueryEvent
+from services.observability.metrics import Metrics, MetricsMiddleware
+
+SAMPLE = re.compile(r'^([a-z_]+)(\{[a-z_]+="[^"]*"(?:,[a-z_]+="[^"]*")*\})? (-?[0-9.]+)$')
+
+
+def metered_app(metrics):
+    app = FastAPI()
+
+    @app.get("/items/{item_id}")
+    async def get_item(item_id: str):
+        metrics.observe_query(QueryEvent(table="items", operation="select", duration=0.002))
+        return {"item_id": item_id}
+
+    app.add_middleware(MetricsMiddleware, metrics=metrics)
+    return app
+
+
+def test_requests_are_labelled_by_route_template():
+    metrics = Metrics()
+    client = TestClient(metered_app(metrics))
+
+    for item_id in ("a", "b", "c"):
+        assert client.get(f"/items/{item_id}").status_code == 200
+    assert client.get("/nowhere").status_code == 404
+
+    rendered = metrics.render()
+    assert 'http_responses_total{method="GET",route="/items/{item_id}",status="200"} 3' in rendered
+    assert 'http_responses_total{method="GET",route="unmatched",status="404"} 1' in rendered
+    assert 'http_request_supabase_calls_total{method="GET",route="/items/{item_id}"} 3' in rendered
+    assert 'http_requests_in_flight 0' in rendered
+    assert "/items/a" not in rendered
+
+
+def test_request_context_is_reset_after_each_request():
+    metrics = Metrics()
+    middleware = MetricsMiddleware(metered_app(metrics).router, metrics)
+    scope = {"type": "http", "method": "GET", "path": "/items/a", "raw_path": b"/items/a",
+             "query_string": b"", "headers": [], "root_path": ""}
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        pass
+
+    async def scenario():
+        await middleware(dict(scope), receive, send)
+        return metrics_module._current_request.get()
+
+    assert asyncio.run(scenario()) is None
+
+
+def test_exposition_format():
+    metrics = Metrics()
+    stats = metrics.request_started()
+    metrics.request_finished("GET", '/say "hi"', 200, 0.03, stats)
+    metrics.observe_query(QueryEvent(table="orders", operation="select", duration=0.2, error=True))
+
+    lines = metrics.render().splitlines()
+    declared = set()
+    for line in lines:
+        if line.startswith("# TYPE "):
+            declared.add(line.split()[2])
+            continue
+        if line.startswith("# HELP "):
+            continue
+        match = SAMPLE.match(line.replace('\\"', ""))
+        assert match, line
+        name = match.group(1)
+        assert any(name == family or name.startswith(f"{family}_") for family in declared), line
+
+    buckets = [line for line in lines if line.startswith("http_request_duration_seconds_bucket")]
+    counts = [int(line.rsplit(" ", 1)[1]) for line in buckets]
+    assert counts == sorted(counts) and counts[-1] == 1
+    assert buckets[-1].startswith('http_request_duration_seconds_bucket{method="GET",route="/say \\"hi\\"",le="+Inf"}')
+    assert 'supabase_query_errors_total{table="orders",operation="select"} 1' in lines
+
+
+def test_metrics_endpoint_requires_admin_without_token(client, admin_headers, customer_headers):
+    assert client.get("/metrics").status_code == 401
+    assert client.get("/metrics", headers=customer_headers).status_code == 403
+
+    response = client.get("/metrics", headers=admin_headers)
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+
+
+def test_metrics_endpoint_checks_the_token(client, admin_headers, monkeypatch):
+    monkeypatch.setattr(server, "METRICS_TOKEN", "scrape-secret")
+
+    assert client.get("/metrics", headers=admin_headers).status_code == 401
+    assert client.get("/metrics", headers={"Authorization": "Bearer scrape-secret"}).status_code == 200
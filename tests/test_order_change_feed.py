@@ -0,0 +1,122 @@
+"""
+The admin order change feed never skips a change whose transaction commits
+after a later-numbered one.
+"""
+
+import itertools
+
+import pytest
+
+
+class Transactions:
+    """
+    Postgres-like visibility for the fake: rows written by a transaction
+    reach the table on commit, and the snapshot xmin is the oldest
+    transaction still running.
+    """
+
+    def __init__(self, db):
+        self.db = db
+        self.xids = itertools.count(10)
+        self.seqs = itertools.count(100)
+        self.running = {}
+
+    def begin(self) -> int:
+        xid = next(self.xids)
+        self.running[xid] = []
+        return xid
+
+    def write(self, xid, order_id, status="pending"):
+        """Insert or update an order, stamped like the orders trigger does"""
+        self.running[xid].append({
+            "order_id": order_id,
+            "status": status,
+            "change_seq": next(self.seqs),
+            "change_xid": xid,
+        })
+
+    def commit(self, xid):
+        orders = self.db.tables.setdefault("orders", [])
+        for row in self.running.pop(xid):
+            orders[:] = [order for order in orders if order["order_id"] != row["order_id"]]
+            orders.append(row)
+
+    def order_changes(self, db, p_after_xid, p_after_seq, p_limit):
+        """Python mirror of the RPC in migration 012"""
+        xmin = min(self.running) if self.running else float("inf")
+        after = (int(p_after_xid), p_after_seq)
+        visible = sorted(
+            (order for order in db.tables.get("orders", [])
+             if (order["change_xid"], order["change_seq"]) > after and order["change_xid"] < xmin),
+            key=lambda order: (order["change_xid"], order["change_seq"])
+        )
+        return [
+            {**order, "change_xid": str(order["change_xid"]), "order_items": []}
+            for order in visible[:p_limit]
+        ]
+
+
+@pytest.fixture
+def transactions(db, queries):
+    transactions = Transactions(db)
+    db.functions["order_changes"] = transactions.order_changes
+    return transactions
+
+
+def poll(client, headers, cursor):
+    page = client.get("/api/admin/orders/changes", params={"since": cursor}, headers=headers).json()
+    return [order["order_id"] for order in page["orders"]], page["cursor"]
+
+
+def test_late_commit_with_lower_sequence_is_not_skipped(client, admin_headers, transactions):
+    slow = transactions.begin()
+    transactions.write(slow, "order_slow")  # seq 100, still running
+    fast = transactions.begin()
+    transactions.write(fast, "order_fast")  # seq 101
+    transactions.commit(fast)
+
+    # order_fast is committed, but an older transaction is still open
+    seen, cursor = poll(client, admin_headers, "0")
+    assert seen == [] and cursor == "0"
+
+    transactions.commit(slow)
+    seen, cursor = poll(client, admin_headers, cursor)
+    assert seen == ["order_slow", "order_fast"]
+
+    assert poll(client, admin_headers, cursor)[0] == []
+
+
+def test_cursor_orders_by_transaction_not_sequence(client, admin_headers, transactions):
+    first = transactions.begin()
+    second = transactions.begin()
+    transactions.write(second, "order_b")  # seq 100, newer transaction
+    transactions.write(first, "order_a")  # seq 101, older transaction
+    transactions.commit(first)
+
+    # Nothing older than `second` is running, so order_a is safe to hand out
+    seen, cursor = poll(client, admin_headers, "0")
+    assert seen == ["order_a"]
+
+    # A seq-based cursor (101) would now skip order_b (seq 100)
+    transactions.commit(second)
+    seen, cursor = poll(client, admin_headers, cursor)
+    assert seen == ["order_b"]
+
+
+def test_updates_reappear_after_the_cursor(client, admin_headers, transactions):
+    xid = transactions.begin()
+    transactions.write(xid, "order_1")
+    transactions.commit(xid)
+    _, cursor = poll(client, admin_headers, "0")
+
+    xid = transactions.begin()
+    transactions.write(xid, "order_1", status="shipped")
+    transactions.commit(xid)
+
+    page = client.get("/api/admin/orders/changes", params={"since": cursor}, headers=admin_headers).json()
+    assert [(order["order_id"], order["status"]) for order in page["orders"]] == [("order_1", "shipped")]
+
+
+def test_malformed_cursor_is_rejected(client, admin_headers, transactions):
+    response = client.get("/api/admin/orders/changes", params={"since": "abc.def"}, headers=admin_headers)
+    assert response.status_code == 400
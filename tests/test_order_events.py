@@ -0,0 +1,168 @@
+"""
+Live tracking streams: the connection cap evicts idle streams, and idle
+streams end with an event that stops EventSource from reconnecting, and the
+Redis listener resubscribes after its connection drops.
+"""
+
+import asyncio
+import json
+import sys
+import types
+
+import pytest
+
+import server
+from services.realtime import order_events
+from services.realtime.order_events import STREAM_EVICTED, OrderEventBroker, SubscriberLimitExceeded
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    return Clock()
+
+
+@pytest.fixture
+def broker(clock):
+    return OrderEventBroker(max_connections=2, evict_idle_after=60, clock=clock)
+
+
+def test_full_worker_evicts_the_longest_idle_stream(broker, clock):
+    idle = broker.subscribe("order_idle")
+    clock.now += 30
+    active = broker.subscribe("order_active")
+
+    clock.now += 50
+    broker._deliver("order_active", {"status": "shipped"})
+    clock.now += 20
+
+    newcomer = broker.subscribe("order_new")
+
+    assert idle.get_nowait() is STREAM_EVICTED
+    assert active.get_nowait() == {"status": "shipped"}
+    assert broker.connections == 2
+
+    # The evicted stream's own unsubscribe must not free another slot
+    broker.unsubscribe("order_idle", idle)
+    assert broker.connections == 2
+    broker.unsubscribe("order_new", newcomer)
+    assert broker.connections == 1
+
+
+def test_full_worker_of_active_streams_refuses(broker, clock):
+    broker.subscribe("order_1")
+    broker.subscribe("order_2")
+    clock.now += 59
+
+    with pytest.raises(SubscriberLimitExceeded):
+        broker.subscribe("order_3")
+
+
+class ConnectedRequest:
+    async def is_disconnected(self):
+        return False
+
+
+def test_evicted_stream_ends_with_idle_event_and_long_retry():
+    async def scenario():
+        queue = asyncio.Queue()
+        queue.put_nowait(STREAM_EVICTED)
+        snapshot = {"order_id": "order_1", "status": "shipped"}
+        stream = server.tracking_event_stream(ConnectedRequest(), "order_1", queue, snapshot)
+        return [chunk async for chunk in stream]
+
+    chunks = asyncio.run(scenario())
+
+    assert chunks[0].startswith("event: tracking")
+    assert chunks[-1].startswith(f"retry: {server.SSE_IDLE_RETRY_MS}\nevent: idle\n")
+    assert f'"poll_seconds": {server.SSE_IDLE_POLL_SECONDS}' in chunks[-1]
+
+
+# Ends a scripted subscription by keeping it open until the listener is stopped
+HOLD = object()
+
+
+class FakePubSub:
+    def __init__(self, messages):
+        self.messages = messages
+        self.closed = False
+
+    async def psubscribe(self, pattern):
+        pass
+
+    async def listen(self):
+        for message in self.messages:
+            if message is HOLD:
+                await asyncio.Event().wait()
+            if isinstance(message, Exception):
+                raise message
+            yield message
+
+    async def close(self):
+        self.closed = True
+
+
+class FakeRedis:
+    """Hands out one scripted pubsub per subscription"""
+
+    def __init__(self, scripts):
+        self.pubsubs = [FakePubSub(messages) for messages in scripts]
+        self.subscriptions = 0
+
+    def pubsub(self):
+        pubsub = self.pubsubs[self.subscriptions]
+        self.subscriptions += 1
+        return pubsub
+
+    async def close(self):
+        pass
+
+
+@pytest.fixture
+def fake_redis(monkeypatch):
+    def install(scripts):
+        fake = FakeRedis(scripts)
+        module = types.ModuleType("redis.asyncio")
+        module.from_url = lambda url: fake
+        package = types.ModuleType("redis")
+        package.asyncio = module
+        monkeypatch.setitem(sys.modules, "redis", package)
+        monkeypatch.setitem(sys.modules, "redis.asyncio", module)
+        return fake
+
+    monkeypatch.setattr(order_events, "RECONNECT_MIN_SECONDS", 0.01)
+    return install
+
+
+def pmessage(order_id, event):
+    return {"type": "pmessage", "channel": f"order-events:{order_id}".encode(), "data": json.dumps(event)}
+
+
+def test_redis_listener_resubscribes_after_connection_loss(fake_redis):
+    fake = fake_redis([
+        [pmessage("order_1", {"status": "paid"}), ConnectionError("connection reset")],
+        [],
+        [pmessage("order_1", {"status": "shipped"}), HOLD],
+    ])
+
+    async def scenario():
+        broker = OrderEventBroker(backend=order_events.RedisBackend("redis://fake"))
+        queue = broker.subscribe("order_1")
+        await broker.start()
+        events = [await asyncio.wait_for(queue.get(), 1) for _ in range(2)]
+        await broker.stop()
+        return events
+
+    events = asyncio.run(scenario())
+
+    assert events == [{"status": "paid"}, {"status": "shipped"}]
+    # A listen() that ends without an error is treated as a lost connection too
+    assert fake.subscriptions == 3
+    assert fake.pubsubs[0].closed and fake.pubsubs[1].closed
@@ -0,0 +1,126 @@
+"""
+GET /api/admin/orders/export streams CSV (one row per line item) or NDJSON
+(one order per line), honours the admin filters and walks every page.
+"""
+
+import csv
+import io
+import json
+
+import server
+
+from .conftest import CUSTOMER
+
+
+def seed(db, count, items_per_order=1):
+    db.tables["users"] = [CUSTOMER]
+    db.tables["orders"] = []
+    db.tables["order_items"] = []
+
+    for index in range(count):
+        order_id = f"order_{index:04d}"
+        db.tables["orders"].append({
+            "order_id": order_id,
+            "user_id": CUSTOMER["user_id"],
+            "status": "shipped" if index % 2 else "pending",
+            "payment_status": "paid",
+            "subtotal": 100.0 * items_per_order,
+            "shipping": 100.0,
+            "total": 100.0 * items_per_order + 100.0,
+            "shipping_address": {"full_name": "Customer", "city": "Pune"},
+            "created_at": f"2024-01-{1 + index // 24 % 28:02d}T{index % 24:02d}:{index // 672:02d}:00+00:00",
+        })
+        for line in range(items_per_order):
+            db.tables["order_items"].append({
+                "order_id": order_id,
+                "product_id": f"prod_{line}",
+                "name": f"Product {line}",
+                "price": 100.0,
+                "image": None,
+                "quantity": line + 1,
+            })
+
+
+def export(client, headers, **params):
+    response = client.get("/api/admin/orders/export", params=params, headers=headers)
+    assert response.status_code == 200, response.text
+    return response
+
+
+def csv_rows(response):
+    return list(csv.DictReader(io.StringIO(response.text)))
+
+
+def test_csv_has_one_row_per_line_item(client, db, queries, admin_headers):
+    seed(db, 3, items_per_order=2)
+    db.tables["order_items"] = [item for item in db.tables["order_items"] if item["order_id"] != "order_0000"]
+
+    response = export(client, admin_headers, format="csv")
+
+    assert response.headers["content-type"].startswith("text/csv")
+    assert 'filename="orders-' in response.headers["content-disposition"]
+    assert response.text.splitlines()[0] == ",".join(server.EXPORT_CSV_COLUMNS)
+
+    rows = csv_rows(response)
+    assert [(row["order_id"], row["product_id"]) for row in rows] == [
+        ("order_0002", "prod_0"), ("order_0002", "prod_1"),
+        ("order_0001", "prod_0"), ("order_0001", "prod_1"),
+        ("order_0000", ""),
+    ]
+    assert (rows[1]["quantity"], rows[1]["line_total"], rows[1]["city"]) == ("2", "200.0", "Pune")
+
+
+def test_ndjson_has_one_order_per_line(client, db, queries, admin_headers):
+    seed(db, 3, items_per_order=2)
+
+    response = export(client, admin_headers, format="ndjson")
+
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    orders = [json.loads(line) for line in response.text.splitlines()]
+    assert [order["order_id"] for order in orders] == ["order_0002", "order_0001", "order_0000"]
+    assert [item["product_id"] for item in orders[0]["items"]] == ["prod_0", "prod_1"]
+
+
+def test_date_range_and_status_filters(client, db, queries, admin_headers):
+    seed(db, 24 * 4)  # one order an hour, 2024-01-01 through 2024-01-04
+
+    rows = csv_rows(export(client, admin_headers, start="2024-01-02", end="2024-01-03"))
+    assert len(rows) == 48
+    assert {row["created_at"][:10] for row in rows} == {"2024-01-02", "2024-01-03"}
+
+    rows = csv_rows(export(client, admin_headers, start="2024-01-02", end="2024-01-02", status="shipped"))
+    assert len(rows) == 12
+    assert {row["status"] for row in rows} == {"shipped"}
+
+
+def test_empty_result(client, db, queries, admin_headers):
+    seed(db, 5)
+
+    response = export(client, admin_headers, format="csv", start="2030-01-01")
+    assert response.text.splitlines() == [",".join(server.EXPORT_CSV_COLUMNS)]
+
+    assert export(client, admin_headers, format="ndjson", status="cancelled").text == ""
+
+    # An unknown customer never reaches the orders table
+    queries.reset()
+    assert export(client, admin_headers, format="ndjson", customer="nobody@example.com").text == ""
+    assert all(not event.shape.startswith("orders") for event in queries.events)
+
+
+def test_export_spans_several_pages(client, db, queries, admin_headers):
+    count = 2 * server.EXPORT_PAGE_SIZE + 7
+    seed(db, count)
+    queries.reset()
+
+    orders = [json.loads(line) for line in export(client, admin_headers, format="ndjson").text.splitlines()]
+
+    order_ids = [order["order_id"] for order in orders]
+    assert len(order_ids) == count and len(set(order_ids)) == count
+    keys = [(order["created_at"], order["order_id"]) for order in orders]
+    assert keys == sorted(keys, reverse=True)
+    assert sum(event.table == "orders" for event in queries.events) == 3
+
+
+def test_invalid_format_and_non_admins_are_rejected(client, db, queries, admin_headers, customer_headers):
+    assert client.get("/api/admin/orders/export", params={"format": "xml"}, headers=admin_headers).status_code == 400
+    assert client.get("/api/admin/orders/export", headers=customer_headers).status_code == 403
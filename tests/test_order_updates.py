@@ -0,0 +1,235 @@
+"""
+Admin order updates, single and bulk, refresh the public tracking cache.
+Bulk manifests arrive as JSON or CSV, report bad and duplicate rows one by
+one, and notify live subscribers once per batch.
+"""
+
+import pytest
+from fastapi.testclient import TestClient
+
+import server
+from services.storage.sqlite_repository import SQLiteRepository
+
+from .conftest import CUSTOMER, USERS_BY_TOKEN
+
+ORDER_IDS = ["order_a", "order_b", "order_c"]
+
+
+@pytest.fixture
+def repo(tmp_path):
+    repo = SQLiteRepository(tmp_path / "store.db")
+    repo.seed_catalog(
+        [{"category_id": "cat_tech", "name": "Technology", "slug": "tech", "image": None}],
+        [{"product_id": "prod_0", "name": "Lamp", "price": 100.0, "images": [], "stock": 10, "category": "tech"}],
+    )
+    for order_id in ORDER_IDS:
+        repo.add_cart_item(CUSTOMER["user_id"], "prod_0", 1)
+        repo.place_order(CUSTOMER["user_id"], order_id, {"full_name": "Customer"}, 100.0, "2024-01-01T00:00:00+00:00")
+    yield repo
+    repo.close()
+
+
+@pytest.fixture
+def client(repo, monkeypatch):
+    async def current_user(request):
+        token = request.headers.get("Authorization", "").removeprefix("Bearer ")
+        return USERS_BY_TOKEN.get(token)
+
+    monkeypatch.setattr(server, "storage", repo)
+    monkeypatch.setattr(server, "get_current_user", current_user)
+    server.tracking_cache.clear()
+
+    return TestClient(server.app)
+
+
+@pytest.fixture
+def tracking_reads(repo, monkeypatch):
+    """Order ids read from storage by the tracking endpoints"""
+    reads = []
+    tracking_orders = repo.tracking_orders
+
+    def counted(order_ids):
+        reads.extend(order_ids)
+        return tracking_orders(order_ids)
+
+    monkeypatch.setattr(repo, "tracking_orders", counted)
+    return reads
+
+
+def tracking(client, order_id):
+    response = client.get(f"/api/tracking/{order_id}")
+    assert response.status_code == 200
+    return response.json()
+
+
+def test_tracking_cache_is_refreshed_after_update_order_status(client, admin_headers, tracking_reads):
+    assert tracking(client, "order_a")["status"] == "pending"
+    assert tracking(client, "order_a")["status"] == "pending"
+    assert tracking_reads == ["order_a"]
+
+    response = client.put(
+        "/api/admin/orders/order_a",
+        params={"status": "shipped", "tracking_number": "ABC123", "tracking_provider": "delhivery"},
+        headers=admin_headers,
+    )
+    assert response.status_code == 200
+
+    info = tracking(client, "order_a")
+    assert (info["status"], info["tracking_number"], info["tracking_provider"]) == ("shipped", "ABC123", "delhivery")
+    assert info["tracking_url"] == server.tracking_providers.tracking_url("delhivery", "ABC123")
+    # Served from the refreshed cache, not read again
+    assert tracking_reads == ["order_a"]
+
+
+def test_tracking_cache_is_refreshed_after_bulk_update(client, admin_headers, tracking_reads):
+    batch = client.post("/api/tracking/batch", json={"order_ids": ORDER_IDS}).json()
+    assert [order["status"] for order in batch["orders"]] == ["pending"] * 3
+    tracking_reads.clear()
+
+    response = client.post(
+        "/api/admin/orders/bulk-update",
+        json={"rows": [
+            {"order_id": "order_a", "status": "shipped", "tracking_number": "T1"},
+            {"order_id": "order_b", "status": "delivered"},
+        ]},
+        headers=admin_headers,
+    )
+    assert response.json()["updated"] == 2
+
+    batch = client.post("/api/tracking/batch", json={"order_ids": ORDER_IDS}).json()
+    assert [(order["status"], order["tracking_number"]) for order in batch["orders"]] == [
+        ("shipped", "T1"), ("delivered", None), ("pending", None)
+    ]
+    assert tracking(client, "order_b")["status"] == "delivered"
+    assert tracking_reads == []
+
+
+@pytest.fixture
+def published(monkeypatch):
+    """Batches handed to the order event broker"""
+    batches = []
+
+    async def publish_many(events):
+        batches.append(events)
+
+    monkeypatch.setattr(server.order_events, "publish_many", publish_many)
+    return batches
+
+
+def results_by_row(body):
+    return {result["row"]: result for result in body["results"]}
+
+
+def test_bulk_update_from_json_manifest(client, repo, admin_headers, published):
+    response = client.post(
+        "/api/admin/orders/bulk-update",
+        json={"rows": [
+            {"order_id": "order_a", "status": "Shipped", "tracking_number": " T1 ", "tracking_provider": "Delhivery"},
+            {"order_id": "order_b", "tracking_number": "T2"},
+        ]},
+        headers=admin_headers,
+    )
+
+    assert response.status_code == 200
+    assert response.json() == {
+        "updated": 2,
+        "failed": 0,
+        "results": [
+            {"row": 1, "order_id": "order_a", "result": "updated"},
+            {"row": 2, "order_id": "order_b", "result": "updated"},
+        ],
+    }
+    orders = {order["order_id"]: order for order in repo.tracking_orders(ORDER_IDS)}
+    assert (orders["order_a"]["status"], orders["order_a"]["tracking_number"], orders["order_a"]["tracking_provider"]) == (
+        "shipped", "T1", "delhivery"
+    )
+    # Fields missing from a row are left alone
+    assert (orders["order_b"]["status"], orders["order_b"]["tracking_number"]) == ("pending", "T2")
+
+
+def test_bulk_update_from_csv_manifest(client, repo, admin_headers, published):
+    manifest = "order_id,status,tracking_number,tracking_provider\norder_a,delivered,,\norder_c,shipped,T3,bluedart\n"
+
+    body = client.post(
+        "/api/admin/orders/bulk-update",
+        content=manifest.encode(),
+        headers={**admin_headers, "Content-Type": "text/csv"},
+    ).json()
+    assert (body["updated"], body["failed"]) == (2, 0)
+
+    upload = client.post(
+        "/api/admin/orders/bulk-update",
+        files={"file": ("manifest.csv", "order_id,status\norder_b,confirmed\n", "text/csv")},
+        headers=admin_headers,
+    ).json()
+    assert (upload["updated"], upload["failed"]) == (1, 0)
+
+    statuses = {order["order_id"]: order["status"] for order in repo.tracking_orders(ORDER_IDS)}
+    assert statuses == {"order_a": "delivered", "order_b": "confirmed", "order_c": "shipped"}
+
+
+def test_bulk_update_reports_invalid_rows(client, repo, admin_headers, published):
+    body = client.post(
+        "/api/admin/orders/bulk-update",
+        json={"rows": [
+            {"order_id": "order_a", "status": "lost"},
+            {"status": "shipped"},
+            {"order_id": "order_b"},
+            "order_c",
+            {"order_id": "order_missing", "status": "shipped"},
+            {"order_id": "order_c", "status": "shipped"},
+        ]},
+        headers=admin_headers,
+    ).json()
+
+    assert (body["updated"], body["failed"]) == (1, 5)
+    results = results_by_row(body)
+    assert results[1]["error"] == "Unknown status 'lost'"
+    assert results[2]["error"] == "order_id is required"
+    assert results[3]["error"] == "No update data provided"
+    assert (results[4]["result"], results[4]["order_id"]) == ("invalid", None)
+    assert results[5] == {"row": 5, "order_id": "order_missing", "result": "not_found", "error": "Order not found"}
+    assert results[6]["result"] == "updated"
+
+    statuses = {order["order_id"]: order["status"] for order in repo.tracking_orders(ORDER_IDS)}
+    assert statuses == {"order_a": "pending", "order_b": "pending", "order_c": "shipped"}
+
+
+def test_bulk_update_rejects_duplicate_order_ids(client, repo, admin_headers, published):
+    body = client.post(
+        "/api/admin/orders/bulk-update",
+        json={"rows": [
+            {"order_id": "order_a", "status": "shipped"},
+            {"order_id": "order_a", "status": "cancelled"},
+        ]},
+        headers=admin_headers,
+    ).json()
+
+    assert (body["updated"], body["failed"]) == (1, 1)
+    assert results_by_row(body)[2] == {
+        "row": 2, "order_id": "order_a", "result": "invalid", "error": "Duplicate of row 1"
+    }
+    assert repo.tracking_orders(["order_a"])[0]["status"] == "shipped"
+
+
+def test_bulk_update_notifies_subscribers_once_per_batch(client, admin_headers, published, monkeypatch):
+    monkeypatch.setattr(server, "BULK_UPDATE_CHUNK_SIZE", 2)
+
+    client.post(
+        "/api/admin/orders/bulk-update",
+        json={"rows": [{"order_id": order_id, "status": "shipped"} for order_id in ORDER_IDS]},
+        headers=admin_headers,
+    )
+
+    assert len(published) == 1
+    assert sorted(published[0]) == ORDER_IDS
+    assert {event["status"] for event in published[0].values()} == {"shipped"}
+
+
+def test_bulk_update_limits(client, admin_headers, customer_headers, published):
+    rows = [{"order_id": f"order_{index}", "status": "shipped"} for index in range(server.BULK_UPDATE_MAX_ROWS + 1)]
+
+    assert client.post("/api/admin/orders/bulk-update", json={"rows": rows}, headers=admin_headers).status_code == 400
+    assert client.post("/api/admin/orders/bulk-update", json={"rows": "x"}, headers=admin_headers).status_code == 400
+    assert client.post("/api/admin/orders/bulk-update", json={"rows": []}, headers=customer_headers).status_code == 403
+    assert published == []
@@ -0,0 +1,57 @@
+from starlette.testclient import TestClient
+
+from benchmarks.postgrest_standin import StandinStore, create_standin_app, seed_store
+
+
+def standin():
+    store = StandinStore()
+    seed_store(store, products=30, categories=3)
+    return store, TestClient(create_standin_app(store))
+
+
+def test_select_filters_order_and_count():
+    _, client = standin()
+
+    response = client.get(
+        "/rest/v1/products",
+        params={"select": "product_id,price", "featured": "eq.true", "order": "price.desc", "offset": 0, "limit": 2},
+        headers={"Prefer": "count=exact"},
+    )
+
+    assert response.status_code == 200
+    assert [row["price"] for row in response.json()] == [120.0, 110.0]
+    assert response.headers["Content-Range"] == "0-1/3"
+
+
+def test_in_and_or_filters():
+    _, client = standin()
+
+    response = client.get("/rest/v1/products", params={"select": "product_id", "product_id": "in.(prod_00001,prod_00002)"})
+    assert {row["product_id"] for row in response.json()} == {"prod_00001", "prod_00002"}
+
+    response = client.get("/rest/v1/products", params={"select": "product_id", "or": "(name.ilike.%Product 2%,price.gte.125)"})
+    expected = {f"prod_{index:05d}" for index in [2, *range(20, 30)]}
+    assert {row["product_id"] for row in response.json()} == expected
+
+
+def test_upsert_merges_on_conflict_and_rpc_snapshots_lines():
+    store, client = standin()
+    upsert = {"Prefer": "return=representation,resolution=merge-duplicates"}
+
+    first = client.post("/rest/v1/carts", params={"on_conflict": "user_id"}, json={"user_id": "u1"}, headers=upsert).json()
+    second = client.post("/rest/v1/carts", params={"on_conflict": "user_id"}, json={"user_id": "u1"}, headers=upsert).json()
+    assert first[0]["id"] == second[0]["id"]
+
+    result = client.post("/rest/v1/rpc/add_cart_item", json={"p_user_id": "u1", "p_product_id": "prod_00003", "p_quantity": 2}).json()
+    assert result == {"result": "added", "name": "Product 3", "quantity": 2, "cart_id": first[0]["id"]}
+
+    carts = client.get("/rest/v1/carts", params={"select": "id,cart_items(product_id,quantity,name,price)", "user_id": "eq.u1"}).json()
+    assert carts[0]["cart_items"] == [{"product_id": "prod_00003", "quantity": 2, "name": "Product 3", "price": 103.0}]
+
+
+def test_single_object_requires_exactly_one_row():
+    _, client = standin()
+    single = {"Accept": "application/vnd.pgrst.object+json"}
+
+    assert client.get("/rest/v1/products", params={"product_id": "eq.prod_00004"}, headers=single).json()["name"] == "Product 4"
+    assert client.get("/rest/v1/products", params={"product_id": "eq.missing"}, headers=single).status_code == 406
@@ -0,0 +1,217 @@
+"""
+Database round-trip budgets per endpoint.
+
+Each endpoint has a fixed query budget that must hold for every input size.
+A handler that starts looking rows up one at a time blows the budget for
+the larger baskets/order lists and fails here.
+"""
+
+import pytest
+
+import server
+
+from .conftest import CUSTOMER
+
+SIZES = [1, 10, 50]
+
+QUERY_BUDGETS = {
+    "GET /api/cart": 2,  # cart get-or-create + lines
+    "GET /api/cart (warm)": 1,  # cart id cached
+    "GET /api/wishlist": 2,
+    "GET /api/session/summary": 2,
+    "GET /api/admin/orders": 1,
+    "GET /api/admin/orders?customer=<email>": 2,  # + customer lookup
+    "GET /api/admin/orders/search": 1,
+}
+
+
+def seed_products(db, count):
+    db.tables["products"] = [
+        {
+            "product_id": f"prod_{index}",
+            "name": f"Product {index}",
+            "price": 100.0 + index,
+            "images": [f"https://img.example.com/{index}.jpg"],
+            "stock": 10,
+        }
+        for index in range(count)
+    ]
+
+
+def seed_cart(db, user_id, lines):
+    seed_products(db, lines)
+    db.tables["carts"] = [{"id": 1, "user_id": user_id}]
+    db.tables["cart_items"] = [
+        {
+            "id": 100 + index,
+            "cart_id": 1,
+            "product_id": product["product_id"],
+            "quantity": 1 + index % 3,
+            "name": product["name"],
+            "price": product["price"],
+            "image": product["images"][0],
+        }
+        for index, product in enumerate(db.tables["products"])
+    ]
+
+
+def seed_wishlist(db, user_id, lines):
+    seed_products(db, lines)
+    db.tables["wishlists"] = [{"id": 1, "user_id": user_id}]
+    db.tables["wishlist_items"] = [
+        {
+            "id": 100 + index,
+            "wishlist_id": 1,
+            "product_id": product["product_id"],
+            "name": product["name"],
+            "price": product["price"],
+            "image": product["images"][0],
+            "stock": product["stock"],
+            "added_at": f"2024-01-01T00:00:{index % 60:02d}+00:00",
+        }
+        for index, product in enumerate(db.tables["products"])
+    ]
+
+
+def seed_orders(db, count, items_per_order=3):
+    db.tables["users"] = [CUSTOMER]
+    db.tables["orders"] = []
+    db.tables["order_items"] = []
+
+    for index in range(count):
+        order_id = f"order_{index:04d}"
+        db.tables["orders"].append({
+            "order_id": order_id,
+            "user_id": CUSTOMER["user_id"],
+            "status": "pending" if index % 2 else "shipped",
+            "payment_status": "paid",
+            "total": 300.0,
+            "created_at": f"2024-01-{1 + index % 28:02d}T{index % 24:02d}:00:00+00:00",
+        })
+        for line in range(items_per_order):
+            db.tables["order_items"].append({
+                "order_id": order_id,
+                "product_id": f"prod_{line}",
+                "name": f"Product {line}",
+                "price": 100.0,
+                "image": None,
+                "quantity": 1,
+            })
+
+
+def assert_within_budget(queries, endpoint):
+    budget = QUERY_BUDGETS[endpoint]
+    assert queries.count <= budget, (
+        f"{endpoint} made {queries.count} queries (budget {budget}):\n{queries.describe()}"
+    )
+
+
+@pytest.mark.parametrize("lines", SIZES)
+def test_get_cart_within_budget(client, db, queries, customer_headers, lines):
+    seed_cart(db, "user_customer", lines)
+
+    response = client.get("/api/cart", headers=customer_headers)
+    assert response.status_code == 200
+    assert len(response.json()["items"]) == lines
+    assert_within_budget(queries, "GET /api/cart")
+
+    queries.reset()
+    client.get("/api/cart", headers=customer_headers)
+    assert_within_budget(queries, "GET /api/cart (warm)")
+
+
+@pytest.mark.parametrize("lines", SIZES)
+def test_get_wishlist_within_budget(client, db, queries, customer_headers, lines):
+    seed_wishlist(db, "user_customer", lines)
+
+    response = client.get("/api/wishlist", headers=customer_headers)
+    assert response.status_code == 200
+    assert len(response.json()["items"]) == lines
+    assert_within_budget(queries, "GET /api/wishlist")
+
+
+@pytest.mark.parametrize("lines", SIZES)
+def test_session_summary_within_budget(client, db, queries, customer_headers, lines):
+    seed_cart(db, "user_customer", lines)
+
+    response = client.get("/api/session/summary", headers=customer_headers)
+    assert response.status_code == 200
+    assert response.json()["cart"]["lines"] == lines
+    assert_within_budget(queries, "GET /api/session/summary")
+
+
+@pytest.mark.parametrize("orders", SIZES)
+def test_admin_orders_within_budget(client, db, queries, admin_headers, orders):
+    seed_orders(db, orders)
+
+    response = client.get("/api/admin/orders", headers=admin_headers)
+    assert response.status_code == 200
+    assert len(response.json()) == orders
+    assert all(len(order["items"]) == 3 for order in response.json())
+    assert_within_budget(queries, "GET /api/admin/orders")
+
+    queries.reset()
+    response = client.get(f"/api/admin/orders?customer={CUSTOMER['email']}", headers=admin_headers)
+    assert len(response.json()) == orders
+    assert_within_budget(queries, "GET /api/admin/orders?customer=<email>")
+
+
+@pytest.mark.parametrize("orders", SIZES)
+def test_admin_order_search_pages_within_budget(client, db, queries, admin_headers, orders):
+    seed_orders(db, orders)
+
+    seen, cursor = [], None
+    while True:
+        queries.reset()
+        params = {"limit": 20, **({"cursor": cursor} if cursor else {})}
+        page = client.get("/api/admin/orders/search", params=params, headers=admin_headers).json()
+        assert_within_budget(queries, "GET /api/admin/orders/search")
+
+        seen += [order["order_id"] for order in page["orders"]]
+        cursor = page["next_cursor"]
+        if not cursor:
+            break
+
+    assert sorted(seen) == sorted(order["order_id"] for order in db.tables["orders"])
+
+
+def test_admin_orders_is_paginated(client, db, queries, admin_headers):
+    seed_orders(db, 50)
+
+    seen, cursor = [], None
+    while True:
+        queries.reset()
+        params = {"limit": 20, **({"cursor": cursor} if cursor else {})}
+        response = client.get("/api/admin/orders", params=params, headers=admin_headers)
+        assert len(response.json()) <= 20
+        assert_within_budget(queries, "GET /api/admin/orders")
+
+        seen += [order["order_id"] for order in response.json()]
+        cursor = response.headers.get("X-Next-Cursor")
+        if not cursor:
+            break
+
+    assert sorted(seen) == sorted(order["order_id"] for order in db.tables["orders"])
+
+    # Oversized pages are capped
+    seed_orders(db, 250)
+    response = client.get("/api/admin/orders", params={"limit": 10000}, headers=admin_headers)
+    assert len(response.json()) == server.ADMIN_ORDERS_MAX_PAGE_SIZE
+
+
+@pytest.mark.parametrize("endpoint, seed, headers", [
+    ("/api/cart", seed_cart, "customer_headers"),
+    ("/api/admin/orders", lambda db, _, size: seed_orders(db, size), "admin_headers"),
+])
+def test_query_count_does_not_grow_with_input(client, db, queries, request, endpoint, seed, headers):
+    counts = []
+    for size in SIZES:
+        db.tables.clear()
+        seed(db, "user_customer", size)
+        # Warm per-user caches so every size is measured the same way
+        client.get(endpoint, headers=request.getfixturevalue(headers))
+        queries.reset()
+        client.get(endpoint, headers=request.getfixturevalue(headers))
+        counts.append(queries.count)
+
+    assert len(set(counts)) == 1, f"{endpoint} query count grew with input size: {dict(zip(SIZES, counts))}"
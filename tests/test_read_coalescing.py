@@ -0,0 +1,141 @@
+"""
+Concurrent identical catalog reads share one database call.
+"""
+
+import asyncio
+import threading
+import time
+
+import httpx
+import pytest
+
+import server
+from services.cache.singleflight import SingleFlight
+
+
+def run(coroutine):
+    return asyncio.run(coroutine)
+
+
+def test_concurrent_callers_share_one_fetch():
+    calls, events = [], []
+    flight = SingleFlight(lambda label, shared: events.append(shared))
+
+    async def fetch():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return {"value": 1}
+
+    async def scenario():
+        return await asyncio.gather(*(flight.do("key", fetch, "read") for _ in range(10)))
+
+    results = run(scenario())
+
+    assert len(calls) == 1
+    assert all(result is results[0] for result in results)
+    assert events.count(False) == 1 and events.count(True) == 9
+    assert len(flight) == 0
+
+
+def test_errors_reach_every_caller_and_free_the_key():
+    flight = SingleFlight()
+    attempts = []
+
+    async def failing():
+        attempts.append(1)
+        await asyncio.sleep(0.01)
+        raise RuntimeError("database unavailable")
+
+    async def succeeding():
+        return "ok"
+
+    async def scenario():
+        results = await asyncio.gather(*(flight.do("key", failing) for _ in range(5)), return_exceptions=True)
+        return results, await flight.do("key", succeeding)
+
+    results, retry = run(scenario())
+
+    assert len(attempts) == 1
+    assert all(isinstance(result, RuntimeError) for result in results)
+    assert retry == "ok"
+
+
+def test_cancelled_caller_does_not_cancel_the_shared_fetch():
+    flight = SingleFlight()
+
+    async def fetch():
+        await asyncio.sleep(0.02)
+        return "done"
+
+    async def scenario():
+        first = asyncio.ensure_future(flight.do("key", fetch))
+        await asyncio.sleep(0)
+        second = asyncio.ensure_future(flight.do("key", fetch))
+        await asyncio.sleep(0)
+        first.cancel()
+        return await second
+
+    assert run(scenario()) == "done"
+
+
+class SlowCatalog:
+    """Blocking storage stand-in that counts calls"""
+
+    def __init__(self):
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def _hit(self):
+        with self._lock:
+            self.calls += 1
+        time.sleep(0.05)
+
+    def get_product(self, product_id):
+        self._hit()
+        return {"product_id": product_id, "name": "Viral"} if product_id == "prod_viral" else None
+
+    def list_products(self, category, featured, search, limit, skip):
+        self._hit()
+        return [{"product_id": "prod_viral"}], 1
+
+
+@pytest.fixture
+def catalog(monkeypatch):
+    catalog = SlowCatalog()
+    monkeypatch.setattr(server, "storage", catalog)
+    return catalog
+
+
+def fan_out(*paths):
+    async def scenario():
+        transport = httpx.ASGITransport(app=server.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://testserver") as client:
+            return await asyncio.gather(*(client.get(path) for path in paths))
+
+    return run(scenario())
+
+
+def test_product_detail_spike_makes_one_call(catalog):
+    responses = fan_out(*["/api/products/prod_viral"] * 20, *["/api/products/missing"] * 5)
+
+    assert [response.status_code for response in responses] == [200] * 20 + [404] * 5
+    assert catalog.calls == 2
+
+
+def test_listing_key_normalizes_params(catalog):
+    responses = fan_out(
+        "/api/products?featured=true&limit=8",
+        "/api/products?limit=8&featured=true",
+        "/api/products?featured=true&limit=8&search=",
+        "/api/products?featured=true&limit=4",
+    )
+
+    assert all(response.status_code == 200 for response in responses)
+    assert catalog.calls == 2
+
+
+def test_coalesced_hits_are_exported(catalog):
+    fan_out(*["/api/products/prod_viral"] * 5)
+
+    rendered = server.metrics.render()
+    assert 'coalesced_reads_total{read="products.get",result="coalesced"}' in rendered
@@ -0,0 +1,102 @@
+"""
+Catalog reads go to a lagging replica; a client that writes reads its own
+writes from the primary while its pin cookie is valid.
+"""
+
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+import server
+from benchmarks.postgrest_standin import ReplicaStore, StandinStore
+from services.observability.instrumented_client import InstrumentedClient
+from services.storage.replica_routing import PIN_COOKIE, ReadYourWritesMiddleware, ReplicaSet
+from services.storage.supabase_repository import SupabaseRepository
+
+from .conftest import USERS_BY_TOKEN
+
+
+@pytest.fixture
+def cluster(monkeypatch):
+    primary = StandinStore()
+    primary.tables["products"] = [
+        {"id": 1, "product_id": "prod_1", "name": "Lamp", "price": 100.0, "images": [], "stock": 5, "featured": True}
+    ]
+    primary.tables["categories"] = []
+    # Never catches up on its own; tests call sync()
+    replica = ReplicaStore(primary, lag_seconds=3600)
+
+    replica_set = ReplicaSet([replica], pin_seconds=5)
+    client = InstrumentedClient(primary, [replica_set.observe_query])
+    monkeypatch.setattr(server, "supabase", client)
+    monkeypatch.setattr(server, "storage", SupabaseRepository(client, server.container_id_cache, replica_set))
+
+    async def current_user(request):
+        token = request.headers.get("Authorization", "").removeprefix("Bearer ")
+        return USERS_BY_TOKEN.get(token)
+
+    monkeypatch.setattr(server, "get_current_user", current_user)
+    server.product_cache.clear()
+
+    app = ReadYourWritesMiddleware(server.app, replica_set)
+    return primary, replica, replica_set, app
+
+
+def price(client, product_id="prod_1"):
+    return client.get(f"/api/products/{product_id}").json()["price"]
+
+
+def test_reads_go_to_replica_and_set_no_pin(cluster):
+    primary, replica, _, app = cluster
+    replica.tables["products"][0]["price"] = 1.0  # only visible when reading the replica
+
+    client = TestClient(app)
+    response = client.get("/api/products", params={"featured": "true"})
+
+    assert response.json()["products"][0]["price"] == 1.0
+    assert PIN_COOKIE not in response.cookies
+
+
+def test_writer_reads_own_writes_until_replica_catches_up(cluster, admin_headers):
+    _, replica, _, app = cluster
+    writer, other = TestClient(app), TestClient(app)
+
+    response = writer.put("/api/products/prod_1", json={"price": 250.0}, headers=admin_headers)
+    assert response.status_code == 200
+    assert PIN_COOKIE in response.cookies
+
+    assert price(writer) == 250.0
+    assert price(other) == 100.0
+
+    replica.sync()
+    assert price(other) == 250.0
+
+
+def test_pin_outside_window_is_ignored(cluster):
+    _, _, replica_set, _ = cluster
+    now = time.time()
+
+    assert replica_set.is_pinned(str(now + 3), now)
+    assert not replica_set.is_pinned(str(now - 1), now)
+    assert not replica_set.is_pinned(str(now + 3600), now)
+    assert not replica_set.is_pinned("garbage", now)
+
+
+def test_checkout_validates_stock_on_primary(cluster, customer_headers):
+    primary, replica, _, app = cluster
+    replica.tables["products"][0]["stock"] = 0  # stale replica must not block the order
+
+    client = TestClient(app)
+    assert client.post("/api/cart/add", json={"product_id": "prod_1", "quantity": 2}, headers=customer_headers).status_code == 200
+
+    response = client.post(
+        "/api/orders",
+        json={"shipping_address": {
+            "full_name": "Customer", "phone": "1", "address_line1": "x", "city": "c", "state": "s", "pincode": "1"
+        }},
+        headers=customer_headers,
+    )
+
+    assert response.status_code == 200
+    assert primary.tables["products"][0]["stock"] == 3
@@ -0,0 +1,220 @@
+"""
+Storefront flows through the app with ``STORAGE_BACKEND=sqlite``.
+"""
+
+import pytest
+from fastapi.testclient import TestClient
+
+import server
+from services.storage.sqlite_repository import SQLiteRepository
+
+from .conftest import CUSTOMER, USERS_BY_TOKEN
+
+SHIPPING_ADDRESS = {
+    "full_name": "Customer",
+    "phone": "9999999999",
+    "address_line1": "1 Main Street",
+    "city": "Pune",
+    "state": "MH",
+    "pincode": "411001",
+}
+
+
+@pytest.fixture
+def repo(tmp_path):
+    repo = SQLiteRepository(tmp_path / "store.db")
+    repo.seed_catalog(
+        [{"category_id": "cat_tech", "name": "Technology", "slug": "tech", "image": None}],
+        [
+            {
+                "product_id": f"prod_{index}",
+                "name": f"Product {index}",
+                "description": "Sample" if index % 2 else "Other",
+                "price": 100.0 + index,
+                "category": "tech",
+                "images": [f"https://img.example.com/{index}.jpg"],
+                "stock": 3,
+                "featured": index < 2,
+                "created_at": "2024-01-01T00:00:00+00:00",
+            }
+            for index in range(5)
+        ],
+    )
+    yield repo
+    repo.close()
+
+
+@pytest.fixture
+def client(repo, monkeypatch):
+    async def current_user(request):
+        token = request.headers.get("Authorization", "").removeprefix("Bearer ")
+        return USERS_BY_TOKEN.get(token)
+
+    monkeypatch.setattr(server, "storage", repo)
+    monkeypatch.setattr(server, "get_current_user", current_user)
+
+    for cache in (server.wishlist_products_cache, server.session_summary_cache, server.product_cache, server.tracking_cache):
+        cache.clear()
+
+    return TestClient(server.app)
+
+
+def test_catalog_filters_and_pagination(client):
+    body = client.get("/api/products", params={"featured": "true"}).json()
+    assert body["total"] == 2
+    assert body["products"][0]["images"] == ["https://img.example.com/0.jpg"]
+    assert body["products"][0]["featured"] is True
+
+    body = client.get("/api/products", params={"search": "sample", "limit": 1, "skip": 1}).json()
+    assert body["total"] == 2
+    assert [product["product_id"] for product in body["products"]] == ["prod_3"]
+
+    assert client.get("/api/products/prod_1").json()["name"] == "Product 1"
+    assert client.get("/api/products/missing").status_code == 404
+    assert [category["slug"] for category in client.get("/api/categories").json()] == ["tech"]
+
+
+def test_cart_add_patch_and_stock_limits(client, customer_headers):
+    assert client.post("/api/cart/add", json={"product_id": "prod_0", "quantity": 2}, headers=customer_headers).status_code == 200
+    response = client.post("/api/cart/add", json={"product_id": "prod_0", "quantity": 2}, headers=customer_headers)
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Stock limit exceeded"
+
+    response = client.patch(
+        "/api/cart",
+        json={"operations": [
+            {"op": "add", "product_id": "prod_1", "quantity": 1},
+            {"op": "set", "product_id": "prod_0", "quantity": 3},
+        ]},
+        headers=customer_headers,
+    )
+    assert response.status_code == 200
+    assert [(item["product_id"], item["quantity"]) for item in response.json()["items"]] == [("prod_0", 3), ("prod_1", 1)]
+
+    # A failing operation rolls back the whole batch
+    response = client.patch(
+        "/api/cart",
+        json={"operations": [
+            {"op": "remove", "product_id": "prod_1"},
+            {"op": "add", "product_id": "prod_0", "quantity": 1},
+        ]},
+        headers=customer_headers,
+    )
+    assert response.status_code == 400
+
+    cart = client.get("/api/cart", headers=customer_headers).json()
+    assert [(item["product_id"], item["quantity"]) for item in cart["items"]] == [("prod_0", 3), ("prod_1", 1)]
+    assert cart["items"][0]["image"] == "https://img.example.com/0.jpg"
+    assert cart["subtotal"] == 100.0 * 3 + 101.0
+
+    summary = client.get("/api/session/summary", headers=customer_headers).json()
+    assert summary["cart"] == {"lines": 2, "quantity": 4}
+
+
+def test_wishlist_moves_and_snapshot_propagation(client, repo, customer_headers, admin_headers):
+    for product_id in ("prod_2", "prod_3"):
+        client.post("/api/wishlist/add", json={"product_id": product_id}, headers=customer_headers)
+    assert client.post("/api/wishlist/add", json={"product_id": "prod_2"}, headers=customer_headers).json() == {"message": "Already in wishlist"}
+
+    client.put("/api/products/prod_2", json={"price": 999.0}, headers=admin_headers)
+    items = client.get("/api/wishlist", headers=customer_headers).json()["items"]
+    assert [(item["product_id"], item["price"]) for item in items] == [("prod_2", 999.0), ("prod_3", 103.0)]
+
+    client.patch("/api/cart", json={"operations": [{"op": "set", "product_id": "prod_3", "quantity": 3}]}, headers=customer_headers)
+    result = client.post("/api/wishlist/move-to-cart", json={}, headers=customer_headers).json()
+    assert result == {"moved": ["prod_2"], "skipped": ["prod_3"]}
+
+    result = client.post("/api/cart/move-to-wishlist", json={"product_ids": ["prod_3"]}, headers=customer_headers).json()
+    assert result == {"moved": ["prod_3"], "skipped": []}
+    assert client.get("/api/wishlist/count", headers=customer_headers).json() == {"count": 1}
+    assert repo.cart_counts(CUSTOMER["user_id"]) == {"lines": 1, "quantity": 1}
+
+
+def test_place_order_decrements_stock_and_clears_cart(client, repo, customer_headers):
+    client.post("/api/cart/add", json={"product_id": "prod_1", "quantity": 2}, headers=customer_headers)
+
+    response = client.post("/api/orders", json={"shipping_address": SHIPPING_ADDRESS}, headers=customer_headers)
+    assert response.status_code == 200
+    order_id = response.json()["order_id"]
+    assert response.json()["total"] == 101.0 * 2 + server.SHIPPING_RATE
+
+    order = client.get(f"/api/orders/{order_id}", headers=customer_headers).json()
+    assert order["shipping_address"]["city"] == "Pune"
+    assert [(item["product_id"], item["quantity"]) for item in order["items"]] == [("prod_1", 2)]
+
+    assert repo.get_product("prod_1")["stock"] == 1
+    assert client.get("/api/cart", headers=customer_headers).json()["items"] == []
+
+    response = client.post("/api/orders", json={"shipping_address": SHIPPING_ADDRESS}, headers=customer_headers)
+    assert response.json()["detail"] == "Cart is empty"
+
+
+def test_guest_cart_merge_keeps_larger_quantity(repo):
+    repo.add_cart_item(CUSTOMER["user_id"], "prod_0", 2)
+
+    assert repo.merge_guest_cart(CUSTOMER["user_id"], {"prod_0": 1, "prod_1": 10, "missing": 1}) == 2
+    assert repo.merge_guest_cart(CUSTOMER["user_id"], {"prod_0": 1}) == 1
+
+    lines = {line["product_id"]: line["quantity"] for line in repo.cart_lines(CUSTOMER["user_id"])}
+    assert lines == {"prod_0": 2, "prod_1": 3}
+
+
+def test_admin_and_tracking_read_orders_from_sqlite(client, repo, customer_headers, admin_headers):
+    repo.create_user({"user_id": CUSTOMER["user_id"], "email": CUSTOMER["email"], "name": CUSTOMER["name"]})
+    order_ids = []
+    for product_id in ("prod_0", "prod_1", "prod_2"):
+        client.post("/api/cart/add", json={"product_id": product_id, "quantity": 1}, headers=customer_headers)
+        order_ids.append(
+            client.post("/api/orders", json={"shipping_address": SHIPPING_ADDRESS}, headers=customer_headers).json()["order_id"]
+        )
+
+    first = client.get("/api/admin/orders", params={"limit": 2, "customer": CUSTOMER["email"]}, headers=admin_headers)
+    second = client.get("/api/admin/orders", params={"cursor": first.headers["X-Next-Cursor"]}, headers=admin_headers)
+    listed = first.json() + second.json()
+    assert sorted(order["order_id"] for order in listed) == sorted(order_ids)
+    assert all(len(order["items"]) == 1 for order in listed)
+
+    changes = client.get("/api/admin/orders/changes", params={"since": "0"}, headers=admin_headers).json()
+    assert [order["order_id"] for order in changes["orders"]] == order_ids
+
+    response = client.put(
+        f"/api/admin/orders/{order_ids[0]}",
+        params={"status": "shipped", "tracking_number": "ABC123", "tracking_provider": "delhivery"},
+        headers=admin_headers,
+    )
+    assert response.status_code == 200
+    assert client.get(f"/api/tracking/{order_ids[0]}").json()["tracking_number"] == "ABC123"
+
+    result = client.post(
+        "/api/admin/orders/bulk-update",
+        json={"rows": [{"order_id": order_ids[1], "status": "delivered"}, {"order_id": "order_missing", "status": "shipped"}]},
+        headers=admin_headers,
+    ).json()
+    assert (result["updated"], result["failed"]) == (1, 1)
+
+    changes = client.get("/api/admin/orders/changes", params={"since": changes["cursor"]}, headers=admin_headers).json()
+    assert [(order["order_id"], order["status"]) for order in changes["orders"]] == [
+        (order_ids[0], "shipped"), (order_ids[1], "delivered")
+    ]
+
+    server.tracking_cache.clear()
+    batch = client.post("/api/tracking/batch", json={"order_ids": [*order_ids, "order_missing"]}).json()
+    assert [order["status"] for order in batch["orders"]] == ["shipped", "delivered", "pending"]
+    assert batch["not_found"] == ["order_missing"]
+
+    stats = client.get("/api/admin/stats", headers=admin_headers).json()
+    assert (stats["total_orders"], stats["shipped_orders"], stats["delivered_orders"]) == (3, 1, 1)
+    assert (stats["total_products"], stats["total_users"]) == (5, 1)
+
+    export = client.get("/api/admin/orders/export", headers=admin_headers)
+    assert len(export.text.strip().splitlines()) == 1 + 3
+
+
+def test_checkout_refreshes_wishlist_stock(client, customer_headers):
+    client.post("/api/wishlist/add", json={"product_id": "prod_1"}, headers=customer_headers)
+    client.post("/api/cart/add", json={"product_id": "prod_1", "quantity": 3}, headers=customer_headers)
+
+    assert client.post("/api/orders", json={"shipping_address": SHIPPING_ADDRESS}, headers=customer_headers).status_code == 200
+
+    items = client.get("/api/wishlist", headers=customer_headers).json()["items"]
+    assert [(item["product_id"], item["stock"]) for item in items] == [("prod_1", 0)]
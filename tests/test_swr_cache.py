@@ -0,0 +1,134 @@
+"""
+Stale-while-revalidate behaviour for the home page reads.
+"""
+
+import asyncio
+
+import pytest
+
+from services.cache.swr_cache import StaleWhileRevalidateCache
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class Source:
+    def __init__(self):
+        self.calls = 0
+        self.fail = False
+        self.release = None
+
+    async def fetch(self):
+        self.calls += 1
+        if self.release is not None:
+            await self.release.wait()
+        if self.fail:
+            raise RuntimeError("database unavailable")
+        return f"v{self.calls}"
+
+
+async def settle():
+    """Let in-flight refresh tasks and their callbacks run"""
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+
+@pytest.fixture
+def clock():
+    return Clock()
+
+
+@pytest.fixture
+def cache(clock):
+    return StaleWhileRevalidateCache(ttl=30, max_age=300, clock=clock)
+
+
+def test_stale_entry_is_served_while_one_refresh_runs(cache, clock):
+    source = Source()
+
+    async def scenario():
+        assert await cache.get("featured", source.fetch) == "v1"
+
+        clock.now += 31
+        stale = await asyncio.gather(*(cache.get("featured", source.fetch) for _ in range(10)))
+        await settle()
+        return stale, await cache.get("featured", source.fetch)
+
+    stale, refreshed = asyncio.run(scenario())
+
+    assert stale == ["v1"] * 10
+    assert refreshed == "v2"
+    assert source.calls == 2
+
+
+def test_entries_past_max_age_are_never_served(cache, clock):
+    source = Source()
+
+    async def scenario():
+        await cache.get("featured", source.fetch)
+        clock.now += 301
+        return await cache.get("featured", source.fetch)
+
+    assert asyncio.run(scenario()) == "v2"
+
+
+def test_failed_refresh_keeps_serving_stale_until_max_age(cache, clock):
+    source = Source()
+
+    async def scenario():
+        await cache.get("featured", source.fetch)
+        source.fail = True
+
+        clock.now += 60
+        assert await cache.get("featured", source.fetch) == "v1"
+        await settle()
+        assert await cache.get("featured", source.fetch) == "v1"
+        await settle()
+
+        clock.now += 300
+        with pytest.raises(RuntimeError):
+            await cache.get("featured", source.fetch)
+
+    asyncio.run(scenario())
+    assert source.calls == 4
+
+
+def test_clear_discards_a_refresh_started_before_the_write(cache, clock):
+    source = Source()
+
+    async def scenario():
+        await cache.get("featured", source.fetch)
+
+        clock.now += 31
+        source.release = asyncio.Event()
+        await cache.get("featured", source.fetch)  # stale, refresh now in flight
+        await settle()
+
+        cache.clear()
+        source.release.set()
+        await settle()
+        return len(cache)
+
+    assert asyncio.run(scenario()) == 0
+
+
+def test_max_age_below_ttl_is_rejected():
+    with pytest.raises(ValueError):
+        StaleWhileRevalidateCache(ttl=60, max_age=30)
+
+
+def test_categories_are_cached_until_an_admin_adds_one(client, db, queries, admin_headers):
+    db.tables["categories"] = [{"category_id": "cat_1", "name": "Tech", "slug": "tech", "image": None}]
+
+    assert len(client.get("/api/categories").json()) == 1
+    queries.reset()
+    assert len(client.get("/api/categories").json()) == 1
+    assert queries.count == 0
+
+    client.post("/api/categories", params={"name": "Home", "slug": "home"}, headers=admin_headers)
+    assert len(client.get("/api/categories").json()) == 2